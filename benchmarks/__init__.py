@@ -0,0 +1,4 @@
+"""
+Benchmarks for the GinRummy Score Tracker
+Synthetic history generation and timed statistics scenarios
+"""
@@ -0,0 +1,163 @@
+"""
+Benchmark runner
+Generates (or reuses) synthetic histories, times every scenario and writes
+JSON results that can be compared between commits
+
+Usage:
+    python -m benchmarks [--sizes 1k,100k] [--only stats] [--repeat 5] [--output results.json]
+    python -m benchmarks compare BASELINE.json CURRENT.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .scenarios import SCENARIOS
+from .synthetic import build_database, parse_size
+
+# Bump when generated data changes so cached databases are rebuilt
+GENERATOR_VERSION = 6
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def qt_available():
+    import importlib.util
+    return importlib.util.find_spec("PyQt5") is not None
+
+
+def database_for(cache_dir, count, schema, seed):
+    """Return a cached synthetic database, generating it on first use"""
+    path = os.path.join(cache_dir, f"ginrummy_v{GENERATOR_VERSION}_{schema}_{count}_{seed}.db")
+    if not os.path.exists(path):
+        print(f"  generating {count} {schema} matches...", flush=True)
+        build_database(path + ".tmp", count, seed, schema=schema).close()
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def time_scenario(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(args):
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    has_qt = qt_available()
+    results = []
+    for count in sizes:
+        for scenario in SCENARIOS:
+            if args.only and not any(part in scenario.name for part in args.only.split(",")):
+                continue
+            if scenario.max_matches is not None and count > scenario.max_matches:
+                continue
+            if scenario.needs_qt and not has_qt:
+                print(f"- {scenario.name} skipped (PyQt5 not installed)")
+                continue
+            path = database_for(args.cache_dir, count, scenario.schema, args.seed)
+            func = scenario.setup(path)
+            teardown = None
+            if isinstance(func, tuple):
+                func, teardown = func
+            try:
+                func()  # warm-up: page cache, imports, first-use allocations
+                timings = time_scenario(func, args.repeat)
+            finally:
+                if teardown is not None:
+                    teardown()
+            result = {
+                "scenario": scenario.name,
+                "matches": count,
+                "schema": scenario.schema,
+                "runs": timings,
+                "best": min(timings),
+                "median": statistics.median(timings),
+            }
+            results.append(result)
+            print(f"{scenario.name:<36} {count:>10}  best {result['best'] * 1000:>10.2f} ms"
+                  f"  median {result['median'] * 1000:>10.2f} ms", flush=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+    return report
+
+
+def compare(args):
+    """Print per-scenario ratios between two result files"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    before = {(r["scenario"], r["matches"]): r["best"] for r in baseline["results"]}
+    print(f"{'scenario':<36} {'matches':>10} {'before ms':>12} {'after ms':>12} {'change':>9}")
+    for result in current["results"]:
+        key = (result["scenario"], result["matches"])
+        if key not in before:
+            continue
+        old, new = before[key], result["best"]
+        change = (new - old) / old * 100 if old else 0
+        flag = "  ⚠" if change > args.threshold else ""
+        print(f"{key[0]:<36} {key[1]:>10} {old * 1000:>12.2f} {new * 1000:>12.2f} {change:>+8.1f}%{flag}")
+
+
+def main():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    parser = argparse.ArgumentParser(description="Run the GinRummy benchmark suite")
+    subparsers = parser.add_subparsers(dest="command")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="flag slowdowns above this percentage")
+
+    parser.add_argument("--sizes", default="1k,100k", help="comma-separated history sizes")
+    parser.add_argument("--only", help="comma-separated scenario name filters")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    parser.add_argument("--cache-dir", default=tempfile.gettempdir(),
+                        help="where generated databases are kept between runs")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
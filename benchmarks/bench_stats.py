@@ -0,0 +1,65 @@
+"""
+Statistics benchmark
+Compares the original six-query, parse-in-Python statistics pass with the
+single set-based SQL query and the persisted running aggregates
+
+Usage: python -m benchmarks.bench_stats [--matches N] [--db PATH] [--repeat R]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from gin_rummy import aggregates
+from gin_rummy.queries import query_statistics
+
+from .legacy import legacy_statistics
+from .synthetic import build_database
+
+
+def best_of(func, conn, repeat):
+    """Return the fastest wall-clock time of repeat calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(conn)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(path, repeat):
+    conn = sqlite3.connect(path)
+    scenarios = [
+        ("legacy (6 queries + Python parsing)", legacy_statistics),
+        ("set-based SQL (1 query)", query_statistics),
+        ("running aggregates (1 row)", lambda c: aggregates.load(c).statistics()),
+    ]
+    results = {}
+    for name, func in scenarios:
+        results[name] = best_of(func, conn, repeat)
+    conn.close()
+
+    baseline = results[scenarios[0][0]]
+    for name, seconds in results.items():
+        print(f"{name:<40} {seconds * 1000:>10.1f} ms  {baseline / seconds:>8.1f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GinRummy statistics computation")
+    parser.add_argument("--matches", type=int, default=1000000, help="synthetic history size")
+    parser.add_argument("--db", help="reuse (or create) this database file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario (best is kept)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.gettempdir(), f"ginrummy_bench_{args.matches}.db")
+    if not os.path.exists(path):
+        print(f"Generating {args.matches} synthetic matches at {path}...")
+        build_database(path, args.matches).close()
+    run(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Original hot paths, kept as benchmark baselines
+Faithful copies of the data access the tracker did before the hands
+table, running aggregates and paged history existed
+"""
+
+from gin_rummy.scores import parse_game_scores
+
+
+def legacy_statistics(conn):
+    """The original update_statistics data pass, kept as the benchmark baseline"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM matches')
+    total_matches = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM matches WHERE winner = 'Zayaka'")
+    zayaka_wins = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM matches WHERE winner = 'Brian'")
+    brian_wins = cursor.fetchone()[0]
+    cursor.execute('SELECT AVG(zayaka_score), AVG(brian_score) FROM matches')
+    avg_scores = cursor.fetchone()
+
+    cursor.execute('SELECT game_scores FROM matches')
+    zayaka_hands = []
+    brian_hands = []
+    for (game_scores,) in cursor.fetchall():
+        for zayaka, brian in parse_game_scores(game_scores):
+            zayaka_hands.append(zayaka)
+            brian_hands.append(brian)
+    hand_stats = (sum(zayaka_hands), max(zayaka_hands, default=0), min(zayaka_hands, default=0),
+                  sum(brian_hands), max(brian_hands, default=0), min(brian_hands, default=0))
+
+    cursor.execute('SELECT winner FROM matches ORDER BY match_date')
+    zayaka_streak = brian_streak = current_zayaka = current_brian = 0
+    for (winner,) in cursor.fetchall():
+        if winner == "Zayaka":
+            current_zayaka += 1
+            current_brian = 0
+            zayaka_streak = max(zayaka_streak, current_zayaka)
+        else:
+            current_brian += 1
+            current_zayaka = 0
+            brian_streak = max(brian_streak, current_brian)
+
+    cursor.execute('SELECT game_scores FROM matches')
+    match_games = [len(row[0].split('; ')) for row in cursor.fetchall() if row[0]]
+    zayaka_non_zero = sum(1 for score in zayaka_hands if score > 0)
+    brian_non_zero = sum(1 for score in brian_hands if score > 0)
+    return (total_matches, zayaka_wins, brian_wins, avg_scores, hand_stats,
+            zayaka_streak, brian_streak, sum(match_games), zayaka_non_zero, brian_non_zero)
+
+
+def legacy_load_history(conn):
+    """The original load_match_history query: every match, fully materialized"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM matches ORDER BY match_date DESC')
+    matches = cursor.fetchall()
+    # One display string per cell, as QTableWidgetItem(str(value)) did
+    return [[str(value) for value in match] for match in matches]
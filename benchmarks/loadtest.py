@@ -0,0 +1,224 @@
+"""
+Score service load test
+Plays many tables against the score submission service at once, each
+sending its next hand as soon as the last one is answered, and reports the
+sustained hands per second and latency percentiles
+
+Without --port a server is started in this process, on a scratch database,
+so the clients and the server share one event loop and CPU.
+
+Usage: python -m benchmarks.loadtest [--tables 40] [--duration 10] [--transport http|ws]
+                                     [--subscribers 1] [--host HOST --port PORT] [--seed S]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from gin_rummy.server import ScoreServer, encode_frame, read_message
+
+from .synthetic import generate_hands
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class LoadResult:
+    """What one load test run achieved"""
+    tables: int
+    transport: str
+    seconds: float = 0.0
+    hands: int = 0
+    matches: int = 0
+    errors: int = 0
+    # Events pushed to the subscriber clients
+    pushed: int = 0
+    # Seconds from sending each hand to its answer
+    latencies: list = field(default_factory=list)
+
+    @property
+    def hands_per_second(self):
+        return self.hands / self.seconds if self.seconds else 0.0
+
+    def latency(self, percentile):
+        """Nearest-rank latency percentile in milliseconds"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, -(-percentile * len(ordered) // 100))
+        return ordered[rank - 1] * 1000
+
+
+class HttpClient:
+    """One keep-alive HTTP connection"""
+
+    async def open(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        return self
+
+    async def score(self, table_id, zayaka, brian):
+        body = json.dumps({"zayaka": zayaka, "brian": brian}).encode()
+        self.writer.write((f"POST /tables/{table_id}/hands HTTP/1.1\r\nHost: loadtest\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                      if line.lower().startswith(b"content-length:"))
+        reply = json.loads(await self.reader.readexactly(length))
+        return reply if status == 200 else dict(reply, event="error")
+
+    async def close(self):
+        self.writer.close()
+
+
+class WebSocketClient:
+    """One WebSocket connection; frames it sends are masked as the protocol requires"""
+
+    async def open(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /ws HTTP/1.1\r\nHost: loadtest\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 101"):
+            raise ConnectionError(f"WebSocket upgrade refused: {head.splitlines()[0].decode()}")
+        self.sent = 0
+        return self
+
+    def send(self, payload):
+        self.writer.write(encode_frame(json.dumps(payload).encode(), mask=True))
+
+    async def receive(self):
+        """The next event, or None once the server has closed the connection"""
+        message = await read_message(self.reader, self.writer, mask=True)
+        return None if message is None else json.loads(message)
+
+    async def score(self, table_id, zayaka, brian):
+        self.sent += 1
+        self.send({"table": table_id, "zayaka": zayaka, "brian": brian, "id": self.sent})
+        while True:
+            event = await self.receive()
+            if event is None:
+                raise ConnectionError("the server closed the connection")
+            if event.get("id") == self.sent:
+                return event
+
+    async def close(self):
+        self.writer.close()
+
+
+async def play_table(host, port, table_id, transport, deadline, rng, result):
+    """Play matches at one table until the deadline, one hand in flight at a time"""
+    client = await (HttpClient() if transport == "http" else WebSocketClient()).open(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            _, _, hands = generate_hands(rng)
+            for zayaka, brian in hands:
+                start = time.perf_counter()
+                reply = await client.score(table_id, zayaka, brian)
+                result.latencies.append(time.perf_counter() - start)
+                if reply.get("event") == "error":
+                    result.errors += 1
+                    break
+                result.hands += 1
+                if reply.get("match_id") is not None:
+                    result.matches += 1
+    finally:
+        await client.close()
+
+
+async def watch(host, port, result, stopped):
+    """A subscriber to every table, counting the events pushed to it"""
+    client = await WebSocketClient().open(host, port)
+    client.send({"subscribe": "*"})
+    receiving = asyncio.ensure_future(client.receive())
+    try:
+        while True:
+            done, _ = await asyncio.wait([receiving, stopped], return_when=asyncio.FIRST_COMPLETED)
+            if receiving not in done or receiving.result() is None:
+                break
+            if receiving.result().get("event") in ("hand", "match"):
+                result.pushed += 1
+            receiving = asyncio.ensure_future(client.receive())
+    finally:
+        receiving.cancel()
+        await client.close()
+
+
+async def run_load(host, port, tables=40, duration=10.0, transport="http", subscribers=0, seed=0):
+    """Drive `tables` tables at the server for `duration` seconds and return a LoadResult"""
+    result = LoadResult(tables, transport)
+    stopped = asyncio.get_running_loop().create_future()
+    watchers = [asyncio.ensure_future(watch(host, port, result, stopped)) for _ in range(subscribers)]
+    # Let the subscriptions land before the first hand
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(play_table(host, port, f"table-{n}", transport, deadline,
+                                      random.Random(seed * 1000003 + n), result)
+                           for n in range(tables)))
+    result.seconds = time.perf_counter() - start
+    stopped.set_result(None)
+    await asyncio.gather(*watchers)
+    return result
+
+
+def format_result(result):
+    latency = "  ".join(f"p{p} {result.latency(p):.2f}" for p in PERCENTILES)
+    lines = [
+        f"{result.tables} tables over {result.transport} for {result.seconds:.1f} s",
+        f"  hands    {result.hands:>9}  ({result.hands_per_second:,.0f} hands/s)",
+        f"  matches  {result.matches:>9}  ({result.matches / result.seconds if result.seconds else 0:,.1f} matches/s)",
+        f"  latency  {latency}  max {max(result.latencies, default=0) * 1000:.2f} ms",
+    ]
+    if result.errors:
+        lines.append(f"  errors   {result.errors:>9}")
+    if result.pushed:
+        lines.append(f"  pushed   {result.pushed:>9}  events to subscribers")
+    return "\n".join(lines)
+
+
+async def run_local(args):
+    """Start a server on a scratch database, load it, and check every match was saved"""
+    with tempfile.TemporaryDirectory(prefix="ginrummy_load_") as scratch:
+        path = os.path.join(scratch, "history.db")
+        server = await ScoreServer(path).start(port=0)
+        try:
+            result = await run_load("127.0.0.1", server.port, args.tables, args.duration,
+                                    args.transport, args.subscribers, args.seed)
+        finally:
+            await server.close()
+        conn = sqlite3.connect(path)
+        saved = conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+        conn.close()
+        print(format_result(result))
+        print(f"  commits  {server.writer.batches:>9}  ({saved} matches saved)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the score submission service")
+    parser.add_argument("--tables", type=int, default=40, help="tables entering hands at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to keep playing")
+    parser.add_argument("--transport", choices=["http", "ws"], default="http", help="how hands are sent")
+    parser.add_argument("--subscribers", type=int, default=1, help="WebSocket clients watching every table")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, help="server port (default: start a server in this process)")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic hand seed")
+    args = parser.parse_args()
+
+    if args.port is None:
+        asyncio.run(run_local(args))
+    else:
+        print(format_result(asyncio.run(run_load(args.host, args.port, args.tables, args.duration,
+                                                 args.transport, args.subscribers, args.seed))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Timed benchmark scenarios for each tracker hot path
+Every scenario opens a synthetic database and returns the zero-argument
+callable to time, plus an optional teardown that undoes any writes; Qt
+scenarios run against the offscreen platform
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+
+from gin_rummy import Match, MatchRecord, aggregates, db, histograms, players, ratings, search
+from gin_rummy.events import MatchLog
+from gin_rummy.history import HistoryFilter, HistoryPager
+from gin_rummy.journal import MatchJournal, journal_path
+from gin_rummy.parallel import parallel_aggregates, pool
+from gin_rummy.queries import query_statistics
+from gin_rummy.stats_cache import StatisticsCache
+from gin_rummy.win_probability import WinProbabilityTable
+from gin_rummy.writer import WriteBehindQueue, WriteSettings
+
+from .legacy import legacy_load_history, legacy_statistics
+
+
+BENCH_MATCH_DATE = "2099-01-01 20:00:00"
+
+
+@dataclass
+class Scenario:
+    """A named measurement over a database of one schema"""
+    name: str
+    setup: object
+    schema: str = "current"
+    needs_qt: bool = False
+    # Largest history the scenario is worth running against (None = any)
+    max_matches: int = None
+
+
+SCENARIOS = []
+
+
+def scenario(name, schema="current", needs_qt=False, max_matches=None):
+    """Register setup(path) -> callable (or (callable, teardown)) as a scenario"""
+    def register(setup):
+        SCENARIOS.append(Scenario(name, setup, schema, needs_qt, max_matches))
+        return setup
+    return register
+
+
+class InlineDatabase:
+    """Runs database-thread jobs immediately, so Qt models can be timed without a thread"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def submit(self, group, fn, on_result=None, on_progress=None, on_error=None,
+               cancellable=True, replace=False):
+        result = fn(self.conn, lambda message: None)
+        if on_result is not None:
+            on_result(result)
+
+    def cancel(self, group):
+        pass
+
+
+_app = None
+
+
+def qt_app():
+    """Create the shared offscreen QApplication on first use"""
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    if _app is None:
+        _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+# --- update_statistics -------------------------------------------------------
+
+@scenario("stats.legacy", schema="legacy")
+def stats_legacy(path):
+    conn = sqlite3.connect(path)
+    return lambda: legacy_statistics(conn)
+
+
+@scenario("stats.sql")
+def stats_sql(path):
+    conn = sqlite3.connect(path)
+    return lambda: query_statistics(conn)
+
+
+@scenario("stats.aggregates")
+def stats_aggregates(path):
+    conn = sqlite3.connect(path)
+    return lambda: aggregates.load(conn).statistics()
+
+
+@scenario("stats.numpy")
+def stats_numpy(path):
+    from gin_rummy.columnar import columnar_statistics
+
+    conn = sqlite3.connect(path)
+    return lambda: columnar_statistics(conn)
+
+
+@scenario("stats.numpy_distributions")
+def stats_numpy_distributions(path):
+    from gin_rummy.columnar import load_columns
+
+    conn = sqlite3.connect(path)
+    return lambda: load_columns(conn).distributions()
+
+
+@scenario("stats.hand_percentiles")
+def stats_hand_percentiles(path):
+    conn = sqlite3.connect(path)
+    return lambda: {player: (histogram.percentiles(), histogram.scoring().percentiles())
+                    for player, histogram in histograms.load(conn).items()}
+
+
+@scenario("stats.win_probability_build")
+def stats_win_probability_build(path):
+    conn = sqlite3.connect(path)
+    return lambda: WinProbabilityTable.build(histograms.load(conn))
+
+
+@scenario("players.leaderboard")
+def players_leaderboard(path):
+    conn = sqlite3.connect(path)
+    return lambda: [players.leaderboard(conn, metric, k=10) for metric in players.METRICS]
+
+
+@scenario("ratings.replay")
+def ratings_replay(path):
+    conn = sqlite3.connect(path)
+
+    def run():
+        with conn:
+            ratings.replay(conn)
+    return run
+
+
+@scenario("players.rebuild")
+def players_rebuild(path):
+    conn = sqlite3.connect(path)
+
+    def run():
+        with conn:
+            players.rebuild_tables(conn)
+    return run
+
+
+def drop_stats_cache(conn):
+    """Leave the cached database without a statistics cache row"""
+    with conn:
+        conn.execute('DELETE FROM stats_cache')
+
+
+@scenario("stats.cache_unchanged")
+def stats_cache_unchanged(path):
+    conn = db.connect(path)
+    StatisticsCache(conn).aggregates()
+    # A new cache each run, as after a restart: fingerprint plus one row read
+    return lambda: StatisticsCache(conn).aggregates(), lambda: drop_stats_cache(conn)
+
+
+@scenario("stats.cache_delta_10")
+def stats_cache_delta(path):
+    conn = db.connect(path)
+    saved = aggregates.load(conn)
+    StatisticsCache(conn).aggregates()
+    cached_row = conn.execute('SELECT * FROM stats_cache').fetchone()
+    for _ in range(10):
+        db.insert_match(conn, 107, 31, "Zayaka", BENCH_MATCH_DATE, BENCH_HANDS)
+
+    def run():
+        # Put back the row from before the 10 matches so every run folds them in
+        with conn:
+            conn.execute(f'INSERT OR REPLACE INTO stats_cache VALUES ({", ".join("?" for _ in cached_row)})',
+                         cached_row)
+        StatisticsCache(conn).aggregates()
+
+    def teardown():
+        remove_bench_matches(conn, saved)
+        drop_stats_cache(conn)
+    return run, teardown
+
+
+def parallel_scenario(workers):
+    """Register a full recompute across `workers` processes; the pool is started once in setup"""
+    @scenario(f"stats.parallel_{workers}")
+    def setup(path):
+        conn = sqlite3.connect(path)
+        if workers == 1:
+            return lambda: parallel_aggregates(conn, 1)
+        executor = pool(workers)
+        return lambda: parallel_aggregates(conn, workers, executor), executor.shutdown
+    return setup
+
+
+for _workers in (1, 2, 4, 8):
+    parallel_scenario(_workers)
+
+
+# --- load_match_history ------------------------------------------------------
+
+@scenario("history.legacy_fetchall", schema="legacy")
+def history_legacy(path):
+    conn = sqlite3.connect(path)
+    return lambda: legacy_load_history(conn)
+
+
+@scenario("history.first_page")
+def history_first_page(path):
+    conn = sqlite3.connect(path)
+
+    def run():
+        pager = HistoryPager(conn)
+        pager.fetch_next_page()
+        return pager
+    return run
+
+
+@scenario("history.scroll_20_pages")
+def history_scroll(path):
+    conn = sqlite3.connect(path)
+
+    def run():
+        pager = HistoryPager(conn)
+        for _ in range(20):
+            pager.fetch_next_page()
+        return pager
+    return run
+
+
+def filter_scenario(name, history_filter):
+    """First filtered page, planning included, as the History tab reads it"""
+    @scenario(f"history.{name}")
+    def setup(path):
+        conn = sqlite3.connect(path)
+
+        def run():
+            pager = HistoryPager(conn)
+            pager.set_filter(history_filter)
+            pager.fetch_next_page()
+            return pager
+        return run
+    return setup
+
+
+# Margins of 150+ are rare enough to be read off their index, matches of
+# 10-12 hands common enough to walk the date order and check each row
+filter_scenario("filter_big_margin", HistoryFilter(min_margin=150))
+filter_scenario("filter_hand_count", HistoryFilter(min_hands=10, max_hands=12))
+filter_scenario("search_hands", HistoryFilter(text="Brian:12"))
+
+
+# --- end_match ---------------------------------------------------------------
+
+BENCH_HANDS = [(12, 0), (0, 22), (31, 0), (0, 9), (64, 0)]
+
+
+def remove_bench_ratings(conn, match_id):
+    """Take back the rating changes of a benchmark match saved after everything else"""
+    rows = conn.execute('SELECT player_id, before FROM rating_history WHERE match_id = ?', (match_id,)).fetchall()
+    conn.executemany('UPDATE player_ratings SET rating = ?, matches = matches - 1 WHERE player_id = ?',
+                     [(before, pid) for pid, before in rows])
+    conn.execute('DELETE FROM player_ratings WHERE matches <= 0')
+    conn.execute('DELETE FROM rating_history WHERE match_id = ?', (match_id,))
+
+
+def remove_bench_matches(conn, saved):
+    """Leave the cached database exactly as generated"""
+    with conn:
+        for match_id, game_scores in conn.execute('SELECT id, game_scores FROM matches WHERE match_date = ?',
+                                                  (db.to_epoch(BENCH_MATCH_DATE),)).fetchall():
+            remove_bench_ratings(conn, match_id)
+            players.remove_match(conn, match_id)
+            search.remove_match(conn, match_id, game_scores)
+        conn.execute('''
+            DELETE FROM hands WHERE match_id IN (SELECT id FROM matches WHERE match_date = ?)
+        ''', (db.to_epoch(BENCH_MATCH_DATE),))
+        removed = conn.execute('DELETE FROM matches WHERE match_date = ?',
+                               (db.to_epoch(BENCH_MATCH_DATE),)).rowcount
+        aggregates.save(conn, saved)
+        histograms.record_hands(conn, BENCH_HANDS * removed, sign=-1)
+
+
+@scenario("end_match.insert")
+def end_match_insert(path):
+    conn = db.connect(path)
+    saved = aggregates.load(conn)
+
+    def run():
+        db.insert_match(conn, 107, 31, "Zayaka", BENCH_MATCH_DATE, BENCH_HANDS)
+    return run, lambda: remove_bench_matches(conn, saved)
+
+
+@scenario("end_match.commit_each_100")
+def end_match_commit_each(path):
+    conn = db.connect(path)
+    conn.execute('PRAGMA synchronous = FULL')
+    saved = aggregates.load(conn)
+
+    def run():
+        for _ in range(100):
+            db.insert_match(conn, 107, 31, "Zayaka", BENCH_MATCH_DATE, BENCH_HANDS)
+    return run, lambda: remove_bench_matches(conn, saved)
+
+
+@scenario("end_match.group_commit_100")
+def end_match_group_commit(path):
+    conn = db.connect(path)
+    saved = aggregates.load(conn)
+    record = MatchRecord(107, 31, "Zayaka", BENCH_MATCH_DATE, BENCH_HANDS)
+    writer = WriteBehindQueue(path, WriteSettings(synchronous="FULL"))
+
+    def run():
+        futures = [writer.add_match(record) for _ in range(100)]
+        for future in futures:
+            future.result()
+
+    def teardown():
+        writer.close()
+        remove_bench_matches(conn, saved)
+    return run, teardown
+
+
+@scenario("end_match.journal_recover_500", max_matches=1000)
+def journal_recover(path):
+    scratch = tempfile.mkdtemp(prefix="ginrummy_bench_")
+    journal = MatchJournal(journal_path(os.path.join(scratch, "history.db")))
+    journal.recover()
+    match = Match(target_score=float("inf"))
+    for hand in range(500):
+        zayaka, brian = (hand % 9, 0) if hand % 2 else (0, hand % 7)
+        match.add_hand(zayaka, brian)
+        journal.record_hand(match, zayaka, brian)
+    journal.close()
+
+    def run():
+        MatchJournal(journal.path).recover()
+    return run, lambda: shutil.rmtree(scratch)
+
+
+# --- schema migration --------------------------------------------------------
+
+@scenario("migration.hands_backfill", schema="legacy")
+def migration(path):
+    scratch = tempfile.mkdtemp(prefix="ginrummy_bench_")
+    copy = os.path.join(scratch, "legacy.db")
+
+    def run():
+        # Timed together with the copy, which is small next to the migration
+        shutil.copyfile(path, copy)
+        db.connect(copy).close()
+    return run
+
+
+# --- Qt widgets ----------------------------------------------------------------
+
+@scenario("gui.startup_first_paint", needs_qt=True)
+def gui_startup(path):
+    app = qt_app()
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    def run():
+        window = GinRummyTracker(db_path=path)
+        window.show()
+        while window.startup.elapsed("first paint") is None:
+            app.processEvents()
+        window.close()
+    return run
+
+
+@scenario("gui.current_scores_append_500", needs_qt=True, max_matches=1000)
+def gui_current_scores(path):
+    qt_app()
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    window = GinRummyTracker(db_path=path)
+
+    def run():
+        window.reset_match()
+        # Out of reach, so all 500 hands stay in one match
+        window.log = MatchLog(target_score=float("inf"))
+        for hand in range(500):
+            zayaka, brian = (hand % 9, 0) if hand % 2 else (0, hand % 7)
+            window.log.add_hand(zayaka, brian)
+            window.append_current_score_row(zayaka, brian)
+    return run
+
+
+@scenario("gui.history_legacy_widget", schema="legacy", needs_qt=True, max_matches=100000)
+def gui_history_legacy(path):
+    qt_app()
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
+
+    conn = sqlite3.connect(path)
+    table = QTableWidget()
+    table.setColumnCount(6)
+
+    def run():
+        matches = conn.execute('SELECT * FROM matches ORDER BY match_date DESC').fetchall()
+        table.setRowCount(len(matches))
+        for row, match in enumerate(matches):
+            for col, value in enumerate(match):
+                table.setItem(row, col, QTableWidgetItem(str(value)))
+    return run
+
+
+@scenario("gui.history_model_first_screen", needs_qt=True)
+def gui_history_model(path):
+    qt_app()
+    from gin_rummy.qt.history_model import HistoryTableModel
+
+    model = HistoryTableModel(InlineDatabase(sqlite3.connect(path)))
+
+    def run():
+        model.refresh()
+        model.fetchMore()
+        # Roughly one screen of cells, as a view would request them
+        for row in range(min(40, model.rowCount())):
+            for col in range(model.columnCount()):
+                model.data(model.index(row, col))
+    return run
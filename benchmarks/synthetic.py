@@ -0,0 +1,142 @@
+"""
+Deterministic synthetic match history
+Builds realistic gin_rummy_history.db files of any size for benchmarking,
+either in the current schema or the original matches-only layout
+
+Usage: python -m benchmarks.synthetic PATH [--size 100k | --matches N]
+                                           [--schema current|legacy] [--seed S]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from gin_rummy import aggregates, db, histograms, players, ratings, search
+from gin_rummy.scores import format_game_scores
+
+START_DATE = datetime(2020, 1, 1, 19, 0, 0)
+BATCH_SIZE = 20000
+
+# Named history sizes used by the benchmark suite
+SIZES = {"1k": 1000, "100k": 100000, "1m": 1000000, "10m": 10000000}
+
+SCHEMAS = ("current", "legacy")
+
+# The original matches table, before hands and aggregates existed
+LEGACY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        zayaka_score INTEGER,
+        brian_score INTEGER,
+        winner TEXT,
+        match_date TEXT,
+        game_scores TEXT
+    )
+'''
+
+
+def parse_size(size):
+    """Turn '100k'/'1m' or a plain number into a match count"""
+    size = str(size).lower()
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def generate_hands(rng):
+    """Play one synthetic match to 100 points, one scorer per hand"""
+    zayaka_total = brian_total = 0
+    hands = []
+    while zayaka_total < 100 and brian_total < 100:
+        # Gin Rummy hands are mostly small deadwood differences with the odd big gin
+        points = int(rng.expovariate(1 / 14)) if rng.random() < 0.93 else rng.randint(25, 80)
+        if rng.random() < 0.5:
+            hands.append((points, 0))
+            zayaka_total += points
+        else:
+            hands.append((0, points))
+            brian_total += points
+    return zayaka_total, brian_total, hands
+
+
+def generate_matches(count, seed=0):
+    """Yield (zayaka_score, brian_score, winner, match_date, hands) tuples"""
+    rng = random.Random(seed)
+    played_at = START_DATE
+    for _ in range(count):
+        zayaka_total, brian_total, hands = generate_hands(rng)
+        winner = "Zayaka" if zayaka_total >= 100 else "Brian"
+        played_at += timedelta(minutes=rng.randint(20, 600))
+        yield zayaka_total, brian_total, winner, played_at.strftime("%Y-%m-%d %H:%M:%S"), hands
+
+
+def build_database(path, count, seed=0, batch_size=BATCH_SIZE, schema="current"):
+    """Create a fresh history database at path holding count synthetic matches
+
+    schema="legacy" writes only the original matches table with game_scores
+    text, exactly as files created before the hands table look on disk.
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema {schema!r}")
+    if os.path.exists(path):
+        os.remove(path)
+    legacy = schema == "legacy"
+    if legacy:
+        conn = sqlite3.connect(path)
+        conn.execute(LEGACY_SCHEMA)
+    else:
+        conn = db.connect(path)
+    match_batch = []
+    hand_batch = []
+    match_id = 0
+
+    def flush():
+        conn.executemany('''
+            INSERT INTO matches (id, zayaka_score, brian_score, winner, match_date, game_scores)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', match_batch)
+        if hand_batch:
+            conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', hand_batch)
+        match_batch.clear()
+        hand_batch.clear()
+
+    with conn:
+        for zayaka, brian, winner, match_date, hands in generate_matches(count, seed):
+            match_id += 1
+            if not legacy:
+                match_date = db.to_epoch(match_date)
+            match_batch.append((match_id, zayaka, brian, winner, match_date, format_game_scores(hands)))
+            if not legacy:
+                hand_batch.extend(db.hand_rows(match_id, hands))
+            if len(match_batch) >= batch_size:
+                flush()
+        flush()
+    if not legacy:
+        with conn:
+            aggregates.save(conn, aggregates.recompute(conn))
+            histograms.save(conn, histograms.recompute(conn))
+            players.rebuild_tables(conn)
+            ratings.replay(conn)
+            search.rebuild_index(conn)
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic GinRummy history database")
+    parser.add_argument("path", help="database file to create (overwritten)")
+    parser.add_argument("--size", default="100k", help="1k, 100k, 1m, 10m or a match count")
+    parser.add_argument("--matches", type=int, help="exact number of matches (overrides --size)")
+    parser.add_argument("--schema", choices=SCHEMAS, default="current", help="database layout")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    count = args.matches if args.matches is not None else parse_size(args.size)
+    start = time.perf_counter()
+    build_database(args.path, count, args.seed, schema=args.schema).close()
+    elapsed = time.perf_counter() - start
+    print(f"✓ Wrote {count} {args.schema} matches to {args.path} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
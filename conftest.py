@@ -0,0 +1,15 @@
+"""
+Shared helpers for the test scripts
+Imported by name (from conftest import ...) so each script still runs on
+its own with python test_*.py
+"""
+
+from gin_rummy import Match
+
+
+def random_match(rng):
+    """A finished Match of random hands, one player scoring 0-60 points in each"""
+    match = Match()
+    while not match.is_over:
+        match.add_hand(*rng.choice([(rng.randint(0, 60), 0), (0, rng.randint(0, 60))]))
+    return match
@@ -0,0 +1,15 @@
+"""
+GinRummy Score Tracker - headless core library
+Match rules, SQLite persistence and statistics with no Qt dependency;
+the desktop app in gin_rummy_tracker_pyqt5.py is a thin client of it
+"""
+
+from .match import TARGET_SCORE, Match, MatchRecord, parse_entry
+from .repository import MatchRepository
+from .service import StatisticsService
+from .stats import Statistics, format_statistics
+
+__all__ = [
+    "TARGET_SCORE", "Match", "MatchRecord", "parse_entry",
+    "MatchRepository", "StatisticsService", "Statistics", "format_statistics",
+]
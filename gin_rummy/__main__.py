@@ -0,0 +1,57 @@
+"""
+Command-line access to the core library, no Qt required
+
+Usage:
+    python -m gin_rummy stats [--db PATH] [--recompute]
+    python -m gin_rummy record Z,B [Z,B ...] [--db PATH] [--date "YYYY-MM-DD HH:MM:SS"]
+"""
+
+import argparse
+import sys
+
+from . import db
+from .match import Match
+from .repository import MatchRepository
+from .service import StatisticsService
+from .stats import format_statistics
+
+
+def parse_hand_arg(text):
+    zayaka, _, brian = text.partition(",")
+    return int(zayaka or 0), int(brian or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GinRummy score tracker without the GUI")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="print the statistics report")
+    stats_parser.add_argument("--recompute", action="store_true",
+                              help="recompute from the match tables instead of the aggregates")
+
+    record_parser = subparsers.add_parser("record", help="score a match hand by hand and save it")
+    record_parser.add_argument("hands", nargs="+", type=parse_hand_arg, help="ZAYAKA,BRIAN points per hand")
+    record_parser.add_argument("--date", help="match date (default: now)")
+    args = parser.parse_args()
+
+    with MatchRepository.open(args.db) as repository:
+        if args.command == "stats":
+            service = StatisticsService(repository.conn)
+            print(format_statistics(service.recompute() if args.recompute else service.current()))
+            return
+
+        match = Match()
+        for number, hand in enumerate(args.hands, start=1):
+            if match.add_hand(*hand) and number < len(args.hands):
+                sys.exit(f"The match was won after hand {number}; {len(args.hands) - number} hands left over")
+        if not match.is_over:
+            sys.exit(f"Nobody reached {match.target_score} points "
+                     f"(Zayaka {match.zayaka_total}, Brian {match.brian_total})")
+        match_id = repository.add(match.record(args.date))
+        print(f"✓ Saved match {match_id}: {match.winner} wins "
+              f"{match.zayaka_total}-{match.brian_total} in {len(match.hands)} hands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Running statistics aggregates
+Keeps sums, counts, min/max, streaks and games-per-match moments in a
+single persisted row that is updated in O(1) as each match is saved
+
+Usage: python -m gin_rummy.aggregates [--db PATH] [--verify-only]
+"""
+
+import argparse
+import math
+from dataclasses import dataclass, fields
+
+from .stats import Statistics
+
+# Bump when the accumulator fields change; stale rows are rebuilt on open
+AGGREGATES_VERSION = 1
+
+
+def streak_of(winner):
+    """The player a match extends the streak of; anything that isn't a Zayaka win counts as a Brian win"""
+    return "Zayaka" if winner == "Zayaka" else "Brian"
+
+
+@dataclass
+class StatsAccumulator:
+    """Running totals for every figure on the Statistics tab"""
+    matches: int = 0
+    zayaka_wins: int = 0
+    brian_wins: int = 0
+    zayaka_points: int = 0
+    brian_points: int = 0
+    hands: int = 0
+    zayaka_hand_sum: int = 0
+    zayaka_hand_min: int = None
+    zayaka_hand_max: int = None
+    zayaka_non_zero: int = 0
+    brian_hand_sum: int = 0
+    brian_hand_min: int = None
+    brian_hand_max: int = None
+    brian_non_zero: int = 0
+    games_matches: int = 0
+    games_sum: int = 0
+    games_sum_sq: int = 0
+    games_min: int = None
+    games_max: int = None
+    last_winner: str = None
+    current_streak: int = 0
+    zayaka_longest_streak: int = 0
+    brian_longest_streak: int = 0
+
+    def add_match(self, zayaka_score, brian_score, winner, hands):
+        """Fold one finished match (with its (zayaka, brian) hands) into the totals"""
+        self.add_result(zayaka_score, brian_score, winner, len(hands))
+        for zayaka, brian in hands:
+            self.add_hand(zayaka, brian)
+
+    def add_result(self, zayaka_score, brian_score, winner, games):
+        """Fold a match's result and hand count, leaving the hand totals to the caller"""
+        self.add_totals(zayaka_score, brian_score, winner, games)
+        self.extend_streak(streak_of(winner))
+
+    def add_totals(self, zayaka_score, brian_score, winner, games):
+        """Fold a match's result and hand count into everything but the streaks"""
+        self.matches += 1
+        self.zayaka_points += zayaka_score or 0
+        self.brian_points += brian_score or 0
+        if winner == "Zayaka":
+            self.zayaka_wins += 1
+        elif winner == "Brian":
+            self.brian_wins += 1
+        if games:
+            self.games_matches += 1
+            self.games_sum += games
+            self.games_sum_sq += games * games
+            self.games_min = games if self.games_min is None else min(self.games_min, games)
+            self.games_max = games if self.games_max is None else max(self.games_max, games)
+
+    def extend_streak(self, streak_winner):
+        """Continue or restart the current streak with a match that comes last in history"""
+        if streak_winner == self.last_winner:
+            self.current_streak += 1
+        else:
+            self.last_winner = streak_winner
+            self.current_streak = 1
+        if streak_winner == "Zayaka":
+            self.zayaka_longest_streak = max(self.zayaka_longest_streak, self.current_streak)
+        else:
+            self.brian_longest_streak = max(self.brian_longest_streak, self.current_streak)
+
+    def add_hand(self, zayaka, brian):
+        """Fold a single hand into the hand-level totals"""
+        self.hands += 1
+        self.zayaka_hand_sum += zayaka
+        self.brian_hand_sum += brian
+        self.zayaka_non_zero += zayaka > 0
+        self.brian_non_zero += brian > 0
+        self.zayaka_hand_min = zayaka if self.zayaka_hand_min is None else min(self.zayaka_hand_min, zayaka)
+        self.zayaka_hand_max = zayaka if self.zayaka_hand_max is None else max(self.zayaka_hand_max, zayaka)
+        self.brian_hand_min = brian if self.brian_hand_min is None else min(self.brian_hand_min, brian)
+        self.brian_hand_max = brian if self.brian_hand_max is None else max(self.brian_hand_max, brian)
+
+    def remove_hand(self, zayaka, brian):
+        """Take a hand back out of the sums and counts; min/max are left to the caller"""
+        self.hands -= 1
+        self.zayaka_hand_sum -= zayaka
+        self.brian_hand_sum -= brian
+        self.zayaka_non_zero -= zayaka > 0
+        self.brian_non_zero -= brian > 0
+
+    def statistics(self):
+        """Derive the displayed Statistics from the running totals"""
+        games_mean = self.games_sum / self.games_matches if self.games_matches else 0
+        games_var = (self.games_sum_sq / self.games_matches - games_mean ** 2) if self.games_matches else 0
+        return Statistics(
+            total_matches=self.matches,
+            zayaka_wins=self.zayaka_wins,
+            brian_wins=self.brian_wins,
+            avg_zayaka_match=self.zayaka_points / self.matches if self.matches else 0,
+            avg_brian_match=self.brian_points / self.matches if self.matches else 0,
+            total_hands=self.hands,
+            avg_zayaka_hand=self.zayaka_hand_sum / self.hands if self.hands else 0,
+            avg_brian_hand=self.brian_hand_sum / self.hands if self.hands else 0,
+            max_zayaka_hand=self.zayaka_hand_max or 0,
+            max_brian_hand=self.brian_hand_max or 0,
+            min_zayaka_hand=self.zayaka_hand_min or 0,
+            min_brian_hand=self.brian_hand_min or 0,
+            zayaka_non_zero=self.zayaka_non_zero,
+            brian_non_zero=self.brian_non_zero,
+            zayaka_streak=self.zayaka_longest_streak,
+            brian_streak=self.brian_longest_streak,
+            current_streak_winner=self.last_winner or "",
+            current_streak=self.current_streak,
+            avg_games_per_match=games_mean,
+            stddev_games_per_match=math.sqrt(max(games_var, 0)),
+            max_games_per_match=self.games_max or 0,
+            min_games_per_match=self.games_min or 0,
+        )
+
+
+FIELDS = [f.name for f in fields(StatsAccumulator)]
+
+
+def init_schema(conn):
+    """Create the aggregates table, rebuilding it if missing or out of date"""
+    columns = ",\n".join(f"    {name}" for name in FIELDS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS stats_aggregates (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+        {columns}
+        )
+    ''')
+    row = conn.execute('SELECT version FROM stats_aggregates WHERE id = 1').fetchone()
+    if row is None or row[0] != AGGREGATES_VERSION:
+        if row is not None:
+            conn.execute('DROP TABLE stats_aggregates')
+            return init_schema(conn)
+        save(conn, recompute(conn))
+
+
+def load(conn):
+    """Read the persisted running aggregates"""
+    row = conn.execute(f'SELECT {", ".join(FIELDS)} FROM stats_aggregates WHERE id = 1').fetchone()
+    if row is None:
+        return StatsAccumulator()
+    return StatsAccumulator(**dict(zip(FIELDS, row)))
+
+
+def save(conn, acc):
+    """Write the running aggregates row (caller controls the transaction)"""
+    placeholders = ", ".join("?" for _ in FIELDS)
+    conn.execute(f'''
+        INSERT OR REPLACE INTO stats_aggregates (id, version, {", ".join(FIELDS)})
+        VALUES (1, {AGGREGATES_VERSION}, {placeholders})
+    ''', [getattr(acc, name) for name in FIELDS])
+
+
+def record_match(conn, match_id, zayaka_score, brian_score, winner, hands):
+    """Apply one newly saved match to the persisted aggregates
+
+    O(1) when the match comes last in history order. One dated before an
+    already saved match (entered late, or restored from the journal)
+    lands in the middle of the streaks, which are re-read around it; an
+    undated one sorts first and falls back to a full recompute.
+    """
+    acc = load(conn)
+    match_date = conn.execute('SELECT match_date FROM matches WHERE id = ?', (match_id,)).fetchone()[0]
+    if match_date is None and acc.matches:
+        acc = recompute(conn)
+        save(conn, acc)
+        return acc
+
+    acc.add_totals(zayaka_score, brian_score, winner, len(hands))
+    for zayaka, brian in hands:
+        acc.add_hand(zayaka, brian)
+    later = match_date is not None and conn.execute('''
+        SELECT 1 FROM matches WHERE (match_date, id) > (?, ?) AND zayaka_score IS NOT NULL LIMIT 1
+    ''', (match_date, match_id)).fetchone()
+    if later:
+        insert_streak(conn, acc, match_id, match_date, streak_of(winner))
+    else:
+        acc.extend_streak(streak_of(winner))
+    save(conn, acc)
+    return acc
+
+
+def replace_match(conn, match_id, old, new):
+    """Swap an edited match's figures into the persisted aggregates
+
+    old and new carry zayaka_score, brian_score, winner and hands, and the
+    matches and hands tables must already hold the new values. Sums and
+    counts are adjusted in place. A removed value can only be re-read when
+    it was the current extreme: hand min/max through the (player, points)
+    index and games-per-match bounds through the hand_count index. A new
+    winner re-reads just the runs either side of the match.
+    """
+    acc = load(conn)
+    acc.zayaka_points += (new.zayaka_score or 0) - (old.zayaka_score or 0)
+    acc.brian_points += (new.brian_score or 0) - (old.brian_score or 0)
+    for record, sign in ((old, -1), (new, 1)):
+        if record.winner == "Zayaka":
+            acc.zayaka_wins += sign
+        elif record.winner == "Brian":
+            acc.brian_wins += sign
+
+    for zayaka, brian in old.hands:
+        acc.remove_hand(zayaka, brian)
+    for zayaka, brian in new.hands:
+        acc.add_hand(zayaka, brian)
+    for position, player in enumerate(("Zayaka", "Brian")):
+        prefix = player.lower()
+        extremes = {getattr(acc, f"{prefix}_hand_min"), getattr(acc, f"{prefix}_hand_max")}
+        if extremes & {hand[position] for hand in old.hands}:
+            # Separate subqueries, as SQLite only answers a lone MIN or MAX with one index seek
+            fewest, most = conn.execute('''
+                SELECT (SELECT MIN(points) FROM hands WHERE player = ?),
+                       (SELECT MAX(points) FROM hands WHERE player = ?)
+            ''', (player, player)).fetchone()
+            setattr(acc, f"{prefix}_hand_min", fewest)
+            setattr(acc, f"{prefix}_hand_max", most)
+
+    old_games, new_games = len(old.hands), len(new.hands)
+    if old_games != new_games:
+        replace_games(conn, acc, old_games, new_games)
+    if streak_of(old.winner) != streak_of(new.winner):
+        replace_streak(conn, acc, match_id, streak_of(old.winner), streak_of(new.winner))
+
+    save(conn, acc)
+    return acc
+
+
+def replace_games(conn, acc, old_games, new_games):
+    """Move one match's hand count from old_games to new_games"""
+    acc.games_matches += bool(new_games) - bool(old_games)
+    acc.games_sum += new_games - old_games
+    acc.games_sum_sq += new_games * new_games - old_games * old_games
+    if old_games and old_games in (acc.games_min, acc.games_max):
+        # One index seek per bound; matches without hands don't count
+        acc.games_min, acc.games_max = conn.execute('''
+            SELECT (SELECT MIN(hand_count) FROM matches WHERE hand_count > 0),
+                   (SELECT MAX(hand_count) FROM matches WHERE hand_count > 0)
+        ''').fetchone()
+    elif new_games:
+        acc.games_min = new_games if acc.games_min is None else min(acc.games_min, new_games)
+        acc.games_max = new_games if acc.games_max is None else max(acc.games_max, new_games)
+
+
+def run_beside(conn, match_id, match_date, before):
+    """(streak winner, length, reaches the end) of the run right before or after a match in history order
+
+    Reads one row past the run, through the date index.
+    """
+    op, order = ("<", "DESC") if before else (">", "")
+    cursor = conn.execute(f'''
+        SELECT winner FROM matches WHERE (match_date, id) {op} (?, ?) AND zayaka_score IS NOT NULL
+        ORDER BY match_date {order}, id {order}
+    ''', (match_date, match_id))
+    first, length = None, 0
+    for (winner,) in cursor:
+        if first is None:
+            first = streak_of(winner)
+        elif streak_of(winner) != first:
+            return first, length, False
+        length += 1
+    return first, length, True
+
+
+def longest_streak(conn, player):
+    """player's longest run of streak wins, from one pass over the results in history order"""
+    longest = run = 0
+    for (winner,) in conn.execute('''
+        SELECT winner FROM matches WHERE zayaka_score IS NOT NULL ORDER BY match_date, id
+    '''):
+        run = run + 1 if streak_of(winner) == player else 0
+        longest = max(longest, run)
+    return longest
+
+
+def replace_streak(conn, acc, match_id, old_winner, new_winner):
+    """Update the streaks after a match's streak winner changed from old_winner to new_winner
+
+    The run the match was in is split and the runs either side of it for
+    the new winner are joined through it; only the old winner's longest
+    streak can need a full pass, when the split run was that long.
+    """
+    match_date = conn.execute('SELECT match_date FROM matches WHERE id = ?', (match_id,)).fetchone()[0]
+    before_winner, before, _ = run_beside(conn, match_id, match_date, before=True)
+    after_winner, after, last_run = run_beside(conn, match_id, match_date, before=False)
+
+    def through(winner):
+        return 1 + (before if before_winner == winner else 0) + (after if after_winner == winner else 0)
+
+    joined = f"{new_winner.lower()}_longest_streak"
+    setattr(acc, joined, max(getattr(acc, joined), through(new_winner)))
+    split = f"{old_winner.lower()}_longest_streak"
+    if through(old_winner) == getattr(acc, split):
+        setattr(acc, split, longest_streak(conn, old_winner))
+
+    if last_run:
+        # The run reaching the end of the history now either goes through the match or starts after it
+        if after_winner == old_winner:
+            acc.last_winner, acc.current_streak = old_winner, after
+        else:
+            acc.last_winner, acc.current_streak = new_winner, through(new_winner)
+
+
+def insert_streak(conn, acc, match_id, match_date, winner):
+    """Update the streaks for a new match that falls before the end of history
+
+    The winner's runs either side of it are joined through it, and a run
+    of the other player it lands inside is split; only that player's
+    longest streak can need a full pass, when the split run was that long.
+    """
+    before_winner, before, _ = run_beside(conn, match_id, match_date, before=True)
+    after_winner, after, last_run = run_beside(conn, match_id, match_date, before=False)
+    through = 1 + (before if before_winner == winner else 0) + (after if after_winner == winner else 0)
+
+    joined = f"{winner.lower()}_longest_streak"
+    setattr(acc, joined, max(getattr(acc, joined), through))
+    if before_winner == after_winner != winner:
+        split = f"{after_winner.lower()}_longest_streak"
+        if before + after == getattr(acc, split):
+            setattr(acc, split, longest_streak(conn, after_winner))
+
+    if last_run:
+        # The run reaching the end of the history either now goes through the match or was cut short by it
+        acc.current_streak = through if after_winner == winner else after
+
+
+def reset(conn):
+    """Reset the aggregates after the history has been cleared"""
+    save(conn, StatsAccumulator())
+
+
+def recompute(conn):
+    """Rebuild the aggregates from scratch with the set-based statistics query"""
+    from .queries import query_aggregates
+
+    return query_aggregates(conn)
+
+
+def differences(stored, fresh):
+    """(field, stored, recomputed) for every field where two accumulators differ"""
+    return [(name, getattr(stored, name), getattr(fresh, name))
+            for name in FIELDS if getattr(stored, name) != getattr(fresh, name)]
+
+
+def verify(conn):
+    """Compare the stored aggregates with a full recompute
+
+    Returns a list of (field, stored, recomputed) tuples for every mismatch.
+    """
+    return differences(load(conn), recompute(conn))
+
+
+def rebuild(conn):
+    """Replace the stored aggregates with a full recompute (caller controls the transaction)
+
+    Returns the mismatches that were found before rebuilding. Run it in a
+    write transaction, so no match can be committed between the recompute
+    and the save.
+    """
+    stored, fresh = load(conn), recompute(conn)
+    save(conn, fresh)
+    return differences(stored, fresh)
+
+
+def main():
+    from . import db
+
+    parser = argparse.ArgumentParser(description="Rebuild the GinRummy statistics aggregates")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    parser.add_argument("--verify-only", action="store_true",
+                        help="only compare stored aggregates with a full recompute")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    if args.verify_only:
+        mismatches = verify(conn)
+    else:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            mismatches = rebuild(conn)
+    for name, stored, fresh in mismatches:
+        print(f"✗ {name}: stored={stored} recomputed={fresh}")
+    if not mismatches:
+        print("✓ Aggregates match a full recompute")
+    if not args.verify_only:
+        print("✓ Aggregates rebuilt")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Columnar statistics engine
+Loads match results and hand scores into NumPy arrays in one pass each and
+computes the Statistics tab figures plus score distributions vectorized
+
+Usage: python -m gin_rummy.columnar [--db PATH]
+"""
+
+import argparse
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the columnar engine needs it
+    np = None
+
+from . import db
+from .scores import PLAYERS
+from .stats import Statistics
+
+PERCENTILES = (50, 90, 99)
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("the columnar statistics engine needs NumPy (pip install numpy)")
+
+
+@dataclass
+class Distribution:
+    """Shape of one series of scores"""
+    count: int = 0
+    mean: float = 0
+    stddev: float = 0
+    percentiles: dict = None
+    # histogram[n] is how many values equalled n (every series is non-negative)
+    histogram: object = None
+
+    @classmethod
+    def of(cls, values):
+        if not len(values):
+            return cls(percentiles={p: 0 for p in PERCENTILES}, histogram=np.zeros(0, dtype=np.int64))
+        return cls(
+            count=len(values),
+            mean=float(values.mean()),
+            stddev=float(values.std()),
+            percentiles=dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist())),
+            histogram=np.bincount(values),
+        )
+
+    def mode(self):
+        return int(self.histogram.argmax()) if self.count else 0
+
+
+@dataclass
+class HandColumns:
+    """Match-ordered and hand-level arrays for the whole history"""
+    # One entry per match, in match_date order
+    zayaka_won: object
+    zayaka_scores: object
+    brian_scores: object
+    # One entry per hand, grouped by match
+    zayaka_hands: object
+    brian_hands: object
+    games_per_match: object
+    # Matches whose winner is neither player (never written by the tracker)
+    other_results: int = 0
+
+    @property
+    def matches(self):
+        return len(self.zayaka_won)
+
+    @property
+    def hands(self):
+        return len(self.zayaka_hands)
+
+    def streak_runs(self):
+        """Run-length encode the winners: (zayaka_won, length) per streak"""
+        won = self.zayaka_won
+        if not len(won):
+            return won, np.zeros(0, dtype=np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(won[1:] != won[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(won)))
+        return won[starts], lengths
+
+    def statistics(self):
+        """Compute every Statistics tab figure from the arrays"""
+        stats = Statistics(total_matches=self.matches, total_hands=self.hands)
+        if self.matches:
+            stats.zayaka_wins = int(self.zayaka_won.sum())
+            stats.brian_wins = self.matches - stats.zayaka_wins - self.other_results
+            stats.avg_zayaka_match = float(self.zayaka_scores.mean())
+            stats.avg_brian_match = float(self.brian_scores.mean())
+            winners, lengths = self.streak_runs()
+            stats.zayaka_streak = int(lengths[winners].max(initial=0))
+            stats.brian_streak = int(lengths[~winners].max(initial=0))
+            stats.current_streak_winner = PLAYERS[0] if winners[-1] else PLAYERS[1]
+            stats.current_streak = int(lengths[-1])
+        if self.hands:
+            zayaka, brian = self.zayaka_hands, self.brian_hands
+            stats.avg_zayaka_hand = float(zayaka.mean())
+            stats.avg_brian_hand = float(brian.mean())
+            stats.max_zayaka_hand, stats.min_zayaka_hand = int(zayaka.max()), int(zayaka.min())
+            stats.max_brian_hand, stats.min_brian_hand = int(brian.max()), int(brian.min())
+            stats.zayaka_non_zero = int(np.count_nonzero(zayaka))
+            stats.brian_non_zero = int(np.count_nonzero(brian))
+        if len(self.games_per_match):
+            games = self.games_per_match
+            stats.avg_games_per_match = float(games.mean())
+            stats.stddev_games_per_match = float(games.std())
+            stats.max_games_per_match, stats.min_games_per_match = int(games.max()), int(games.min())
+        return stats
+
+    def distributions(self):
+        """Per-series distributions that are too slow to build in pure Python"""
+        zayaka, brian = self.zayaka_hands, self.brian_hands
+        winners, lengths = self.streak_runs()
+        return {
+            "Zayaka hand": Distribution.of(zayaka),
+            "Brian hand": Distribution.of(brian),
+            "Zayaka scoring hand": Distribution.of(zayaka[zayaka > 0]),
+            "Brian scoring hand": Distribution.of(brian[brian > 0]),
+            "Games per match": Distribution.of(self.games_per_match),
+            "Winning margin": Distribution.of(np.abs(self.zayaka_scores - self.brian_scores)),
+            "Zayaka streak": Distribution.of(lengths[winners]),
+            "Brian streak": Distribution.of(lengths[~winners]),
+        }
+
+
+def read_columns(conn, sql):
+    """Run a query of group_concat() columns and parse each into an int64 array
+
+    SQLite joins the values in C, so Python never sees individual rows;
+    group_concat keeps the subquery's scan order in practice.
+    """
+    return [np.fromstring(text or "", dtype=np.int64, sep=",") for text in conn.execute(sql).fetchone()]
+
+
+def load_columns(conn):
+    """Read the history into HandColumns with one scan of each table"""
+    require_numpy()
+    zayaka_won, brian_won, zayaka_scores, brian_scores = read_columns(conn, '''
+        SELECT group_concat(winner = 'Zayaka'), group_concat(winner = 'Brian'),
+               group_concat(COALESCE(zayaka_score, 0)), group_concat(COALESCE(brian_score, 0))
+        FROM (SELECT * FROM matches WHERE zayaka_score IS NOT NULL ORDER BY match_date, id)
+    ''')
+    # Primary-key order yields each hand as a (Brian, Zayaka) pair of rows
+    hand_numbers, points = read_columns(conn, '''
+        SELECT group_concat(hand_no), group_concat(points)
+        FROM (SELECT hand_no, points FROM hands ORDER BY match_id, hand_no, player)
+    ''')
+    points = points.reshape(-1, 2)
+    # Every match's hands are numbered from 1, so each 1 starts a new match
+    starts = np.flatnonzero(hand_numbers[::2] == 1)
+    zayaka_won = zayaka_won.astype(bool)
+    return HandColumns(
+        zayaka_won=zayaka_won,
+        zayaka_scores=zayaka_scores,
+        brian_scores=brian_scores,
+        zayaka_hands=points[:, 1].copy(),
+        brian_hands=points[:, 0].copy(),
+        games_per_match=np.diff(np.append(starts, len(points))),
+        other_results=int(len(zayaka_won) - zayaka_won.sum() - brian_won.sum()),
+    )
+
+
+def columnar_statistics(conn):
+    """Compute the Statistics tab figures with the columnar engine"""
+    return load_columns(conn).statistics()
+
+
+def format_distributions(distributions):
+    """Render distributions as a fixed-width table"""
+    header = f"{'series':<22}{'count':>10}{'mean':>8}{'std':>8}{'mode':>6}" + "".join(
+        f"{'p' + str(p):>6}" for p in PERCENTILES)
+    lines = [header, "-" * len(header)]
+    for name, dist in distributions.items():
+        lines.append(f"{name:<22}{dist.count:>10}{dist.mean:>8.1f}{dist.stddev:>8.1f}{dist.mode():>6}" + "".join(
+            f"{dist.percentiles[p]:>6.0f}" for p in PERCENTILES))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print hand-level score distributions")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    columns = load_columns(conn)
+    conn.close()
+    print(format_distributions(columns.distributions()))
+
+
+if __name__ == "__main__":
+    main()
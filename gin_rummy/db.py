@@ -0,0 +1,324 @@
+"""
+SQLite storage for match history
+Opens tuned WAL-mode connections, creates the matches/hands schema and
+upgrades older files step by step to the current PRAGMA user_version
+"""
+
+import sqlite3
+from datetime import datetime
+
+from . import aggregates, histograms, players, ratings, search, stats_cache, win_probability
+from .match import DATE_FORMAT, MatchRecord
+from .scores import PLAYERS, format_game_scores, parse_game_scores
+
+DB_PATH = 'gin_rummy_history.db'
+
+# PRAGMA user_version after each upgrade step
+HANDS_SCHEMA_VERSION = 1
+EPOCH_DATES_VERSION = 2
+FILTER_COLUMNS_VERSION = 3
+SCHEMA_VERSION = FILTER_COLUMNS_VERSION
+
+MIGRATION_BATCH_SIZE = 5000
+
+# Applied to every connection. WAL lets readers run while a write commits,
+# and with WAL synchronous=NORMAL only risks the last commits on power loss
+PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -65536),  # KiB: 64 MiB of page cache
+    ("mmap_size", 268435456),  # read through a 256 MiB memory map
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),
+]
+
+# Computed columns the History filters search on, as (name, definition);
+# hand_count counts the "; "-separated hands in game_scores
+FILTER_COLUMNS = [
+    ("margin", "INTEGER GENERATED ALWAYS AS (abs(zayaka_score - brian_score)) VIRTUAL"),
+    ("hand_count", "INTEGER GENERATED ALWAYS AS (CASE WHEN game_scores IS NULL OR game_scores = '' THEN 0 "
+                   "ELSE length(game_scores) - length(replace(game_scores, ';', '')) + 1 END) VIRTUAL"),
+]
+
+# match_date holds local time as integer Unix epoch seconds
+MATCHES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        zayaka_score INTEGER,
+        brian_score INTEGER,
+        winner TEXT,
+        match_date INTEGER,
+        game_scores TEXT,
+        ''' + ",\n        ".join(f"{column} {definition}" for column, definition in FILTER_COLUMNS) + '''
+    )
+'''
+
+TABLES = MATCHES_TABLE.format(name="matches") + ''';
+    CREATE TABLE IF NOT EXISTS hands (
+        match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+        hand_no INTEGER NOT NULL,
+        player TEXT NOT NULL,
+        points INTEGER NOT NULL,
+        PRIMARY KEY (match_id, hand_no, player)
+    ) WITHOUT ROWID;
+'''
+
+# Created after any upgrade so a rebuilt table is only indexed once
+INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_hands_player_points ON hands (player, points);
+    -- History order, keyset paging and the streak window; id rides along as the rowid
+    CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (match_date);
+    -- Win counts and per-winner history
+    CREATE INDEX IF NOT EXISTS idx_matches_winner ON matches (winner, match_date);
+    -- History sorted by winner or either score, paged by keyset like the date order
+    CREATE INDEX IF NOT EXISTS idx_matches_winner_id ON matches (winner, id);
+    CREATE INDEX IF NOT EXISTS idx_matches_zayaka_score ON matches (zayaka_score);
+    CREATE INDEX IF NOT EXISTS idx_matches_brian_score ON matches (brian_score);
+    -- History filters on a range of margins or hand counts
+    CREATE INDEX IF NOT EXISTS idx_matches_margin ON matches (margin, match_date);
+    CREATE INDEX IF NOT EXISTS idx_matches_hand_count ON matches (hand_count, match_date);
+'''
+
+
+def to_epoch(match_date):
+    """Convert "YYYY-MM-DD HH:MM:SS" local time to stored epoch seconds"""
+    if match_date is None or isinstance(match_date, int):
+        return match_date
+    return int(datetime.strptime(match_date, DATE_FORMAT).timestamp())
+
+
+def format_date(epoch):
+    """Render stored epoch seconds as "YYYY-MM-DD HH:MM:SS" local time"""
+    return "" if epoch is None else datetime.fromtimestamp(epoch).strftime(DATE_FORMAT)
+
+
+def connect(path=DB_PATH):
+    """Open the history database, creating and upgrading the schema if needed"""
+    conn = sqlite3.connect(path)
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    init_schema(conn)
+    return conn
+
+
+def init_schema(conn):
+    """Create missing tables, run pending upgrades and create the indexes"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    fresh = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'matches'").fetchone()[0] == 0
+    conn.executescript(TABLES)
+    if fresh:
+        version = SCHEMA_VERSION
+    for target, upgrade in UPGRADES:
+        if version < target:
+            upgrade(conn)
+            version = target
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+    conn.execute(f'PRAGMA user_version = {version}')
+    conn.executescript(INDEXES)
+    aggregates.init_schema(conn)
+    histograms.init_schema(conn)
+    players.init_schema(conn)
+    ratings.init_schema(conn)
+    search.init_schema(conn)
+    stats_cache.init_schema(conn)
+    win_probability.init_schema(conn)
+    conn.commit()
+
+
+def hand_rows(match_id, hands):
+    """Expand (zayaka, brian) hands into rows for the hands table"""
+    for hand_no, scores in enumerate(hands, start=1):
+        for player, points in zip(PLAYERS, scores):
+            yield match_id, hand_no, player, points
+
+
+def migrate_hands(conn, batch_size=MIGRATION_BATCH_SIZE):
+    """Stream every match's game_scores into the hands table
+
+    Matches are read through a cursor and written in batches, so memory
+    use stays bounded no matter how large the history file is. Matches
+    that already have hand rows are skipped, making the migration safe
+    to re-run. Returns the number of matches migrated.
+    """
+    reader = conn.execute('''
+        SELECT id, game_scores FROM matches
+        WHERE id NOT IN (SELECT DISTINCT match_id FROM hands)
+        ORDER BY id
+    ''')
+    migrated = 0
+    batch = []
+    with conn:
+        for match_id, game_scores in reader:
+            batch.extend(hand_rows(match_id, parse_game_scores(game_scores)))
+            migrated += 1
+            if len(batch) >= batch_size:
+                conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', batch)
+                batch = []
+        if batch:
+            conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', batch)
+    return migrated
+
+
+def upgrade_epoch_dates(conn):
+    """Rebuild matches with match_date as integer epoch seconds
+
+    SQLite cannot change a column's type in place, so rows are copied into
+    a new table that then replaces the old one. Foreign keys are off for
+    the swap so dropping the old table does not cascade into hands.
+    """
+    conn.commit()
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        conn.execute('BEGIN')
+        conn.execute('DROP TABLE IF EXISTS matches_upgrade')
+        conn.execute(MATCHES_TABLE.format(name="matches_upgrade"))
+        conn.execute('''
+            INSERT INTO matches_upgrade (id, zayaka_score, brian_score, winner, match_date, game_scores)
+            SELECT id, zayaka_score, brian_score, winner,
+                   CASE WHEN typeof(match_date) = 'integer' THEN match_date
+                        ELSE CAST(strftime('%s', match_date, 'utc') AS INTEGER) END,
+                   game_scores
+            FROM matches
+        ''')
+        conn.execute('DROP TABLE matches')
+        conn.execute('ALTER TABLE matches_upgrade RENAME TO matches')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+
+
+def add_filter_columns(conn):
+    """Add the computed filter columns; they are virtual, so no row is rewritten
+
+    Files rebuilt by upgrade_epoch_dates already have them.
+    """
+    present = {row[1] for row in conn.execute('PRAGMA table_xinfo(matches)')}
+    for column, definition in FILTER_COLUMNS:
+        if column not in present:
+            conn.execute(f'ALTER TABLE matches ADD COLUMN {column} {definition}')
+
+
+# (user_version reached, upgrade step) applied in order to older files
+UPGRADES = [
+    (HANDS_SCHEMA_VERSION, migrate_hands),
+    (EPOCH_DATES_VERSION, upgrade_epoch_dates),
+    (FILTER_COLUMNS_VERSION, add_filter_columns),
+]
+
+
+def write_match(conn, zayaka_score, brian_score, winner, match_date, hands):
+    """Insert a match, its hands and the updated aggregates, histograms,
+    player totals, ratings and search index (caller controls the transaction)"""
+    game_scores = format_game_scores(hands)
+    cursor = conn.execute('''
+        INSERT INTO matches (zayaka_score, brian_score, winner, match_date, game_scores)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (zayaka_score, brian_score, winner, to_epoch(match_date), game_scores))
+    match_id = cursor.lastrowid
+    search.record_match(conn, match_id, game_scores)
+    conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', hand_rows(match_id, hands))
+    aggregates.record_match(conn, match_id, zayaka_score, brian_score, winner, hands)
+    histograms.record_hands(conn, hands)
+    record_results(conn, match_id, players.participants(zayaka_score, brian_score, winner, hands))
+    return match_id
+
+
+def write_players_match(conn, match_date, participants):
+    """Insert a match between any players from their Participants, updating the
+    player totals and ratings (caller controls the transaction)
+
+    The matches row keeps only the date and the winner, if there is just
+    one; the tracker's scores, hands and statistics are for its own two
+    players and are left alone.
+    """
+    if len({p.name for p in participants}) != len(participants) or len(participants) < 2:
+        raise ValueError("a match needs two or more different players")
+    winners = [p.name for p in participants if p.won]
+    match_id = conn.execute('INSERT INTO matches (winner, match_date) VALUES (?, ?)',
+                            (winners[0] if len(winners) == 1 else None, to_epoch(match_date))).lastrowid
+    # The search index has a row for every match, even one with no hands to find
+    search.record_match(conn, match_id, None)
+    record_results(conn, match_id, participants)
+    return match_id
+
+
+def record_results(conn, match_id, participants):
+    """Store a saved match's Participants and rate them (caller controls the transaction)"""
+    rows = players.record_match(conn, match_id, participants)
+    ratings.record_match(conn, match_id, rows)
+
+
+def find_match(conn, zayaka_score, brian_score, winner, match_date):
+    """Return the id of an already saved match with exactly these results, or None"""
+    row = conn.execute('''
+        SELECT id FROM matches
+        WHERE match_date = ? AND zayaka_score = ? AND brian_score = ? AND winner = ?
+    ''', (to_epoch(match_date), zayaka_score, brian_score, winner)).fetchone()
+    return row[0] if row else None
+
+
+def insert_match(conn, zayaka_score, brian_score, winner, match_date, hands):
+    """Insert a finished match, its hands and the updated aggregates in one transaction"""
+    with conn:
+        return write_match(conn, zayaka_score, brian_score, winner, match_date, hands)
+
+
+def read_hands(conn, match_id):
+    """Return a saved match's hands as (zayaka, brian) tuples in order"""
+    return [tuple(hand) for hand in conn.execute('''
+        SELECT SUM(points) FILTER (WHERE player = 'Zayaka'),
+               SUM(points) FILTER (WHERE player = 'Brian')
+        FROM hands WHERE match_id = ? GROUP BY hand_no ORDER BY hand_no
+    ''', (match_id,))]
+
+
+def rewrite_match(conn, match_id, zayaka_score, brian_score, winner, hands):
+    """Replace a saved match's result and hands, updating the aggregates
+    incrementally (caller controls the transaction)
+
+    Returns False when there is no match with that id.
+    """
+    row = conn.execute('SELECT zayaka_score, brian_score, winner, game_scores FROM matches WHERE id = ?',
+                       (match_id,)).fetchone()
+    if row is None:
+        return False
+    old = MatchRecord(*row[:3], None, read_hands(conn, match_id))
+    game_scores = format_game_scores(hands)
+    search.remove_match(conn, match_id, row[3])
+    conn.execute('''
+        UPDATE matches SET zayaka_score = ?, brian_score = ?, winner = ?, game_scores = ? WHERE id = ?
+    ''', (zayaka_score, brian_score, winner, game_scores, match_id))
+    search.record_match(conn, match_id, game_scores)
+    conn.execute('DELETE FROM hands WHERE match_id = ?', (match_id,))
+    conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', hand_rows(match_id, hands))
+    aggregates.replace_match(conn, match_id, old, MatchRecord(zayaka_score, brian_score, winner, None, hands))
+    histograms.record_hands(conn, old.hands, sign=-1)
+    histograms.record_hands(conn, hands)
+    players.remove_match(conn, match_id)
+    players.record_match(conn, match_id, players.participants(zayaka_score, brian_score, winner, hands))
+    if winner != old.winner:
+        ratings.rerate_from(conn, match_id)
+    stats_cache.invalidate(conn)
+    return True
+
+
+def delete_all_matches(conn):
+    """Delete every match, hand and aggregate (caller controls the transaction)"""
+    ratings.reset(conn)
+    players.reset(conn)
+    search.reset(conn)
+    conn.execute('DELETE FROM hands')
+    conn.execute('DELETE FROM matches')
+    aggregates.reset(conn)
+    histograms.reset(conn)
+    stats_cache.invalidate(conn)
+
+
+def clear_matches(conn):
+    """Delete every match together with its hands and aggregates"""
+    with conn:
+        delete_all_matches(conn)
@@ -0,0 +1,142 @@
+"""
+Match event log
+Hand entries and corrections are kept as events; undo and redo move a
+cursor through them and snapshots keep rebuilding any point cheap
+"""
+
+from dataclasses import dataclass
+
+from .match import TARGET_SCORE, Match
+
+# A snapshot of the match is kept every this many events, so rebuilding
+# the state at any position replays fewer events than this
+SNAPSHOT_INTERVAL = 8
+
+
+@dataclass(frozen=True)
+class HandAdded:
+    zayaka_score: int
+    brian_score: int
+
+    def apply(self, match):
+        return match.add_hand(self.zayaka_score, self.brian_score)
+
+    def describe(self):
+        return f"hand Zayaka={self.zayaka_score}, Brian={self.brian_score}"
+
+
+@dataclass(frozen=True)
+class HandCorrected:
+    index: int
+    zayaka_score: int
+    brian_score: int
+
+    def apply(self, match):
+        return match.correct_hand(self.index, self.zayaka_score, self.brian_score)
+
+    def describe(self):
+        return f"game {self.index + 1} correction to Zayaka={self.zayaka_score}, Brian={self.brian_score}"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The match as it stood after the first `position` events"""
+    position: int
+    hands: tuple
+    zayaka_total: int
+    brian_total: int
+
+    def restore(self, target_score):
+        return Match(target_score, list(self.hands), self.zayaka_total, self.brian_total)
+
+
+class MatchLog:
+    """Event-sourced history of one match with undo and redo
+
+    Changes only ever go through events: add_hand and correct_hand append
+    one (dropping anything that had been undone) and undo/redo move the
+    current position. state_at() rebuilds any position from the nearest
+    snapshot at or before it. A log opened over a saved match starts from
+    its hands, which cannot be undone.
+    """
+
+    def __init__(self, target_score=TARGET_SCORE, hands=()):
+        self.target_score = target_score
+        self.events = []
+        self.position = 0
+        hands = tuple(hands)
+        start = Snapshot(0, hands, sum(hand[0] for hand in hands), sum(hand[1] for hand in hands))
+        self._snapshots = [start]
+        self._match = start.restore(target_score)
+
+    @property
+    def match(self):
+        """The match at the current position (treat as read-only)"""
+        return self._match
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return self.position < len(self.events)
+
+    def add_hand(self, zayaka_score, brian_score):
+        """Record a new hand; returns True if it ended the match"""
+        return self._record(HandAdded(zayaka_score, brian_score))
+
+    def correct_hand(self, index, zayaka_score, brian_score):
+        """Record a correction to an earlier hand; returns True if the match is now over"""
+        return self._record(HandCorrected(index, zayaka_score, brian_score))
+
+    def undo(self):
+        """Step back one event; returns the event undone, or None"""
+        if not self.can_undo:
+            return None
+        self.position -= 1
+        self._match = self.state_at(self.position)
+        return self.events[self.position]
+
+    def redo(self):
+        """Re-apply the next undone event; returns it, or None"""
+        if not self.can_redo:
+            return None
+        event = self.events[self.position]
+        self._advance(event)
+        return event
+
+    def state_at(self, position):
+        """Rebuild the match as it stood after the first `position` events"""
+        if not 0 <= position <= len(self.events):
+            raise ValueError(f"no position {position} in a log of {len(self.events)} events")
+        # Snapshots sit at every multiple of the interval reached so far
+        snapshot = self._snapshots[min(position // SNAPSHOT_INTERVAL, len(self._snapshots) - 1)]
+        match = snapshot.restore(self.target_score)
+        for event in self.events[snapshot.position:position]:
+            event.apply(match)
+        return match
+
+    def _record(self, event):
+        # Validated against a copy so a rejected event leaves the log untouched
+        trial = Match(self.target_score, list(self._match.hands),
+                      self._match.zayaka_total, self._match.brian_total)
+        event.apply(trial)
+        del self.events[self.position:]
+        del self._snapshots[self.position // SNAPSHOT_INTERVAL + 1:]
+        self.events.append(event)
+        self.position += 1
+        self._match = trial
+        self._snapshot()
+        return trial.is_over
+
+    def _advance(self, event):
+        event.apply(self._match)
+        self.position += 1
+        self._snapshot()
+
+    def _snapshot(self):
+        if self.position % SNAPSHOT_INTERVAL == 0 and self._snapshots[-1].position < self.position:
+            match = self._match
+            self._snapshots.append(Snapshot(self.position, tuple(match.hands),
+                                            match.zayaka_total, match.brian_total))
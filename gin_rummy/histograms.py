@@ -0,0 +1,192 @@
+"""
+Per-player hand score histograms
+Counts how many hands each player scored each number of points, in a
+table kept up to date as matches are saved; percentiles and bucketed
+histograms are read from it without touching the hands table
+
+Hand scores are small non-negative integers, so an exact count per score
+is as compact as a quantile sketch, has no error and merges by addition.
+
+Usage: python -m gin_rummy.histograms [--db PATH ...] [--bucket-width N]
+"""
+
+import argparse
+from collections import Counter
+
+from .scores import PLAYERS
+
+PERCENTILES = (50, 90, 99)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS hand_histogram (
+        player TEXT NOT NULL,
+        points INTEGER NOT NULL,
+        hands INTEGER NOT NULL,
+        PRIMARY KEY (player, points)
+    ) WITHOUT ROWID
+'''
+
+
+class ScoreHistogram:
+    """Exact count of hands per score for one player"""
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    def __eq__(self, other):
+        return isinstance(other, ScoreHistogram) and +self.counts == +other.counts
+
+    def __repr__(self):
+        return f"ScoreHistogram({dict(sorted((+self.counts).items()))})"
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def add(self, points, hands=1):
+        self.counts[points] += hands
+
+    def merge(self, other):
+        """A histogram of both sets of hands, e.g. from two shards or databases"""
+        return ScoreHistogram(self.counts + other.counts)
+
+    def scoring(self):
+        """The histogram without the zero-point hands"""
+        return ScoreHistogram({points: hands for points, hands in self.counts.items() if points})
+
+    def quantile(self, percentile):
+        """The nearest-rank percentile: the smallest score at least that share of hands reach"""
+        total = self.count
+        if not total:
+            return 0
+        # Ceiling of percentile% of total, kept in integers
+        rank = max(1, -(-percentile * total // 100))
+        seen = 0
+        for points in sorted(self.counts):
+            seen += self.counts[points]
+            if seen >= rank:
+                return points
+        return points
+
+    def percentiles(self, percentiles=PERCENTILES):
+        return tuple(self.quantile(p) for p in percentiles)
+
+    def buckets(self, width=10):
+        """Fixed-width buckets as (low, high, hands), empty buckets included"""
+        if not +self.counts:
+            return []
+        top = max(points for points, hands in self.counts.items() if hands)
+        totals = Counter()
+        for points, hands in self.counts.items():
+            totals[points // width] += hands
+        return [(n * width, n * width + width - 1, totals[n]) for n in range(top // width + 1)]
+
+
+def init_schema(conn):
+    """Create the histogram table, filling it from the hands table when it is new"""
+    exists = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'hand_histogram'").fetchone()[0]
+    conn.execute(SCHEMA)
+    if not exists:
+        save(conn, recompute(conn))
+
+
+def record_hands(conn, hands, sign=1):
+    """Count (sign=1) or uncount (sign=-1) a match's hands (caller controls the transaction)"""
+    changes = Counter()
+    for hand in hands:
+        for player, points in zip(PLAYERS, hand):
+            changes[player, points] += sign
+    conn.executemany('''
+        INSERT INTO hand_histogram VALUES (?, ?, ?)
+        ON CONFLICT (player, points) DO UPDATE SET hands = hands + excluded.hands
+    ''', [(player, points, hands) for (player, points), hands in changes.items() if hands])
+    if sign < 0:
+        conn.execute('DELETE FROM hand_histogram WHERE hands <= 0')
+
+
+def reset(conn):
+    conn.execute('DELETE FROM hand_histogram')
+
+
+def load(conn):
+    """{player: ScoreHistogram} from the stored counts"""
+    histograms = {player: ScoreHistogram() for player in PLAYERS}
+    for player, points, hands in conn.execute('SELECT player, points, hands FROM hand_histogram'):
+        histograms.setdefault(player, ScoreHistogram()).add(points, hands)
+    return histograms
+
+
+def recompute(conn):
+    """{player: ScoreHistogram} counted from the hands table"""
+    histograms = {player: ScoreHistogram() for player in PLAYERS}
+    # Groups straight off the covering (player, points) index
+    for player, points, hands in conn.execute('''
+        SELECT player, points, COUNT(*) FROM hands GROUP BY player, points
+    '''):
+        histograms.setdefault(player, ScoreHistogram()).add(points, hands)
+    return histograms
+
+
+def save(conn, histograms):
+    """Replace the stored counts (caller controls the transaction)"""
+    reset(conn)
+    conn.executemany('INSERT INTO hand_histogram VALUES (?, ?, ?)', [
+        (player, points, hands)
+        for player, histogram in histograms.items()
+        for points, hands in histogram.counts.items() if hands])
+
+
+def differences(stored, fresh):
+    """(name, stored hands, recomputed hands) for each player whose stored histogram drifted"""
+    return [(f"{player.lower()}_hand_histogram", stored[player].count, fresh[player].count)
+            for player in fresh if stored.get(player) != fresh[player]]
+
+
+def verify(conn):
+    """Compare the stored histograms with a recount"""
+    return differences(load(conn), recompute(conn))
+
+
+def rebuild(conn):
+    """Replace the stored histograms with a recount (caller controls the transaction)
+
+    Returns the mismatches that were found before rebuilding.
+    """
+    stored, fresh = load(conn), recompute(conn)
+    save(conn, fresh)
+    return differences(stored, fresh)
+
+
+def format_histogram(histogram, width=10, bar_width=40):
+    """Render a histogram's buckets as text bars"""
+    buckets = histogram.buckets(width)
+    most = max((hands for _, _, hands in buckets), default=0)
+    return "\n".join(f"{low:>4}-{high:<4}{hands:>10}  {'#' * round(hands / most * bar_width) if most else ''}"
+                     for low, high, hands in buckets)
+
+
+def main():
+    from . import db
+
+    parser = argparse.ArgumentParser(description="Print hand score percentiles and histograms")
+    parser.add_argument("--db", action="append", help="history database path (repeat to merge several)")
+    parser.add_argument("--bucket-width", type=int, default=10, help="points per histogram bucket")
+    args = parser.parse_args()
+
+    merged = {player: ScoreHistogram() for player in PLAYERS}
+    for path in args.db or [db.DB_PATH]:
+        conn = db.connect(path)
+        for player, histogram in load(conn).items():
+            merged[player] = merged.get(player, ScoreHistogram()).merge(histogram)
+        conn.close()
+    for player, histogram in merged.items():
+        labels = " / ".join(f"p{p}" for p in PERCENTILES)
+        values = " / ".join(str(v) for v in histogram.percentiles())
+        scoring = " / ".join(str(v) for v in histogram.scoring().percentiles())
+        print(f"{player}: {histogram.count} hands, {labels} = {values} (scoring hands: {scoring})")
+        print(format_histogram(histogram, args.bucket_width))
+        print()
+
+
+if __name__ == "__main__":
+    main()
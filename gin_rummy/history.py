@@ -0,0 +1,326 @@
+"""
+Paged access to match history
+Reads matches a page at a time with keyset pagination, sorted and filtered
+inside SQLite, keeping only a bounded LRU of pages in memory
+"""
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .db import format_date
+from .search import FTS_TABLE, match_expression
+
+# (column, header) for every History tab column; game_scores is loaded on demand
+COLUMNS = [
+    ("match_date", "Date"),
+    ("zayaka_score", "Zayaka Score"),
+    ("brian_score", "Brian Score"),
+    ("winner", "Winner"),
+    ("game_scores", "Game Scores"),
+    ("id", "ID"),
+]
+
+SORTABLE = {"match_date", "zayaka_score", "brian_score", "winner", "id"}
+
+# Position of each column inside a pager row
+ROW_INDEX = {"id": 0, "match_date": 1, "zayaka_score": 2, "brian_score": 3, "winner": 4}
+
+PAGE_SIZE = 200
+MAX_CACHED_PAGES = 8
+
+# Newest matches sampled to tell a search hitting most of the history
+# (checked row by row) from one hitting a minority (read as a list of hits)
+SEARCH_SAMPLE = 1000
+
+
+@dataclass(frozen=True)
+class HistoryFilter:
+    """The History tab's filter bar; fields left as None (or "") match everything"""
+    # Epoch seconds; date_from is inclusive and date_to exclusive
+    date_from: int = None
+    date_to: int = None
+    winner: str = None
+    min_margin: int = None
+    max_margin: int = None
+    min_hands: int = None
+    max_hands: int = None
+    # Free text searched in game_scores, see search.match_expression
+    text: str = ""
+
+    def indexed_conditions(self):
+        """(index, SQL, params) for each condition an index can answer on its own"""
+        conditions = []
+        if self.winner is not None:
+            conditions.append(("idx_matches_winner", "winner = ?", [self.winner]))
+        for index, column, low, high in (("idx_matches_margin", "margin", self.min_margin, self.max_margin),
+                                         ("idx_matches_hand_count", "hand_count", self.min_hands, self.max_hands)):
+            if low is not None or high is not None:
+                conditions.append((index, *between(column, low, high)))
+        return conditions
+
+
+def between(column, low, high):
+    """SQL and params for low <= column <= high with either end left open"""
+    if low is not None and high is not None:
+        return f"{column} BETWEEN ? AND ?", [low, high]
+    if low is not None:
+        return f"{column} >= ?", [low]
+    return f"{column} <= ?", [high]
+
+
+@dataclass(frozen=True)
+class FilterPlan:
+    """A filter turned into SQL, with the access path chosen for it
+
+    driver is the index (or the search table) the query starts from, or None
+    to leave SQLite walking the sort order.
+    """
+    source: str = "matches"
+    conditions: tuple = ()
+    params: tuple = ()
+    driver: str = None
+
+
+NO_FILTER = FilterPlan()
+
+
+def bounded_count(conn, sql, params, limit):
+    """Count rows up to limit; index-only, so a wide filter costs no more than a narrow one"""
+    return conn.execute(f'SELECT COUNT(*) FROM ({sql} LIMIT ?)', [*params, limit]).fetchone()[0]
+
+
+def selective_rows(total, page_size=PAGE_SIZE):
+    """Hits below which a filter should drive the query from its own index
+
+    Reading and sorting h hits costs about as much per hit as walking the
+    sort order costs per row, and the walk needs page_size * total / h rows
+    to fill a page, so the two break even at h = sqrt(page_size * total).
+    """
+    return max(page_size, math.isqrt(page_size * total))
+
+
+def plan_filter(conn, history_filter, selective=None, page_size=PAGE_SIZE):
+    """Turn a HistoryFilter into a FilterPlan
+
+    Without statistics SQLite cannot tell a margin range matching fifty
+    rows from one matching half the table, and picks the same plan for
+    both. So each indexed condition (and the text search) is counted off
+    its own index, stopping at `selective` rows (by default from
+    selective_rows), and the narrowest one below that drives the query;
+    the rest are checked on the rows it finds.
+    """
+    if history_filter is None:
+        return NO_FILTER
+    # Ids are only ever appended, so the last one is the size of the history near enough
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM matches').fetchone()[0]
+    if selective is None:
+        selective = selective_rows(last_id, page_size)
+    conditions, params = [], []
+    if history_filter.date_from is not None:
+        conditions.append("match_date >= ?")
+        params.append(history_filter.date_from)
+    if history_filter.date_to is not None:
+        conditions.append("match_date < ?")
+        params.append(history_filter.date_to)
+
+    indexed = history_filter.indexed_conditions()
+    counts = [(bounded_count(conn, f'SELECT 1 FROM matches INDEXED BY {index} WHERE {sql}', values, selective),
+               index) for index, sql, values in indexed]
+    expression = match_expression(history_filter.text or "")
+    hits = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?'
+    if expression:
+        counts.append((bounded_count(conn, hits, [expression], selective), FTS_TABLE))
+    if not conditions and not counts:
+        return NO_FILTER
+
+    count, driver = min(counts, default=(selective, None))
+    if count >= selective:
+        driver = None
+    if driver is None:
+        source = "matches"
+    elif driver == FTS_TABLE:
+        # Rowid lookups for each hit are still allowed without an index
+        source = "matches NOT INDEXED"
+    else:
+        source = f"matches INDEXED BY {driver}"
+    # Unary + keeps SQLite off the index of every condition not driving the
+    # query, which it would otherwise pick even when that means fetching
+    # and sorting most of the table
+    for index, sql, values in indexed:
+        conditions.append(sql if index == driver else "+" + sql)
+        params.extend(values)
+    if expression:
+        if driver == FTS_TABLE:
+            conditions.append(f"id IN ({hits})")
+        elif search_share(conn, expression, last_id) >= 0.5:
+            # Building the list of hits costs more than checking the rows walked
+            conditions.append(f"EXISTS ({hits} AND rowid = matches.id)")
+        else:
+            conditions.append(f"+id IN ({hits})")
+        params.append(expression)
+    return FilterPlan(source, tuple(conditions), tuple(params), driver)
+
+
+def search_share(conn, expression, last_id, sample=SEARCH_SAMPLE):
+    """Share of the newest `sample` matches (up to last_id) a search expression finds"""
+    found = conn.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? AND rowid > ?',
+                         (expression, last_id - sample)).fetchone()[0]
+    return found / min(sample, last_id) if last_id else 0.0
+
+
+class HistoryPager:
+    """Pages through the matches table in a server-side sort order
+
+    Rows are (id, match_date, zayaka_score, brian_score, winner). Only the
+    sort key of each page boundary is kept for every page seen so far, so a
+    page evicted from the LRU can be re-read with one indexed keyset query.
+    Without a connection the pager only tracks state and the caller reads
+    pages itself with read_page (e.g. on a worker thread).
+    """
+
+    def __init__(self, conn=None, page_size=PAGE_SIZE, max_pages=MAX_CACHED_PAGES):
+        self.conn = conn
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.filter = None
+        self.set_sort("match_date", descending=True)
+
+    def set_sort(self, column, descending=True):
+        """Change the sort order and forget everything loaded so far"""
+        if column not in SORTABLE:
+            raise ValueError(f"Cannot sort history by {column!r}")
+        self.sort_column = column
+        self.descending = descending
+        self.reset()
+
+    def set_filter(self, history_filter):
+        """Show only matches passing a HistoryFilter (None shows them all)"""
+        self.filter = history_filter
+        self.reset()
+
+    def reset(self):
+        """Drop cached pages so the next fetch re-reads from the start"""
+        # Planned again on the next read, as the counts behind it may have moved
+        self.plan = None
+        self._pages = OrderedDict()
+        # _boundaries[k] is the sort key of the last row before page k
+        self._boundaries = [None]
+        self.loaded_rows = 0
+        self.exhausted = False
+
+    def _query(self, after):
+        if self.plan is None:
+            self.plan = plan_filter(self.conn, self.filter, page_size=self.page_size)
+        return read_page(self.conn, self.sort_column, self.descending, after, self.page_size, self.plan)
+
+    def _sort_key(self, row):
+        return row[ROW_INDEX[self.sort_column]], row[0]
+
+    def _remember(self, page_no, rows):
+        self._pages[page_no] = rows
+        self._pages.move_to_end(page_no)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def next_page(self):
+        """Read the page after the last one loaded without adding it yet"""
+        if self.exhausted:
+            return []
+        return self._query(self.next_boundary)
+
+    @property
+    def next_boundary(self):
+        """Keyset position the next unread page starts after"""
+        return self._boundaries[-1]
+
+    def boundary(self, page_no):
+        """Keyset position a loaded page starts after"""
+        return self._boundaries[page_no]
+
+    def append_page(self, rows):
+        """Add a page returned by next_page to the loaded rows"""
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self._remember(len(self._boundaries) - 1, rows)
+            self._boundaries.append(self._sort_key(rows[-1]))
+        self.loaded_rows += len(rows)
+        return len(rows)
+
+    def fetch_next_page(self):
+        """Load the next page; returns the number of new rows"""
+        return self.append_page(self.next_page())
+
+    def cached_row(self, index):
+        """Return the row at a loaded position, or None if its page was evicted"""
+        page_no, offset = divmod(index, self.page_size)
+        rows = self._pages.get(page_no)
+        if rows is None:
+            return None
+        self._pages.move_to_end(page_no)
+        return rows[offset]
+
+    def restore_page(self, page_no, rows):
+        """Put a re-read page back into the LRU"""
+        self._remember(page_no, rows)
+
+    def row(self, index):
+        """Return the row at a loaded position, re-reading its page if evicted"""
+        row = self.cached_row(index)
+        if row is None:
+            page_no, offset = divmod(index, self.page_size)
+            rows = self._query(self._boundaries[page_no])
+            self._remember(page_no, rows)
+            row = rows[offset]
+        return row
+
+    @property
+    def cached_pages(self):
+        return len(self._pages)
+
+    def game_scores(self, match_id):
+        """Load the game_scores text for one match"""
+        return read_game_scores(self.conn, match_id)
+
+
+def page_query(sort_column, descending, after, page_size=PAGE_SIZE, plan=NO_FILTER):
+    """(SQL, params) reading one page of rows that sort after the given (key, id) position"""
+    order = "DESC" if descending else "ASC"
+    compare = "<" if descending else ">"
+    conditions, params = list(plan.conditions), list(plan.params)
+    if sort_column == "id":
+        if after is not None:
+            conditions.append(f"id {compare} ?")
+            params.append(after[1])
+        order_by = f"id {order}"
+    else:
+        if after is not None:
+            conditions.append(f"({sort_column}, id) {compare} (?, ?)")
+            params.extend(after)
+        order_by = f"{sort_column} {order}, id {order}"
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return f'''
+        SELECT id, match_date, zayaka_score, brian_score, winner FROM {plan.source}
+        {where} ORDER BY {order_by} LIMIT ?
+    ''', params + [page_size]
+
+
+def read_page(conn, sort_column, descending, after, page_size=PAGE_SIZE, plan=NO_FILTER):
+    """Read one page of rows that sort after the given (key, id) position"""
+    return conn.execute(*page_query(sort_column, descending, after, page_size, plan)).fetchall()
+
+
+def format_cell(column, row):
+    """Display text for one column of a pager row"""
+    value = row[ROW_INDEX[column]]
+    if column == "match_date":
+        return format_date(value)
+    # A match between other players has no tracker scores
+    return "" if value is None else str(value)
+
+
+def read_game_scores(conn, match_id):
+    """Load the game_scores text for one match"""
+    row = conn.execute('SELECT game_scores FROM matches WHERE id = ?', (match_id,)).fetchone()
+    return row[0] if row else ""
@@ -0,0 +1,229 @@
+"""
+In-progress match journal
+Every hand is appended to a small log next to the database, so a crash or
+forced quit never loses the match being played
+"""
+
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+
+from .events import MatchLog
+
+JOURNAL_SUFFIX = "-match"
+
+# Hands arriving closer together than this share one fsync
+SYNC_INTERVAL = 0.05
+
+START, HAND, CORRECT, UNDO, REDO, END = "S", "H", "C", "U", "R", "E"
+
+
+def journal_path(db_path):
+    """Where the journal for the database at db_path lives"""
+    return db_path + JOURNAL_SUFFIX
+
+
+def encode(kind, *fields):
+    """One journal line: tab-separated fields followed by their CRC-32"""
+    body = "\t".join((kind,) + tuple(str(value) for value in fields))
+    return f"{body}\t{zlib.crc32(body.encode()):08x}\n"
+
+
+def decode(line):
+    """Return the fields of an intact line, or None for a torn or corrupt one"""
+    if not line.endswith("\n"):
+        return None
+    body, _, checksum = line[:-1].rpartition("\t")
+    if not body or checksum != f"{zlib.crc32(body.encode()):08x}":
+        return None
+    return body.split("\t")
+
+
+def end_line(record):
+    """The end record of a match, naming it the way the writer's restore does"""
+    return encode(END, record.match_date, record.zayaka_score, record.brian_score)
+
+
+def parse_target(text):
+    return int(text) if text.isdigit() else float(text)
+
+
+@dataclass
+class Recovery:
+    """What a journal held when it was opened"""
+    # MatchRecords that ended but whose commit was never confirmed
+    finished: list = field(default_factory=list)
+    # The event log of the match that was being played, or a fresh one
+    log: MatchLog = field(default_factory=MatchLog)
+
+    @property
+    def match(self):
+        return self.log.match
+
+
+class MatchJournal:
+    """Append-only log of hand events for matches not yet safely in the database
+
+    Each match is a segment: a start record, its MatchLog events (hands,
+    corrections, undo and redo) and an end record once it has been handed
+    to the writer. compact() drops an ended segment once its commit is
+    confirmed and discard() drops an abandoned match, so the file only
+    ever holds the live match plus any results still in flight or whose
+    save failed.
+    """
+
+    def __init__(self, path, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.syncs = 0
+        # Encoded lines of each match still in the file, oldest first
+        self._segments = []
+        self._file = None
+        self._dirty = False
+        self._synced_at = 0.0
+
+    def recover(self):
+        """Read the journal back, dropping any torn tail, and open it for appending"""
+        text = ""
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8", newline="") as f:
+                text = f.read()
+
+        recovery = Recovery()
+        segments, log, intact = [], None, 0
+        for line in text.splitlines(keepends=True):
+            fields = decode(line)
+            if fields is None:
+                break
+            kind = fields[0]
+            try:
+                if kind == START:
+                    log = MatchLog(target_score=parse_target(fields[1]))
+                    segments.append([line])
+                elif log is None:
+                    break
+                elif kind == HAND:
+                    log.add_hand(int(fields[1]), int(fields[2]))
+                elif kind == CORRECT:
+                    log.correct_hand(int(fields[1]), int(fields[2]), int(fields[3]))
+                elif kind == UNDO:
+                    if log.undo() is None:
+                        break
+                elif kind == REDO:
+                    if log.redo() is None:
+                        break
+                elif kind == END:
+                    recovery.finished.append(log.match.record(fields[1]))
+                    log = None
+                else:
+                    break
+                if kind != START:
+                    segments[-1].append(line)
+            except (ValueError, IndexError):
+                # A record the match rules reject ends the usable journal
+                break
+            intact += len(line)
+
+        # Only the last segment can still be open; earlier open ones were abandoned
+        self._segments = [lines for lines in segments
+                          if decode(lines[-1])[0] == END or lines is segments[-1]]
+        if log is not None:
+            recovery.log = log
+        if intact < len(text) or len(self._segments) < len(segments):
+            self._rewrite()
+        else:
+            self._file = open(self.path, "a", encoding="utf-8", newline="")
+        return recovery
+
+    def record_hand(self, match, zayaka_score, brian_score):
+        """Log a hand just added to match"""
+        self._record(match, encode(HAND, zayaka_score, brian_score))
+
+    def record_correction(self, match, index, zayaka_score, brian_score):
+        """Log a correction just made to hand number index of match"""
+        self._record(match, encode(CORRECT, index, zayaka_score, brian_score))
+
+    def record_undo(self, match):
+        self._record(match, encode(UNDO))
+
+    def record_redo(self, match):
+        self._record(match, encode(REDO))
+
+    def record_end(self, record):
+        """Log that the match finished as record and was queued for saving"""
+        self._append(end_line(record))
+        self.sync()
+
+    def compact(self, record):
+        """Drop the finished match saved as record once the database has committed it
+
+        Other finished matches stay, so a result whose save failed can
+        still be recovered.
+        """
+        line = end_line(record)
+        for index, lines in enumerate(self._segments):
+            if lines[-1] == line:
+                del self._segments[index]
+                self._rewrite()
+                return
+
+    def discard(self):
+        """Drop the match in progress, e.g. when a new match is started over it"""
+        if self._match_open():
+            self._segments.pop()
+            self._rewrite()
+
+    def sync(self):
+        """fsync anything appended since the last sync"""
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._synced_at = time.monotonic()
+            self.syncs += 1
+
+    @property
+    def pending(self):
+        """True when appended hands are written but not yet synced to disk"""
+        return self._dirty
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _match_open(self):
+        return bool(self._segments) and decode(self._segments[-1][-1])[0] != END
+
+    def _record(self, match, line):
+        if not self._match_open():
+            self._append(encode(START, match.target_score), new_segment=True)
+        self._append(line)
+
+    def _append(self, line, new_segment=False):
+        if new_segment:
+            self._segments.append([])
+        self._segments[-1].append(line)
+        # Flushed at once so an application crash loses nothing; the fsync
+        # that also covers power loss is shared by hands in quick succession
+        self._file.write(line)
+        self._file.flush()
+        self._dirty = True
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def _rewrite(self):
+        """Atomically replace the file with the segments still held"""
+        if self._file is not None:
+            self._file.close()
+        scratch = self.path + ".tmp"
+        with open(scratch, "w", encoding="utf-8", newline="") as f:
+            for lines in self._segments:
+                f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(scratch, self.path)
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        self._dirty = False
+        self._synced_at = time.monotonic()
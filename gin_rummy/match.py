@@ -0,0 +1,103 @@
+"""
+Match state machine
+The scoring rules of the tracker: hands are added one at a time and the
+first player to reach the target score wins the match
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .scores import PLAYERS
+
+TARGET_SCORE = 100
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class MatchRecord:
+    """A finished match, ready to be saved"""
+    zayaka_score: int
+    brian_score: int
+    winner: str
+    match_date: str
+    hands: list
+
+
+def parse_entry(zayaka_text, brian_text):
+    """Turn the two score fields into a (zayaka, brian) hand
+
+    Only one player scores per hand: a filled Zayaka field wins over the
+    Brian field. Returns None when both are empty and raises ValueError
+    for anything that isn't a number.
+    """
+    zayaka_text, brian_text = zayaka_text.strip(), brian_text.strip()
+    if not zayaka_text and not brian_text:
+        return None
+    if zayaka_text:
+        return int(zayaka_text), 0
+    return 0, int(brian_text)
+
+
+def check_hand(zayaka_score, brian_score):
+    """Raise ValueError for a hand the scoring rules do not allow"""
+    if zayaka_score < 0 or brian_score < 0:
+        raise ValueError("scores cannot be negative")
+    if zayaka_score and brian_score:
+        raise ValueError("only one player can score in a hand")
+
+
+@dataclass
+class Match:
+    """The match in progress: its hands and running totals"""
+    target_score: int = TARGET_SCORE
+    hands: list = field(default_factory=list)
+    zayaka_total: int = 0
+    brian_total: int = 0
+
+    @property
+    def winner(self):
+        """The winning player once someone has reached the target, else None"""
+        if self.zayaka_total >= self.target_score:
+            return PLAYERS[0]
+        if self.brian_total >= self.target_score:
+            return PLAYERS[1]
+        return None
+
+    @property
+    def is_over(self):
+        return self.winner is not None
+
+    def add_hand(self, zayaka_score, brian_score):
+        """Add one hand and return True if it ended the match"""
+        if self.is_over:
+            raise ValueError("the match is already over")
+        check_hand(zayaka_score, brian_score)
+        self.hands.append((zayaka_score, brian_score))
+        self.zayaka_total += zayaka_score
+        self.brian_total += brian_score
+        return self.is_over
+
+    def correct_hand(self, index, zayaka_score, brian_score):
+        """Replace hand number index (from 0) and return True if the match is now over"""
+        check_hand(zayaka_score, brian_score)
+        if not 0 <= index < len(self.hands):
+            raise ValueError(f"there is no hand {index + 1}")
+        old_zayaka, old_brian = self.hands[index]
+        zayaka_total = self.zayaka_total + zayaka_score - old_zayaka
+        brian_total = self.brian_total + brian_score - old_brian
+        # Totals only grow, so if they reach the target before the last hand
+        # the match would have ended early
+        last_zayaka, last_brian = (zayaka_score, brian_score) if index == len(self.hands) - 1 else self.hands[-1]
+        if max(zayaka_total - last_zayaka, brian_total - last_brian) >= self.target_score:
+            raise ValueError("the correction would end the match before its last hand")
+        self.hands[index] = (zayaka_score, brian_score)
+        self.zayaka_total, self.brian_total = zayaka_total, brian_total
+        return self.is_over
+
+    def record(self, match_date=None):
+        """Return the finished match as a MatchRecord"""
+        if not self.is_over:
+            raise ValueError("the match is still in progress")
+        return MatchRecord(self.zayaka_total, self.brian_total, self.winner,
+                           match_date or datetime.now().strftime(DATE_FORMAT), list(self.hands))
@@ -0,0 +1,295 @@
+"""
+Parallel sharded statistics
+Splits the history into shards, computes mergeable partial aggregates for
+each one in a worker process and merges the partials exactly, so a full
+recompute of a large archive uses every core instead of one
+
+Usage: python -m gin_rummy.parallel [--db PATH] [--workers N] [--verify]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import reduce
+
+from .aggregates import StatsAccumulator
+from .queries import query_aggregates
+from .stats import format_statistics
+from .stats_cache import fingerprint
+
+# More shards than workers evens out shards that happen to hold long matches
+SHARDS_PER_WORKER = 4
+# Attempts at a run the history did not change under before falling back to one query
+MAX_ATTEMPTS = 3
+
+SUMMED = ("matches", "zayaka_wins", "brian_wins", "zayaka_points", "brian_points", "hands",
+          "zayaka_hand_sum", "zayaka_non_zero", "brian_hand_sum", "brian_non_zero",
+          "games_matches", "games_sum", "games_sum_sq")
+MINIMUMS = ("zayaka_hand_min", "brian_hand_min", "games_min")
+MAXIMUMS = ("zayaka_hand_max", "brian_hand_max", "games_max")
+
+RESULTS_SQL = '''
+    SELECT zayaka_score, brian_score, winner FROM matches
+    WHERE {where} AND zayaka_score IS NOT NULL ORDER BY match_date, id
+'''
+
+HANDS_SQL = '''
+    SELECT COUNT(*) FILTER (WHERE player = 'Zayaka'),
+           SUM(points) FILTER (WHERE player = 'Zayaka'),
+           MIN(points) FILTER (WHERE player = 'Zayaka'),
+           MAX(points) FILTER (WHERE player = 'Zayaka'),
+           COUNT(*) FILTER (WHERE player = 'Zayaka' AND points > 0),
+           SUM(points) FILTER (WHERE player = 'Brian'),
+           MIN(points) FILTER (WHERE player = 'Brian'),
+           MAX(points) FILTER (WHERE player = 'Brian'),
+           COUNT(*) FILTER (WHERE player = 'Brian' AND points > 0)
+    FROM hands WHERE {where}
+'''
+
+GAMES_SQL = '''
+    SELECT COUNT(*), SUM(n), SUM(n * n), MIN(n), MAX(n)
+    FROM (SELECT MAX(hand_no) AS n FROM hands WHERE {where} GROUP BY match_id)
+'''
+
+
+def _pick(choose, first, second):
+    """min/max that treats None as "no value yet" """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return choose(first, second)
+
+
+@dataclass
+class ShardStats:
+    """Partial aggregates for one shard of the history
+
+    The accumulator's last_winner and current_streak already describe the
+    streak at the shard's end; first_winner and leading_streak describe the
+    run it opens with, which is all a merge needs to join runs that cross
+    a shard boundary.
+    """
+    acc: StatsAccumulator = field(default_factory=StatsAccumulator)
+    first_winner: str = None
+    leading_streak: int = 0
+
+    def add_match(self, zayaka_score, brian_score, winner, hands):
+        self.acc.add_match(zayaka_score, brian_score, winner, hands)
+        self._track_opening_run()
+
+    def add_result(self, zayaka_score, brian_score, winner, games):
+        self.acc.add_result(zayaka_score, brian_score, winner, games)
+        self._track_opening_run()
+
+    def _track_opening_run(self):
+        if self.first_winner is None:
+            self.first_winner = self.acc.last_winner
+        # The opening run is still going while it covers every match so far
+        if self.acc.current_streak == self.acc.matches:
+            self.leading_streak = self.acc.matches
+
+    def merge(self, later):
+        """The partial for this shard followed directly by later"""
+        a, b = self.acc, later.acc
+        merged = StatsAccumulator(**{name: getattr(a, name) + getattr(b, name) for name in SUMMED})
+        for name in MINIMUMS:
+            setattr(merged, name, _pick(min, getattr(a, name), getattr(b, name)))
+        for name in MAXIMUMS:
+            setattr(merged, name, _pick(max, getattr(a, name), getattr(b, name)))
+        if not a.matches or not b.matches:
+            # A shard can hold hand totals but no results; the streaks are the other side's
+            side = later if b.matches else self
+            for name in ("last_winner", "current_streak", "zayaka_longest_streak", "brian_longest_streak"):
+                setattr(merged, name, getattr(side.acc, name))
+            return ShardStats(merged, side.first_winner, side.leading_streak)
+
+        joined = a.last_winner == later.first_winner
+        bridge = a.current_streak + later.leading_streak if joined else 0
+        merged.zayaka_longest_streak = max(a.zayaka_longest_streak, b.zayaka_longest_streak,
+                                           bridge if a.last_winner == "Zayaka" else 0)
+        merged.brian_longest_streak = max(a.brian_longest_streak, b.brian_longest_streak,
+                                          bridge if a.last_winner == "Brian" else 0)
+        merged.last_winner = b.last_winner
+        merged.current_streak = bridge if joined and b.current_streak == b.matches else b.current_streak
+        leading = bridge if joined and a.current_streak == a.matches else self.leading_streak
+        return ShardStats(merged, self.first_winner, leading)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One worker task: a stretch of history order plus a match id range
+
+    Results are folded over the (match_date, id) range lower < key <= upper,
+    which keeps the streaks in history order; the order-free hand and
+    games-per-match totals are read over after_id < match_id <= last_id,
+    a primary key range scan of the hands table. None leaves an end open.
+    """
+    lower: tuple = None
+    upper: tuple = None
+    after_id: int = None
+    last_id: int = None
+
+
+def database_path(conn):
+    """File behind conn's main database, or None for an in-memory one"""
+    for _, name, path in conn.execute('PRAGMA database_list'):
+        if name == "main":
+            return path or None
+    return None
+
+
+def shard_bounds(conn, shards):
+    """Split the history into at most `shards` Shards of roughly equal size
+
+    When matches were saved in date order both ranges of a shard cover the
+    same matches; matches imported out of order still have their results
+    folded where their date puts them. Undated matches sort first, so their
+    results go to the first shard.
+    """
+    total, first_id, last_id = conn.execute(
+        'SELECT COUNT(match_date), MIN(id), MAX(id) FROM matches').fetchone()
+    size = -(-total // max(shards, 1))
+    if size == 0 or size >= total:
+        return [Shard()]
+    uppers = [tuple(key) for key in conn.execute('''
+        SELECT match_date, id FROM (
+            SELECT match_date, id, ROW_NUMBER() OVER (ORDER BY match_date, id) AS rn
+            FROM matches WHERE match_date IS NOT NULL
+        ) WHERE rn % ? = 0 AND rn < ?
+    ''', (size, total))]
+    width = -(-(last_id - first_id + 1) // (len(uppers) + 1))
+    ids = [first_id - 1 + width * n for n in range(1, len(uppers) + 1)]
+    return [Shard(*bounds) for bounds in zip([None] + uppers, uppers + [None], [None] + ids, ids + [None])]
+
+
+def _history_ranges(shard):
+    """(where, params) pairs that together select a shard's results in history order"""
+    ranges = []
+    if shard.lower is None:
+        # Undated matches sort first; reading them apart keeps the range on the date index
+        ranges.append(('match_date IS NULL', []))
+        conditions, params = ['match_date IS NOT NULL'], []
+    else:
+        conditions, params = ['(match_date, id) > (?, ?)'], list(shard.lower)
+    if shard.upper is not None:
+        conditions.append('(match_date, id) <= (?, ?)')
+        params += shard.upper
+    ranges.append((' AND '.join(conditions), params))
+    return ranges
+
+
+def _id_range(shard):
+    conditions, params = [], []
+    if shard.after_id is not None:
+        conditions.append('match_id > ?')
+        params.append(shard.after_id)
+    if shard.last_id is not None:
+        conditions.append('match_id <= ?')
+        params.append(shard.last_id)
+    return ' AND '.join(conditions) or '1', params
+
+
+def compute_shard(path, shard=Shard()):
+    """Compute the ShardStats for one shard of the database at path
+
+    Runs in a worker process, so it opens its own connection. Only match
+    results are folded in Python, in history order for the streaks; the
+    hand and games-per-match totals are aggregated inside SQLite.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA query_only = ON')
+    conn.execute('PRAGMA mmap_size = 268435456')
+    partial = ShardStats()
+    acc = partial.acc
+    try:
+        for where, params in _history_ranges(shard):
+            for zayaka_score, brian_score, winner in conn.execute(RESULTS_SQL.format(where=where), params):
+                partial.add_result(zayaka_score, brian_score, winner, 0)
+
+        where, params = _id_range(shard)
+        (acc.hands, acc.zayaka_hand_sum, acc.zayaka_hand_min, acc.zayaka_hand_max, acc.zayaka_non_zero,
+         acc.brian_hand_sum, acc.brian_hand_min, acc.brian_hand_max, acc.brian_non_zero) = conn.execute(
+            HANDS_SQL.format(where=where), params).fetchone()
+        (acc.games_matches, acc.games_sum, acc.games_sum_sq, acc.games_min, acc.games_max) = conn.execute(
+            GAMES_SQL.format(where=where), params).fetchone()
+        for name in SUMMED:
+            setattr(acc, name, getattr(acc, name) or 0)
+    finally:
+        conn.close()
+    return partial
+
+
+def pool(workers=None):
+    """A process pool for parallel_aggregates
+
+    Workers are spawned rather than forked so the pool is safe to create
+    from a process that already runs threads (the app's database and
+    writer threads). Reuse one pool across calls to pay the startup once.
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def parallel_aggregates(conn, workers=None, executor=None, shards_per_worker=SHARDS_PER_WORKER):
+    """The StatsAccumulator a full recompute would produce, computed in parallel
+
+    workers defaults to the CPU count; with one worker (or an in-memory
+    database) the work runs in this process. Pass executor to reuse a pool.
+    Each worker reads its own snapshot, so the history fingerprint is
+    checked around the run and the run repeated if a write landed; after
+    MAX_ATTEMPTS the single-query recompute answers instead.
+    """
+    path = database_path(conn)
+    if path is None:
+        return query_aggregates(conn)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 and executor is None:
+        return compute_shard(path).acc
+
+    own_pool = executor is None
+    executor = executor or pool(workers)
+    try:
+        for _ in range(MAX_ATTEMPTS):
+            before = fingerprint(conn)
+            futures = [executor.submit(compute_shard, path, shard)
+                       for shard in shard_bounds(conn, workers * shards_per_worker)]
+            merged = reduce(ShardStats.merge, (future.result() for future in futures), ShardStats())
+            if fingerprint(conn) == before:
+                return merged.acc
+    finally:
+        if own_pool:
+            executor.shutdown()
+    return query_aggregates(conn)
+
+
+def main():
+    from . import db
+
+    parser = argparse.ArgumentParser(description="Recompute GinRummy statistics across a process pool")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--verify", action="store_true",
+                        help="also compare the result with the single-query recompute")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    start = time.perf_counter()
+    acc = parallel_aggregates(conn, args.workers)
+    elapsed = time.perf_counter() - start
+    print(format_statistics(acc.statistics()))
+    print(f"✓ Recomputed with {args.workers} workers in {elapsed * 1000:.1f} ms")
+    if args.verify:
+        if acc == query_aggregates(conn):
+            print("✓ Matches the single-query recompute")
+        else:
+            print("✗ Differs from the single-query recompute")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
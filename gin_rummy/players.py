@@ -0,0 +1,339 @@
+"""
+Player-keyed results
+Records every match as one result row per participant, keyed by player
+id, and keeps per-player and head-to-head totals up to date as matches are
+saved, so leaderboards are read off an index instead of scanning matches
+
+The two-player matches table stays as the tracker's record of each match;
+these tables are maintained beside it for every write. A match between
+any other players (db.write_players_match) has only its date and winner
+in the matches row, so its results here are the only record of it.
+
+Usage: python -m gin_rummy.players [--db PATH] leaderboard [--by METRIC] [-k K] [--min-matches N]
+       python -m gin_rummy.players [--db PATH] head-to-head PLAYER OPPONENT
+"""
+
+import argparse
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+
+from .scores import PLAYERS
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    -- One row per participant in each match
+    CREATE TABLE IF NOT EXISTS match_players (
+        match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+        player_id INTEGER NOT NULL REFERENCES players(id),
+        score INTEGER NOT NULL,
+        won INTEGER NOT NULL,
+        hands INTEGER NOT NULL,
+        hand_points INTEGER NOT NULL,
+        PRIMARY KEY (match_id, player_id)
+    ) WITHOUT ROWID;
+    -- A player's own history, newest first
+    CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players (player_id, match_id DESC);
+    CREATE TABLE IF NOT EXISTS player_stats (
+        player_id INTEGER PRIMARY KEY REFERENCES players(id),
+        matches INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        points INTEGER NOT NULL,
+        hands INTEGER NOT NULL,
+        hand_points INTEGER NOT NULL,
+        win_rate REAL GENERATED ALWAYS AS (1.0 * wins / NULLIF(matches, 0)) VIRTUAL,
+        avg_hand REAL GENERATED ALWAYS AS (1.0 * hand_points / NULLIF(hands, 0)) VIRTUAL
+    );
+    -- Leaderboards walk one of these and stop after k rows
+    CREATE INDEX IF NOT EXISTS idx_player_stats_win_rate ON player_stats (win_rate DESC, matches DESC);
+    CREATE INDEX IF NOT EXISTS idx_player_stats_avg_hand ON player_stats (avg_hand DESC, matches DESC);
+    CREATE INDEX IF NOT EXISTS idx_player_stats_wins ON player_stats (wins DESC, matches DESC);
+    -- Both directions of every pairing, so a player's opponents are one range
+    CREATE TABLE IF NOT EXISTS head_to_head (
+        player_id INTEGER NOT NULL REFERENCES players(id),
+        opponent_id INTEGER NOT NULL REFERENCES players(id),
+        matches INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        points INTEGER NOT NULL,
+        opponent_points INTEGER NOT NULL,
+        PRIMARY KEY (player_id, opponent_id)
+    ) WITHOUT ROWID;
+'''
+
+# Each tracker player's result row for every match, as match_players stores it;
+# +player keeps each count on the hands primary key rather than the (player, points) index
+RESULT_ROWS = '''
+    SELECT m.id, p.id, COALESCE(m.{score}, 0), m.winner IS p.name,
+           (SELECT COUNT(*) FROM hands WHERE match_id = m.id AND +player = p.name),
+           (SELECT COALESCE(SUM(points), 0) FROM hands WHERE match_id = m.id AND +player = p.name)
+    FROM players p CROSS JOIN matches m WHERE p.name = ? AND m.zayaka_score IS NOT NULL
+'''
+
+# Result rows of matches between other players, which have no tracker scores to rebuild them from
+OTHER_RESULTS = '''
+    SELECT * FROM match_players WHERE match_id IN (SELECT id FROM matches WHERE zayaka_score IS NULL)
+'''
+
+SCORE_COLUMNS = ("zayaka_score", "brian_score")
+
+# Leaderboard metric -> (table, column); each has a descending index on
+# (column, matches), so the top players are read in order
+METRICS = {"win_rate": ("player_stats", "win_rate"), "avg_hand": ("player_stats", "avg_hand"),
+           "wins": ("player_stats", "wins"), "rating": ("player_ratings", "rating")}
+
+
+@dataclass
+class Participant:
+    """One player's side of a finished match"""
+    name: str
+    score: int
+    won: bool
+    # This player's points in each hand
+    hand_points: list
+
+
+@dataclass
+class Standing:
+    """A leaderboard row"""
+    name: str
+    matches: int
+    wins: int
+    win_rate: float
+    avg_hand: float
+    # Elo rating, None until the player has a rated match
+    rating: float = None
+
+
+@dataclass
+class HeadToHead:
+    """Everything one player has done against one opponent"""
+    player: str
+    opponent: str
+    matches: int = 0
+    wins: int = 0
+    points: int = 0
+    opponent_points: int = 0
+
+    @property
+    def losses(self):
+        return self.matches - self.wins
+
+
+def participants(zayaka_score, brian_score, winner, hands):
+    """The Participants of a two-player tracker match"""
+    return [Participant(name, score or 0, winner == name, [hand[position] for hand in hands])
+            for position, (name, score) in enumerate(zip(PLAYERS, (zayaka_score, brian_score)))]
+
+
+def init_schema(conn):
+    """Create the player tables, filling them from the match history when they are new"""
+    exists = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'match_players'").fetchone()[0]
+    conn.executescript(SCHEMA)
+    if not exists:
+        rebuild_tables(conn)
+
+
+def player_id(conn, name):
+    """The id of the named player, adding them on first sight"""
+    conn.execute('INSERT OR IGNORE INTO players (name) VALUES (?)', (name,))
+    return conn.execute('SELECT id FROM players WHERE name = ?', (name,)).fetchone()[0]
+
+
+def _apply(conn, rows, sign):
+    """Add (sign=1) or take away (sign=-1) a match's result rows in the running totals"""
+    conn.executemany('''
+        INSERT INTO player_stats (player_id, matches, wins, points, hands, hand_points)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (player_id) DO UPDATE SET
+            matches = matches + excluded.matches, wins = wins + excluded.wins,
+            points = points + excluded.points, hands = hands + excluded.hands,
+            hand_points = hand_points + excluded.hand_points
+    ''', [(pid, sign, sign * won, sign * score, sign * hands, sign * points)
+          for _, pid, score, won, hands, points in rows])
+    conn.executemany('''
+        INSERT INTO head_to_head VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (player_id, opponent_id) DO UPDATE SET
+            matches = matches + excluded.matches, wins = wins + excluded.wins,
+            points = points + excluded.points, opponent_points = opponent_points + excluded.opponent_points
+    ''', [(row[1], other[1], sign, sign * row[3], sign * row[2], sign * other[2])
+          for row in rows for other in rows if other[1] != row[1]])
+
+
+def record_match(conn, match_id, players):
+    """Store a saved match's Participants and update the totals (caller controls the transaction)
+
+    Returns the match_players rows that were written.
+    """
+    rows = [(match_id, player_id(conn, p.name), p.score, int(p.won), len(p.hand_points), sum(p.hand_points))
+            for p in players]
+    conn.executemany('INSERT INTO match_players VALUES (?, ?, ?, ?, ?, ?)', rows)
+    _apply(conn, rows, 1)
+    return rows
+
+
+def remove_match(conn, match_id):
+    """Take a match's results back out of the totals (caller controls the transaction)"""
+    rows = conn.execute('SELECT * FROM match_players WHERE match_id = ?', (match_id,)).fetchall()
+    _apply(conn, rows, -1)
+    conn.execute('DELETE FROM match_players WHERE match_id = ?', (match_id,))
+
+
+def reset(conn):
+    """Forget every result, keeping the players (caller controls the transaction)"""
+    conn.execute('DELETE FROM match_players')
+    conn.execute('DELETE FROM player_stats')
+    conn.execute('DELETE FROM head_to_head')
+
+
+def rebuild_tables(conn):
+    """Refill the result rows and totals from the matches and hands tables (caller controls the transaction)
+
+    Set-based, for backfills and bulk imports rather than single matches.
+    The results of matches between other players are kept as they are.
+    """
+    if conn.execute('SELECT 1 FROM matches WHERE zayaka_score IS NULL LIMIT 1').fetchone() is None:
+        # Clearing whole tables is much cheaper than picking rows out
+        reset(conn)
+    else:
+        conn.execute('''
+            DELETE FROM match_players WHERE match_id IN (SELECT id FROM matches WHERE zayaka_score IS NOT NULL)
+        ''')
+        conn.execute('DELETE FROM player_stats')
+        conn.execute('DELETE FROM head_to_head')
+    conn.executemany('INSERT OR IGNORE INTO players (name) VALUES (?)', [(name,) for name in PLAYERS])
+    for name, score in zip(PLAYERS, SCORE_COLUMNS):
+        conn.execute('INSERT INTO match_players' + RESULT_ROWS.format(score=score), (name,))
+    conn.execute('''
+        INSERT INTO player_stats (player_id, matches, wins, points, hands, hand_points)
+        SELECT player_id, COUNT(*), SUM(won), SUM(score), SUM(hands), SUM(hand_points)
+        FROM match_players GROUP BY player_id
+    ''')
+    conn.execute('''
+        INSERT INTO head_to_head
+        SELECT a.player_id, b.player_id, COUNT(*), SUM(a.won), SUM(a.score), SUM(b.score)
+        FROM match_players a JOIN match_players b ON b.match_id = a.match_id AND b.player_id != a.player_id
+        GROUP BY a.player_id, b.player_id
+    ''')
+
+
+def _snapshot(conn):
+    return (conn.execute('SELECT * FROM match_players ORDER BY match_id, player_id').fetchall(),
+            conn.execute('''
+                SELECT player_id, matches, wins, points, hands, hand_points FROM player_stats
+                WHERE matches != 0 ORDER BY player_id
+            ''').fetchall(),
+            conn.execute('SELECT * FROM head_to_head WHERE matches != 0 ORDER BY player_id, opponent_id').fetchall())
+
+
+def _expected(conn):
+    """The rows a rebuild would store, worked out in memory from the matches and hands"""
+    rows = [row for name, score in zip(PLAYERS, SCORE_COLUMNS)
+            for row in conn.execute(RESULT_ROWS.format(score=score), (name,))]
+    rows = sorted(rows + conn.execute(OTHER_RESULTS).fetchall())
+    totals, pairs = {}, {}
+    for _, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        for _, pid, score, won, hands, points in group:
+            total = totals.setdefault(pid, [0, 0, 0, 0, 0])
+            for index, value in enumerate((1, won, score, hands, points)):
+                total[index] += value
+        for row in group:
+            for other in group:
+                if other[1] != row[1]:
+                    pair = pairs.setdefault((row[1], other[1]), [0, 0, 0, 0])
+                    for index, value in enumerate((1, row[3], row[2], other[2])):
+                        pair[index] += value
+    return (rows, [(pid, *total) for pid, total in sorted(totals.items())],
+            [(*key, *pair) for key, pair in sorted(pairs.items())])
+
+
+def verify(conn):
+    """(table, stored rows, rebuilt rows) for each player table that differs from a rebuild
+
+    Only reads, so it never holds up the writer.
+    """
+    stored, fresh = _snapshot(conn), _expected(conn)
+    return [(name, len(before), len(after))
+            for name, before, after in zip(("match_players", "player_stats", "head_to_head"), stored, fresh)
+            if before != after]
+
+
+def rebuild(conn):
+    """Verify the player tables, then refill them from the match history
+    (caller controls the transaction)"""
+    mismatches = verify(conn)
+    rebuild_tables(conn)
+    return mismatches
+
+
+def leaderboard_query(metric):
+    """The SQL behind leaderboard(), taking (min_matches, k)"""
+    if metric not in METRICS:
+        raise ValueError(f"unknown leaderboard metric {metric!r} (choose from {', '.join(METRICS)})")
+    table, column = METRICS[metric]
+    return f'''
+        SELECT p.name, s.matches, s.wins, s.win_rate, s.avg_hand, r.rating
+        FROM {table} ranked
+        JOIN player_stats s ON s.player_id = ranked.player_id
+        JOIN players p ON p.id = ranked.player_id
+        LEFT JOIN player_ratings r ON r.player_id = ranked.player_id
+        WHERE ranked.matches >= ?
+        ORDER BY ranked.{column} DESC, ranked.matches DESC
+        LIMIT ?
+    '''
+
+
+def leaderboard(conn, metric="win_rate", k=10, min_matches=1):
+    """The top k players by metric, read in index order
+
+    Walks the metric's descending index and stops once k players with at
+    least min_matches have been found, so a club of any size costs about k
+    index steps (more when min_matches filters out many players).
+    """
+    return [Standing(*row) for row in conn.execute(leaderboard_query(metric), (max(min_matches, 1), k))]
+
+
+def head_to_head(conn, player, opponent):
+    """player's record against opponent"""
+    row = conn.execute('''
+        SELECT h.matches, h.wins, h.points, h.opponent_points
+        FROM head_to_head h
+        JOIN players p ON p.id = h.player_id JOIN players o ON o.id = h.opponent_id
+        WHERE p.name = ? AND o.name = ?
+    ''', (player, opponent)).fetchone()
+    return HeadToHead(player, opponent, *row) if row else HeadToHead(player, opponent)
+
+
+def main():
+    from . import db
+
+    parser = argparse.ArgumentParser(description="Player leaderboards and head-to-head records")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    board = commands.add_parser("leaderboard", help="top players by a metric")
+    board.add_argument("--by", choices=sorted(METRICS), default="win_rate", help="ranking metric")
+    board.add_argument("-k", type=int, default=10, help="how many players to list")
+    board.add_argument("--min-matches", type=int, default=1, help="leave out players with fewer matches")
+    pair = commands.add_parser("head-to-head", help="one player's record against another")
+    pair.add_argument("player")
+    pair.add_argument("opponent")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    if args.command == "leaderboard":
+        print(f"{'#':>3}  {'player':<20}{'matches':>8}{'wins':>7}{'win %':>8}{'avg hand':>10}{'rating':>8}")
+        for rank, s in enumerate(leaderboard(conn, args.by, args.k, args.min_matches), start=1):
+            print(f"{rank:>3}  {s.name:<20}{s.matches:>8}{s.wins:>7}{s.win_rate * 100:>7.1f}%"
+                  f"{s.avg_hand or 0:>10.1f}{s.rating or 0:>8.0f}")
+    else:
+        h = head_to_head(conn, args.player, args.opponent)
+        print(f"{h.player} vs {h.opponent}: {h.wins}-{h.losses} in {h.matches} matches, "
+              f"{h.points} points to {h.opponent_points}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+PyQt5 models and helpers for gin_rummy_tracker_pyqt5.py
+Kept apart from the rest of gin_rummy so the core never imports Qt
+"""
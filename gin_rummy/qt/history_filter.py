@@ -0,0 +1,133 @@
+"""
+Filter bar for the Match History tab
+Collects a date range, winner, margin and hand count limits and free-text
+search into a HistoryFilter, emitted once the user pauses typing
+"""
+
+from datetime import timedelta
+
+from PyQt5.QtCore import QDate, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (QComboBox, QDateEdit, QHBoxLayout, QLabel, QLineEdit,
+                             QPushButton, QSpinBox, QWidget)
+
+from ..db import to_epoch
+from ..history import HistoryFilter
+from ..scores import PLAYERS
+
+ANY_TEXT = "Any"
+ANY_WINNER = "Any winner"
+# Dates at the bottom of the range show as "Any" and leave that end open
+EARLIEST_DATE = QDate(2000, 1, 1)
+# Milliseconds to wait after the last change before filtering
+SETTLE_MS = 300
+
+
+def day_start(day):
+    """Epoch seconds at local midnight starting a datetime.date"""
+    return to_epoch(f"{day.isoformat()} 00:00:00")
+
+
+def optional_spin(lowest, highest):
+    """A spin box whose lowest value reads "Any" and means no limit"""
+    spin = QSpinBox()
+    spin.setRange(lowest, highest)
+    spin.setSpecialValueText(ANY_TEXT)
+    spin.setValue(lowest)
+    return spin
+
+
+def optional_date():
+    edit = QDateEdit()
+    edit.setCalendarPopup(True)
+    edit.setDisplayFormat("yyyy-MM-dd")
+    edit.setMinimumDate(EARLIEST_DATE)
+    edit.setSpecialValueText(ANY_TEXT)
+    edit.setDate(EARLIEST_DATE)
+    return edit
+
+
+class HistoryFilterBar(QWidget):
+    """Emits changed(HistoryFilter) whenever the filters settle on new values"""
+
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.date_from = optional_date()
+        self.date_to = optional_date()
+        self.winner = QComboBox()
+        self.winner.addItems([ANY_WINNER, *PLAYERS])
+        # Minimums start at 0, where "at least 0" is no limit; maximums
+        # start one below, so a maximum of 0 can still be asked for
+        self.min_margin = optional_spin(0, 999)
+        self.max_margin = optional_spin(-1, 999)
+        self.min_hands = optional_spin(0, 99)
+        self.max_hands = optional_spin(-1, 99)
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search hands, e.g. Brian:12 or 60")
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+
+        for label, widget in (("From", self.date_from), ("To", self.date_to), (None, self.winner),
+                              ("Margin", self.min_margin), ("to", self.max_margin),
+                              ("Hands", self.min_hands), ("to", self.max_hands), (None, self.search)):
+            if label:
+                layout.addWidget(QLabel(label))
+            layout.addWidget(widget)
+        layout.addWidget(clear_button)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SETTLE_MS)
+        self.timer.timeout.connect(self.emit_filter)
+        self.last = self.current_filter()
+        for edit in (self.date_from, self.date_to):
+            edit.dateChanged.connect(self.settle)
+        self.winner.currentIndexChanged.connect(self.settle)
+        for spin in (self.min_margin, self.max_margin, self.min_hands, self.max_hands):
+            spin.valueChanged.connect(self.settle)
+        self.search.textChanged.connect(self.settle)
+
+    def current_filter(self):
+        """The HistoryFilter the widgets describe right now"""
+        def limit(spin):
+            return None if spin.value() == spin.minimum() else spin.value()
+
+        def day(edit):
+            return None if edit.date() == edit.minimumDate() else edit.date().toPyDate()
+
+        first_day, last_day = day(self.date_from), day(self.date_to)
+        winner = self.winner.currentText()
+        return HistoryFilter(
+            date_from=None if first_day is None else day_start(first_day),
+            # The To date is included, so the range ends at the next midnight
+            date_to=None if last_day is None else day_start(last_day + timedelta(days=1)),
+            winner=None if winner == ANY_WINNER else winner,
+            min_margin=limit(self.min_margin),
+            max_margin=limit(self.max_margin),
+            min_hands=limit(self.min_hands),
+            max_hands=limit(self.max_hands),
+            text=self.search.text().strip(),
+        )
+
+    def settle(self, *_):
+        """Restart the wait after any change"""
+        self.timer.start()
+
+    def emit_filter(self):
+        current = self.current_filter()
+        if current != self.last:
+            self.last = current
+            self.changed.emit(current)
+
+    def clear(self):
+        """Reset every filter to "Any" and show the whole history again"""
+        for edit in (self.date_from, self.date_to):
+            edit.setDate(EARLIEST_DATE)
+        self.winner.setCurrentIndex(0)
+        for spin in (self.min_margin, self.max_margin, self.min_hands, self.max_hands):
+            spin.setValue(spin.minimum())
+        self.search.clear()
@@ -0,0 +1,175 @@
+"""
+Lazily fetched model for the Match History tab
+Rows arrive from SQLite a page at a time as the view scrolls; every read
+runs on the database thread and lands back here through signals
+"""
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ..history import (COLUMNS, SORTABLE, HistoryPager, format_cell, plan_filter,
+                       read_game_scores, read_page)
+from ..timing import Tracer
+
+COLLAPSED_TEXT = "▸ double-click to show"
+LOADING_TEXT = "…"
+
+GAME_SCORES_COLUMN = [name for name, _ in COLUMNS].index("game_scores")
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Table model over HistoryPager with canFetchMore/fetchMore paging"""
+
+    def __init__(self, db_thread, parent=None, tracer=None):
+        super().__init__(parent)
+        self.db_thread = db_thread
+        self.tracer = tracer or Tracer()
+        self.pager = HistoryPager()
+        # game_scores text for rows the user has expanded, keyed by match id
+        self.expanded = {}
+        # Bumped on every reset so late results for an old sort are ignored
+        self.generation = 0
+        self.fetching = False
+        self.reloading = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.pager.loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = self.pager.cached_row(index.row())
+        if row is None:
+            self._reload_page(index.row() // self.pager.page_size)
+            return LOADING_TEXT
+        column = COLUMNS[index.column()][0]
+        if column == "game_scores":
+            return self.expanded.get(row[0], COLLAPSED_TEXT)
+        return format_cell(column, row)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.pager.exhausted and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.fetching or self.pager.exhausted:
+            return
+        self.fetching = True
+        generation = self.generation
+        column, descending, after = self.pager.sort_column, self.pager.descending, self.pager.next_boundary
+        size, history_filter, plan = self.pager.page_size, self.pager.filter, self.pager.plan
+        tracer = self.tracer
+
+        def read(conn, report):
+            with tracer.span("history page", sort=column) as span:
+                # The first page after a filter change plans it on the database thread too
+                found = plan or plan_filter(conn, history_filter, page_size=size)
+                rows = read_page(conn, column, descending, after, size, found)
+                span.set(rows=len(rows), driver=found.driver)
+            return found, rows
+
+        self.db_thread.submit("history", read, on_result=lambda result: self._on_page(generation, *result))
+
+    def _on_page(self, generation, plan, rows):
+        if generation != self.generation:
+            return
+        self.fetching = False
+        self.pager.plan = plan
+        if not rows:
+            self.pager.append_page(rows)
+            return
+        first = self.pager.loaded_rows
+        with self.tracer.span("history rows inserted", rows=len(rows)):
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.pager.append_page(rows)
+            self.endInsertRows()
+
+    def _reload_page(self, page_no):
+        """Re-read a page that fell out of the LRU"""
+        if page_no in self.reloading:
+            return
+        self.reloading.add(page_no)
+        generation = self.generation
+        column, descending, after = self.pager.sort_column, self.pager.descending, self.pager.boundary(page_no)
+        size, plan = self.pager.page_size, self.pager.plan
+        self.db_thread.submit(
+            "history",
+            lambda conn, report: read_page(conn, column, descending, after, size, plan),
+            on_result=lambda rows: self._on_reloaded(generation, page_no, rows))
+
+    def _on_reloaded(self, generation, page_no, rows):
+        if generation != self.generation:
+            return
+        self.reloading.discard(page_no)
+        self.pager.restore_page(page_no, rows)
+        first = page_no * self.pager.page_size
+        last = min(first + len(rows), self.pager.loaded_rows) - 1
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Re-sort inside SQLite; unsortable columns are ignored"""
+        name = COLUMNS[column][0]
+        if name not in SORTABLE:
+            return
+        self.beginResetModel()
+        self._restart()
+        self.pager.set_sort(name, descending=(order == Qt.DescendingOrder))
+        self.endResetModel()
+
+    def set_filter(self, history_filter):
+        """Show only the matches passing a HistoryFilter (None shows them all)"""
+        self.beginResetModel()
+        self._restart()
+        self.pager.set_filter(history_filter)
+        self.expanded.clear()
+        self.endResetModel()
+
+    def refresh(self):
+        """Forget every loaded page so the view re-reads from the database"""
+        self.beginResetModel()
+        self._restart()
+        self.pager.reset()
+        self.expanded.clear()
+        self.endResetModel()
+
+    def _restart(self):
+        self.db_thread.cancel("history")
+        self.generation += 1
+        self.fetching = False
+        self.reloading.clear()
+
+    def match_id(self, index):
+        """The id of the match shown at index, or None if it is not loaded"""
+        row = self.pager.cached_row(index.row()) if index.isValid() else None
+        return None if row is None else row[0]
+
+    def toggle_expanded(self, index, on_loaded=None):
+        """Show or hide the game_scores of the row at index"""
+        if not index.isValid():
+            return
+        row = self.pager.cached_row(index.row())
+        if row is None:
+            return
+        match_id = row[0]
+        cell = self.index(index.row(), GAME_SCORES_COLUMN)
+        if match_id in self.expanded:
+            del self.expanded[match_id]
+            self.dataChanged.emit(cell, cell)
+            if on_loaded is not None:
+                on_loaded()
+            return
+
+        def loaded(text):
+            self.expanded[match_id] = text
+            self.dataChanged.emit(cell, cell)
+            if on_loaded is not None:
+                on_loaded()
+
+        self.db_thread.submit("history", lambda conn, report: read_game_scores(conn, match_id),
+                              on_result=loaded)
@@ -0,0 +1,116 @@
+"""
+Editor for a saved match
+Corrections go through the same MatchLog as the Score tab, so they can be
+undone and redone before the edited match is saved
+"""
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QDialogButtonBox, QHBoxLayout, QHeaderView, QLabel,
+                             QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from ..events import MatchLog
+
+
+def corrected_hand(hand, column, text):
+    """The (zayaka, brian) hand after the score in column 1 or 2 is changed to text
+
+    Only one player scores in a hand, so giving one player points takes
+    them from the other. Raises ValueError when text is not a whole number.
+    """
+    scores = list(hand)
+    scores[column - 1] = int(text.strip())
+    if scores[column - 1]:
+        scores[2 - column] = 0
+    return tuple(scores)
+
+
+class MatchEditorDialog(QDialog):
+    """Edits the hands of one saved MatchRecord; edited_record() is the result"""
+
+    def __init__(self, match_id, record, parent=None):
+        super().__init__(parent)
+        self.record = record
+        self.log = MatchLog(hands=record.hands)
+        self.setWindowTitle(f"Edit Match {match_id} - {record.match_date}")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Double-click a score to correct it"))
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Game #", "Zayaka", "Brian"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.itemChanged.connect(self.on_item_changed)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.clicked.connect(self.undo)
+        button_layout.addWidget(self.undo_button)
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.redo)
+        button_layout.addWidget(self.redo_button)
+        layout.addLayout(button_layout)
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+
+        self.show_match()
+
+    def edited_record(self):
+        """The corrected match, keeping its original date"""
+        return self.log.match.record(self.record.match_date)
+
+    def show_match(self, message=None):
+        """Refill the table from the log and refresh the buttons"""
+        match = self.log.match
+        # Corrections never change the number of hands, so after the first
+        # fill the items are updated in place (one may be mid-edit)
+        self.table.blockSignals(True)
+        if self.table.rowCount() != len(match.hands):
+            self.table.setRowCount(len(match.hands))
+            for row in range(len(match.hands)):
+                game_item = QTableWidgetItem(f"Game {row + 1}")
+                game_item.setFlags(game_item.flags() & ~Qt.ItemIsEditable)
+                self.table.setItem(row, 0, game_item)
+                for column in (1, 2):
+                    item = QTableWidgetItem()
+                    item.setTextAlignment(Qt.AlignCenter)
+                    self.table.setItem(row, column, item)
+        for row, hand in enumerate(match.hands):
+            for column, points in enumerate(hand, start=1):
+                self.table.item(row, column).setText(str(points))
+        self.table.blockSignals(False)
+
+        self.undo_button.setEnabled(self.log.can_undo)
+        self.redo_button.setEnabled(self.log.can_redo)
+        # Only a finished match with at least one correction can be saved
+        self.buttons.button(QDialogButtonBox.Save).setEnabled(match.is_over and self.log.position > 0)
+        if message is None:
+            message = (f"Winner: {match.winner} - Zayaka {match.zayaka_total}, Brian {match.brian_total}"
+                       if match.is_over else
+                       f"Nobody reaches {match.target_score} - Zayaka {match.zayaka_total}, "
+                       f"Brian {match.brian_total}")
+        self.status_label.setText(message)
+
+    def on_item_changed(self, item):
+        row, column = item.row(), item.column()
+        try:
+            hand = corrected_hand(self.log.match.hands[row], column, item.text())
+            self.log.correct_hand(row, *hand)
+        except ValueError as e:
+            self.show_match(f"Not applied: {e}")
+            return
+        self.show_match()
+
+    def undo(self):
+        if self.log.undo() is not None:
+            self.show_match()
+
+    def redo(self):
+        if self.log.redo() is not None:
+            self.show_match()
@@ -0,0 +1,173 @@
+"""
+Background database thread
+Runs statistics and history reads on a dedicated QThread with its own
+SQLite connection and delivers results back to the GUI thread via signals;
+writes go through gin_rummy.writer on its own thread
+"""
+
+import itertools
+import sqlite3
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from .. import db
+
+# SQLite VM instructions between progress-handler calls for cancellable jobs
+PROGRESS_STEPS = 20000
+
+
+class Job:
+    """One unit of work for the database thread"""
+
+    def __init__(self, request_id, group, fn, cancellable,
+                 on_result=None, on_progress=None, on_error=None):
+        self.request_id = request_id
+        self.group = group
+        self.fn = fn
+        self.cancellable = cancellable
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.on_error = on_error
+        # Set from the GUI thread, read by the worker and its progress handler
+        self.cancelled = False
+
+
+class DatabaseWorker(QObject):
+    """Executes jobs one at a time inside the database thread"""
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    progress = pyqtSignal(int, str)
+
+    def __init__(self, path, ready=None):
+        super().__init__()
+        self.path = path
+        self.ready = ready
+        self.conn = None
+
+    @pyqtSlot(object)
+    def run_job(self, job):
+        if job.cancelled:
+            return
+        if self.conn is None:
+            if self.ready is not None:
+                # Let the writer finish creating or upgrading the schema first
+                self.ready.wait()
+            # Created here so the connection belongs to the database thread
+            self.conn = db.connect(self.path)
+
+        def report(message):
+            self.progress.emit(job.request_id, message)
+
+        if job.cancellable:
+            # Returning non-zero aborts the running statement for stale requests
+            self.conn.set_progress_handler(lambda: job.cancelled, PROGRESS_STEPS)
+        try:
+            result = job.fn(self.conn, report)
+        except sqlite3.OperationalError as e:
+            if not job.cancelled:
+                self.failed.emit(job.request_id, str(e))
+        except Exception as e:
+            self.failed.emit(job.request_id, str(e))
+        else:
+            if not job.cancelled:
+                self.finished.emit(job.request_id, result)
+        finally:
+            if job.cancellable:
+                self.conn.set_progress_handler(None, 0)
+
+    @pyqtSlot()
+    def shutdown(self):
+        """Close the connection once every queued job has run, then stop"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        QThread.currentThread().quit()
+
+
+class DatabaseThread(QObject):
+    """GUI-side handle that queues jobs and routes their results
+
+    Jobs run in submission order. Submitting with replace=True cancels any
+    unfinished job in the same group, so clicking Refresh repeatedly only
+    ever delivers the latest result.
+    """
+    _submit = pyqtSignal(object)
+    _shutdown = pyqtSignal()
+
+    def __init__(self, path, parent=None, ready=None):
+        super().__init__(parent)
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self.thread = QThread()
+        self.worker = DatabaseWorker(path, ready)
+        self.worker.moveToThread(self.thread)
+        self._submit.connect(self.worker.run_job)
+        self._shutdown.connect(self.worker.shutdown)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.progress.connect(self._on_progress)
+        self.thread.start()
+
+    def submit(self, group, fn, on_result=None, on_progress=None, on_error=None,
+               cancellable=True, replace=False):
+        """Queue fn(conn, report) on the database thread and return its Job"""
+        if replace:
+            self.cancel(group)
+        job = Job(next(self._ids), group, fn, cancellable, on_result, on_progress, on_error)
+        self._jobs[job.request_id] = job
+        self._submit.emit(job)
+        return job
+
+    def cancel(self, group):
+        """Cancel every unfinished cancellable job in a group"""
+        for request_id, job in list(self._jobs.items()):
+            if job.group == group and job.cancellable:
+                job.cancelled = True
+                del self._jobs[request_id]
+
+    def stop(self):
+        """Finish queued jobs (including pending writes) and stop the thread"""
+        self._shutdown.emit()
+        self.thread.wait()
+
+    def _on_finished(self, request_id, result):
+        job = self._jobs.pop(request_id, None)
+        if job is not None and job.on_result is not None:
+            job.on_result(result)
+
+    def _on_failed(self, request_id, message):
+        job = self._jobs.pop(request_id, None)
+        if job is not None and job.on_error is not None:
+            job.on_error(message)
+
+    def _on_progress(self, request_id, message):
+        job = self._jobs.get(request_id)
+        if job is not None and job.on_progress is not None:
+            job.on_progress(message)
+
+
+class MainThreadDispatcher(QObject):
+    """Runs callbacks from other threads (e.g. the writer) on the GUI thread"""
+    _call = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Emitted from another thread, so Qt queues the call to this object's thread
+        self._call.connect(self._run)
+
+    def call(self, fn):
+        self._call.emit(fn)
+
+    def deliver(self, future, on_result=None, on_error=None):
+        """Call on_result(value) or on_error(message) on the GUI thread when future completes"""
+        def done(future):
+            error = future.exception()
+            if error is None:
+                if on_result is not None:
+                    self.call(lambda: on_result(future.result()))
+            elif on_error is not None:
+                self.call(lambda: on_error(str(error)))
+        future.add_done_callback(done)
+
+    def _run(self, fn):
+        fn()
@@ -0,0 +1,88 @@
+"""
+Set-based statistics queries
+Computes every Statistics tab figure inside SQLite in a single round trip:
+win streaks are gaps-and-islands over a window function, hand and
+games-per-match figures are grouped aggregates over the hands table
+"""
+
+from .aggregates import FIELDS, StatsAccumulator
+
+STATISTICS_SQL = '''
+    WITH ordered AS (
+        -- One sorted window pass: a row's island is the count of rows of the
+        -- other winner seen so far, which only changes when a streak breaks
+        SELECT winner = 'Zayaka' AS zayaka_won,
+               ROW_NUMBER() OVER by_date AS rn,
+               SUM(winner = 'Zayaka') OVER by_date AS zayaka_so_far
+        FROM matches WHERE zayaka_score IS NOT NULL
+        WINDOW by_date AS (ORDER BY match_date, id ROWS UNBOUNDED PRECEDING)
+    ),
+    runs AS (
+        SELECT zayaka_won, COUNT(*) AS length, MAX(rn) AS last_rn
+        FROM ordered
+        GROUP BY zayaka_won,
+                 CASE WHEN zayaka_won THEN rn - zayaka_so_far ELSE zayaka_so_far END
+    ),
+    streaks AS (
+        SELECT MAX(CASE WHEN zayaka_won THEN length END) AS zayaka_longest,
+               MAX(CASE WHEN NOT zayaka_won THEN length END) AS brian_longest
+        FROM runs
+    ),
+    current_run AS (
+        SELECT CASE WHEN zayaka_won THEN 'Zayaka' ELSE 'Brian' END AS winner, length
+        FROM runs ORDER BY last_rn DESC LIMIT 1
+    ),
+    totals AS (
+        SELECT COUNT(*) AS matches,
+               COALESCE(SUM(winner = 'Zayaka'), 0) AS zayaka_wins,
+               COALESCE(SUM(winner = 'Brian'), 0) AS brian_wins,
+               COALESCE(SUM(zayaka_score), 0) AS zayaka_points,
+               COALESCE(SUM(brian_score), 0) AS brian_points
+        FROM matches WHERE zayaka_score IS NOT NULL
+    ),
+    players AS (
+        -- Scans the covering (player, points) index rather than the table
+        SELECT player, COUNT(*) AS hands, SUM(points) AS total,
+               COUNT(*) FILTER (WHERE points > 0) AS non_zero
+        FROM hands GROUP BY player
+    ),
+    zayaka AS (
+        SELECT COALESCE(MAX(hands), 0) AS hands, COALESCE(MAX(total), 0) AS total,
+               COALESCE(MAX(non_zero), 0) AS non_zero,
+               (SELECT MIN(points) FROM hands WHERE player = 'Zayaka') AS fewest,
+               (SELECT MAX(points) FROM hands WHERE player = 'Zayaka') AS most
+        FROM players WHERE player = 'Zayaka'
+    ),
+    brian AS (
+        SELECT COALESCE(MAX(total), 0) AS total, COALESCE(MAX(non_zero), 0) AS non_zero,
+               (SELECT MIN(points) FROM hands WHERE player = 'Brian') AS fewest,
+               (SELECT MAX(points) FROM hands WHERE player = 'Brian') AS most
+        FROM players WHERE player = 'Brian'
+    ),
+    games AS (
+        SELECT COUNT(*) AS matches, COALESCE(SUM(n), 0) AS total,
+               COALESCE(SUM(n * n), 0) AS total_sq, MIN(n) AS fewest, MAX(n) AS most
+        FROM (SELECT MAX(hand_no) AS n FROM hands GROUP BY match_id)
+    )
+    SELECT totals.matches, totals.zayaka_wins, totals.brian_wins,
+           totals.zayaka_points, totals.brian_points,
+           zayaka.hands,
+           zayaka.total, zayaka.fewest, zayaka.most, zayaka.non_zero,
+           brian.total, brian.fewest, brian.most, brian.non_zero,
+           games.matches, games.total, games.total_sq, games.fewest, games.most,
+           current_run.winner, COALESCE(current_run.length, 0),
+           COALESCE(streaks.zayaka_longest, 0), COALESCE(streaks.brian_longest, 0)
+    FROM totals, zayaka, brian, games, streaks
+    LEFT JOIN current_run ON 1
+'''
+
+
+def query_aggregates(conn):
+    """Compute the full StatsAccumulator with one statistics query"""
+    row = conn.execute(STATISTICS_SQL).fetchone()
+    return StatsAccumulator(**dict(zip(FIELDS, row)))
+
+
+def query_statistics(conn):
+    """Compute the Statistics tab figures directly from the match tables"""
+    return query_aggregates(conn).statistics()
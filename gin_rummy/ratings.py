@@ -0,0 +1,370 @@
+"""
+Elo ratings
+Rates every player from the player-keyed match results: each saved match
+moves its players' ratings in O(1) and leaves a before/after history row,
+and a full recompute replays the history in one chunked streaming pass,
+so new rating settings can be applied to a large archive in seconds
+
+Usage: python -m gin_rummy.ratings [--db PATH] show [-k K] [--min-matches N]
+       python -m gin_rummy.ratings [--db PATH] history PLAYER [--last N]
+       python -m gin_rummy.ratings [--db PATH] recompute [--initial R] [--k-factor K] [--scale S]
+"""
+
+import argparse
+import time
+from dataclasses import astuple, dataclass
+from itertools import groupby
+from operator import itemgetter
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rating_settings (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        initial REAL NOT NULL,
+        k_factor REAL NOT NULL,
+        scale REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS player_ratings (
+        player_id INTEGER PRIMARY KEY REFERENCES players(id),
+        rating REAL NOT NULL,
+        -- Rated matches
+        matches INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_player_ratings_rating ON player_ratings (rating DESC, matches DESC);
+    -- Each player's rating before and after every match
+    CREATE TABLE IF NOT EXISTS rating_history (
+        match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+        player_id INTEGER NOT NULL REFERENCES players(id),
+        before REAL NOT NULL,
+        after REAL NOT NULL,
+        PRIMARY KEY (match_id, player_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_rating_history_player ON rating_history (player_id, match_id);
+'''
+
+# Matches read (and history rows written) per step of a replay
+REPLAY_CHUNK = 50000
+
+# Every result row in rating order, each player starting from the initial rating
+FULL_REPLAY = '''
+    SELECT m.id, mp.player_id, mp.won, ?
+    FROM matches m JOIN match_players mp ON mp.match_id = m.id
+    ORDER BY m.match_date, m.id
+'''
+
+
+@dataclass(frozen=True)
+class RatingSettings:
+    """Elo parameters; changing any of them means replaying the history"""
+    # Rating of a player before their first match
+    initial: float = 1500.0
+    # Most a single match can move a rating
+    k_factor: float = 24.0
+    # Rating gap at which the stronger player is expected to win 10 to 1
+    scale: float = 400.0
+
+
+def rate(before, won, settings):
+    """Ratings after one match, from the ratings before it and who won
+
+    Every pair of players is scored as a game won, lost or (when neither or
+    both won) drawn, with the K-factor shared out over a player's opponents,
+    so the ratings of the players in a match always sum to the same total.
+    """
+    after = list(before)
+    n = len(before)
+    k = settings.k_factor / (n - 1) if n > 1 else 0.0
+    for i in range(n):
+        for j in range(i + 1, n):
+            expected = 1.0 / (1.0 + 10.0 ** ((before[j] - before[i]) / settings.scale))
+            score = 0.5 if won[i] == won[j] else float(won[i])
+            change = k * (score - expected)
+            after[i] += change
+            after[j] -= change
+    return after
+
+
+def init_schema(conn):
+    """Create the rating tables, rating the match history when they are new"""
+    exists = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'rating_history'").fetchone()[0]
+    conn.executescript(SCHEMA)
+    if not exists:
+        conn.execute('INSERT OR IGNORE INTO rating_settings VALUES (1, ?, ?, ?)', astuple(RatingSettings()))
+        replay(conn)
+
+
+def load_settings(conn):
+    row = conn.execute('SELECT initial, k_factor, scale FROM rating_settings WHERE id = 1').fetchone()
+    return RatingSettings(*row) if row else RatingSettings()
+
+
+def record_match(conn, match_id, rows):
+    """Rate a newly saved match from its match_players rows (caller controls the transaction)
+
+    Reads and writes only the match's players, so it costs the same however
+    long the history is, as long as the new match is the latest one. One
+    dated before a saved match starts from the ratings its players had at
+    that date, and the matches after it are replayed; an undated one sorts
+    first, so everything is.
+    """
+    settings = load_settings(conn)
+    # Players in match_players key order, as a replay reads them, so both round alike
+    rows = sorted(rows, key=lambda row: row[1])
+    player_ids = [row[1] for row in rows]
+    match_date = conn.execute('SELECT match_date FROM matches WHERE id = ?', (match_id,)).fetchone()[0]
+    if match_date is None:
+        later = conn.execute('SELECT 1 FROM matches WHERE match_date IS NOT NULL LIMIT 1').fetchone()
+    else:
+        later = conn.execute('''
+            SELECT 1 FROM matches WHERE (match_date, id) > (?, ?) LIMIT 1
+        ''', (match_date, match_id)).fetchone()
+
+    if later and match_date is not None:
+        before = [_rating_at(conn, pid, match_date, match_id, settings) for pid in player_ids]
+    else:
+        current = dict(conn.execute(f'''
+            SELECT player_id, rating FROM player_ratings WHERE player_id IN ({", ".join("?" for _ in player_ids)})
+        ''', player_ids).fetchall())
+        before = [current.get(pid, settings.initial) for pid in player_ids]
+    after = rate(before, [row[3] for row in rows], settings)
+    conn.executemany('INSERT OR REPLACE INTO rating_history VALUES (?, ?, ?, ?)',
+                     list(zip([match_id] * len(rows), player_ids, before, after)))
+    conn.executemany('''
+        INSERT INTO player_ratings VALUES (?, ?, 1)
+        ON CONFLICT (player_id) DO UPDATE SET rating = excluded.rating, matches = matches + 1
+    ''', list(zip(player_ids, after)))
+    if later:
+        # Undated matches sort before everything and cannot be seeked to, so start over
+        replay(conn, None if match_date is None else (match_date, match_id), settings)
+
+
+def _rating_at(conn, player_id, match_date, match_id, settings):
+    """A player's rating going into the match at (match_date, match_id)"""
+    row = conn.execute('''
+        SELECT h.after FROM rating_history h JOIN matches m ON m.id = h.match_id
+        WHERE h.player_id = ? AND (m.match_date IS NULL OR (m.match_date, m.id) < (?, ?))
+        ORDER BY m.match_date DESC, m.id DESC LIMIT 1
+    ''', (player_id, match_date, match_id)).fetchone()
+    return settings.initial if row is None else row[0]
+
+
+def reset(conn):
+    """Forget every rating (caller controls the transaction)"""
+    conn.execute('DELETE FROM rating_history')
+    conn.execute('DELETE FROM player_ratings')
+
+
+def _chunks(cursor):
+    """The (match_id, ...) rows of cursor, REPLAY_CHUNK at a time without splitting a match"""
+    carry = []
+    while True:
+        chunk = cursor.fetchmany(REPLAY_CHUNK)
+        rows = carry + chunk if carry else chunk
+        if not chunk:
+            yield rows
+            return
+        # The last match may go on into the next chunk
+        cut = len(rows)
+        while cut and rows[cut - 1][0] == rows[-1][0]:
+            cut -= 1
+        yield rows[:cut]
+        carry = rows[cut:]
+
+
+def _rate_rows(rows, ratings, settings):
+    """Rate (match_id, player_id, won, rating before) rows in match order
+
+    ratings maps player id to rating and is updated as matches are rated;
+    a player not in it starts from the row's rating before. Returns the
+    (match_id, player_id, before, after) history rows and the number of
+    matches rated.
+    """
+    k, scale = settings.k_factor, settings.scale
+    history = []
+    matches = 0
+    for match_id, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        if len(group) == 2:
+            # rate() written out for the usual two players, rounding identically
+            (_, a, won_a, rating_a), (_, b, won_b, rating_b) = group
+            rating_a, rating_b = ratings.get(a, rating_a), ratings.get(b, rating_b)
+            expected = 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / scale))
+            change = k * ((0.5 if won_a == won_b else won_a) - expected)
+            ratings[a] = after_a = rating_a + change
+            ratings[b] = after_b = rating_b - change
+            history.append((match_id, a, rating_a, after_a))
+            history.append((match_id, b, rating_b, after_b))
+        else:
+            ids = [row[1] for row in group]
+            before = [ratings.get(row[1], row[3]) for row in group]
+            after = rate(before, [row[2] for row in group], settings)
+            ratings.update(zip(ids, after))
+            history.extend(zip([match_id] * len(ids), ids, before, after))
+        matches += 1
+    return history, matches
+
+
+def replay(conn, start=None, settings=None):
+    """Rerate the matches in (match_date, id) order (caller controls the transaction)
+
+    With start=None every rating is recomputed from the start. With a
+    (match_date, id) start, only that match and the ones after it are
+    rerated: a player keeps the stored rating they had going into their
+    first replayed match until the replay itself changes it. Matches are
+    streamed in chunks of REPLAY_CHUNK, so memory stays flat however long
+    the history is. Returns the number of matches rated.
+    """
+    settings = settings or load_settings(conn)
+    if start is None:
+        conn.execute('DELETE FROM player_ratings')
+        cursor = conn.execute(FULL_REPLAY, (settings.initial,))
+    else:
+        cursor = conn.execute('''
+            SELECT m.id, mp.player_id, mp.won, COALESCE(h.before, ?)
+            FROM matches m JOIN match_players mp ON mp.match_id = m.id
+            LEFT JOIN rating_history h ON h.match_id = m.id AND h.player_id = mp.player_id
+            WHERE (m.match_date, m.id) >= (?, ?)
+            ORDER BY m.match_date, m.id
+        ''', (settings.initial, *start))
+
+    # Player id -> rating after the matches replayed so far
+    ratings = {}
+    matches = written = 0
+    for rows in _chunks(cursor):
+        history, rated = _rate_rows(rows, ratings, settings)
+        matches += rated
+        if history:
+            # Rows are updated in place, leaving the player index untouched, which
+            # costs much less than clearing the history and writing it afresh
+            conn.executemany('''
+                INSERT INTO rating_history VALUES (?, ?, ?, ?)
+                ON CONFLICT (match_id, player_id) DO UPDATE SET before = excluded.before, after = excluded.after
+            ''', history)
+            written += len(history)
+
+    if start is None:
+        if conn.execute('SELECT COUNT(*) FROM rating_history').fetchone()[0] != written:
+            conn.execute('''
+                DELETE FROM rating_history WHERE NOT EXISTS (
+                    SELECT 1 FROM match_players mp
+                    WHERE mp.match_id = rating_history.match_id AND mp.player_id = rating_history.player_id)
+            ''')
+        counts = dict(conn.execute('SELECT player_id, COUNT(*) FROM match_players GROUP BY player_id'))
+        conn.executemany('INSERT INTO player_ratings VALUES (?, ?, ?)',
+                         [(pid, rating, counts[pid]) for pid, rating in ratings.items()])
+    else:
+        conn.executemany('UPDATE player_ratings SET rating = ? WHERE player_id = ?',
+                         [(rating, pid) for pid, rating in ratings.items()])
+    return matches
+
+
+def rerate_from(conn, match_id):
+    """Rerate a match whose result was edited and everything played after it
+    (caller controls the transaction)"""
+    row = conn.execute('SELECT match_date FROM matches WHERE id = ?', (match_id,)).fetchone()
+    # Undated matches sort before everything and cannot be seeked to, so start over
+    replay(conn, None if row is None or row[0] is None else (row[0], match_id))
+
+
+def _snapshot(conn):
+    return (conn.execute('SELECT * FROM player_ratings ORDER BY player_id').fetchall(),
+            conn.execute('SELECT * FROM rating_history ORDER BY match_id, player_id').fetchall())
+
+
+def verify(conn):
+    """(table, stored rows, replayed rows) for each rating table that differs from a full replay
+
+    The replay is done in memory, so checking never writes or holds up the writer.
+    """
+    settings = load_settings(conn)
+    ratings, history = {}, []
+    for rows in _chunks(conn.execute(FULL_REPLAY, (settings.initial,))):
+        history.extend(_rate_rows(rows, ratings, settings)[0])
+    counts = dict(conn.execute('SELECT player_id, COUNT(*) FROM match_players GROUP BY player_id'))
+    fresh = ([(pid, ratings[pid], counts[pid]) for pid in sorted(ratings)], sorted(history))
+    stored = _snapshot(conn)
+    return [(name, len(before), len(after))
+            for name, before, after in zip(("player_ratings", "rating_history"), stored, fresh)
+            if before != after]
+
+
+def rebuild(conn):
+    """Verify the ratings, then replay the whole history (caller controls the transaction)"""
+    mismatches = verify(conn)
+    replay(conn)
+    return mismatches
+
+
+def recompute(conn, settings=None):
+    """Store new settings (if given) and replay the whole history under them
+
+    Returns (matches rated, seconds taken).
+    """
+    start = time.perf_counter()
+    with conn:
+        if settings is not None:
+            conn.execute('INSERT OR REPLACE INTO rating_settings VALUES (1, ?, ?, ?)', astuple(settings))
+        matches = replay(conn)
+    return matches, time.perf_counter() - start
+
+
+def current(conn, names):
+    """{name: rating} for the named players, the initial rating for anyone unrated"""
+    initial = load_settings(conn).initial
+    found = dict(conn.execute(f'''
+        SELECT p.name, r.rating FROM players p JOIN player_ratings r ON r.player_id = p.id
+        WHERE p.name IN ({", ".join("?" for _ in names)})
+    ''', list(names)).fetchall())
+    return {name: found.get(name, initial) for name in names}
+
+
+def history(conn, name, last=20):
+    """The named player's last `last` rated matches as (match_id, match_date, before, after), newest first"""
+    return conn.execute('''
+        SELECT h.match_id, m.match_date, h.before, h.after
+        FROM rating_history h
+        JOIN players p ON p.id = h.player_id
+        JOIN matches m ON m.id = h.match_id
+        WHERE p.name = ?
+        ORDER BY m.match_date DESC, m.id DESC
+        LIMIT ?
+    ''', (name, last)).fetchall()
+
+
+def main():
+    from . import db, players
+
+    parser = argparse.ArgumentParser(description="Elo ratings from the match history")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="the rating leaderboard")
+    show.add_argument("-k", type=int, default=10, help="how many players to list")
+    show.add_argument("--min-matches", type=int, default=1, help="leave out players with fewer matches")
+    past = commands.add_parser("history", help="a player's recent rating changes")
+    past.add_argument("player")
+    past.add_argument("--last", type=int, default=20, help="how many matches to list")
+    again = commands.add_parser("recompute", help="replay the history, optionally under new settings")
+    defaults = RatingSettings()
+    again.add_argument("--initial", type=float, help=f"starting rating (default: stored, else {defaults.initial:g})")
+    again.add_argument("--k-factor", type=float, help=f"K-factor (default: stored, else {defaults.k_factor:g})")
+    again.add_argument("--scale", type=float, help=f"rating scale (default: stored, else {defaults.scale:g})")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    if args.command == "show":
+        for rank, s in enumerate(players.leaderboard(conn, "rating", args.k, args.min_matches), start=1):
+            print(f"{rank:>3}  {s.name:<20}{s.rating:>8.0f}{s.matches:>8} matches")
+    elif args.command == "history":
+        for match_id, match_date, before, after in history(conn, args.player, args.last):
+            print(f"{db.format_date(match_date):<20}  match {match_id:<8}{before:>7.0f} -> {after:.0f}"
+                  f"  ({after - before:+.1f})")
+    else:
+        stored = load_settings(conn)
+        settings = RatingSettings(*(stored_value if value is None else value for value, stored_value in
+                                    zip((args.initial, args.k_factor, args.scale), astuple(stored))))
+        matches, seconds = recompute(conn, settings)
+        print(f"✓ Rated {matches} matches in {seconds:.2f}s ({settings})")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Match repository
+The single place that reads and writes finished matches, over one SQLite
+connection; scripts, the CLI and the Qt worker thread all go through it
+"""
+
+from . import db
+from .history import PAGE_SIZE, HistoryPager, read_game_scores, read_page
+from .match import MatchRecord
+
+
+class MatchRepository:
+    """Stores finished matches and pages through the history"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @classmethod
+    def open(cls, path=db.DB_PATH):
+        """Open (creating or migrating) the history database at path"""
+        return cls(db.connect(path))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, record):
+        """Save a finished MatchRecord with its hands and return its id"""
+        return db.insert_match(self.conn, record.zayaka_score, record.brian_score,
+                               record.winner, record.match_date, record.hands)
+
+    def add_many(self, records):
+        """Save several matches; returns how many were written"""
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def clear(self):
+        """Delete every match and reset the statistics"""
+        db.clear_matches(self.conn)
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+
+    def get(self, match_id):
+        """Return the MatchRecord for one match, or None"""
+        row = self.conn.execute('''
+            SELECT zayaka_score, brian_score, winner, match_date FROM matches WHERE id = ?
+        ''', (match_id,)).fetchone()
+        if row is None:
+            return None
+        zayaka, brian, winner, match_date = row
+        return MatchRecord(zayaka, brian, winner, db.format_date(match_date), db.read_hands(self.conn, match_id))
+
+    def update(self, match_id, record):
+        """Save an edited match over the stored one; returns False if it no longer exists"""
+        with self.conn:
+            return db.rewrite_match(self.conn, match_id, record.zayaka_score, record.brian_score,
+                                    record.winner, record.hands)
+
+    def page(self, sort_column="match_date", descending=True, after=None, page_size=PAGE_SIZE):
+        """Read one page of (id, match_date, zayaka_score, brian_score, winner) rows"""
+        return read_page(self.conn, sort_column, descending, after, page_size)
+
+    def pager(self, page_size=PAGE_SIZE):
+        """A HistoryPager reading from this repository's connection"""
+        return HistoryPager(self.conn, page_size)
+
+    def game_scores(self, match_id):
+        return read_game_scores(self.conn, match_id)
@@ -0,0 +1,43 @@
+"""
+Hand score parsing and formatting
+Converts between (zayaka, brian) hand tuples and the legacy
+"Zayaka:X, Brian:Y; ..." text stored in matches.game_scores
+"""
+
+PLAYERS = ("Zayaka", "Brian")
+
+
+def format_hand(zayaka_score, brian_score):
+    """Format a single hand the way it is stored in game_scores"""
+    return f"Zayaka:{zayaka_score}, Brian:{brian_score}"
+
+
+def format_game_scores(hands):
+    """Join a list of (zayaka, brian) hands into a game_scores string"""
+    return "; ".join(format_hand(zayaka, brian) for zayaka, brian in hands)
+
+
+def parse_hand(game):
+    """Parse one "Zayaka:X, Brian:Y" entry, returning None if it is malformed"""
+    if "Zayaka:" not in game or "Brian:" not in game:
+        return None
+    try:
+        zayaka_part = game.split("Brian:")[0].replace("Zayaka:", "").strip().rstrip(",")
+        brian_part = game.split("Brian:")[1].strip()
+        zayaka_score = int(zayaka_part) if zayaka_part else 0
+        brian_score = int(brian_part) if brian_part else 0
+    except ValueError:
+        return None
+    return zayaka_score, brian_score
+
+
+def parse_game_scores(game_scores):
+    """Parse a game_scores string into a list of (zayaka, brian) hands"""
+    hands = []
+    if not game_scores:
+        return hands
+    for game in game_scores.split('; '):
+        hand = parse_hand(game)
+        if hand is not None:
+            hands.append(hand)
+    return hands
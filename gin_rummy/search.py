@@ -0,0 +1,101 @@
+"""
+Full-text search over match game scores
+An FTS5 index on matches.game_scores, kept in step with every write, so
+the History tab finds matches by their hands without scanning the table
+
+The index keeps no copy of the text (it reads it back from matches), so
+removing a match from it needs the game_scores it was indexed with.
+"""
+
+import sqlite3
+
+from .scores import PLAYERS
+
+FTS_TABLE = "matches_fts"
+
+# "Zayaka:60, Brian:0; ..." indexes one "zayaka:60"-style token per player
+# per hand, so a search for Brian:12 only matches hands where Brian scored 12
+SCHEMA = f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        game_scores, content='matches', content_rowid='id', tokenize="unicode61 tokenchars ':'"
+    )
+'''
+
+
+def init_schema(conn):
+    """Create the search index, indexing any existing history when it is new"""
+    new = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone()[0] == 0
+    conn.execute(SCHEMA)
+    if new:
+        rebuild_index(conn)
+
+
+def record_match(conn, match_id, game_scores):
+    """Index a saved match's game_scores"""
+    conn.execute(f'INSERT INTO {FTS_TABLE} (rowid, game_scores) VALUES (?, ?)', (match_id, game_scores))
+
+
+def remove_match(conn, match_id, game_scores):
+    """Drop a match from the index; game_scores must be the text it was indexed with"""
+    conn.execute(f'''
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, game_scores) VALUES ('delete', ?, ?)
+    ''', (match_id, game_scores))
+
+
+def index_after(conn, last_id):
+    """Index every match with an id above last_id, e.g. after a bulk append"""
+    conn.execute(f'''
+        INSERT INTO {FTS_TABLE} (rowid, game_scores) SELECT id, game_scores FROM matches WHERE id > ?
+    ''', (last_id,))
+
+
+def reset(conn):
+    """Empty the index (before every match is deleted)"""
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')")
+
+
+def rebuild_index(conn):
+    """Re-index the whole history"""
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def verify(conn):
+    """[(table, None, None)] if the index no longer matches the game scores, else []
+
+    FTS5 can only say that the index and the text differ, not by how many rows.
+    """
+    try:
+        conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError:
+        return [(FTS_TABLE, None, None)]
+    return []
+
+
+def rebuild(conn):
+    """Verify the search index, then re-index the whole history (caller controls the transaction)"""
+    mismatches = verify(conn)
+    rebuild_index(conn)
+    return mismatches
+
+
+def quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def match_expression(text):
+    """FTS5 query for free text typed into the History search box
+
+    Every word must match. "Brian:12" finds a hand where Brian scored 12
+    and a bare number a hand where either player scored it. A bare player
+    name is dropped, as every match has both players' hands.
+    """
+    names = {player.lower() for player in PLAYERS}
+    terms = []
+    for word in text.split():
+        if word.lower() in names:
+            continue
+        if word.isdigit():
+            terms.append("(" + " OR ".join(quote(f"{player}:{word}") for player in PLAYERS) + ")")
+        else:
+            terms.append(quote(word))
+    return " ".join(terms)
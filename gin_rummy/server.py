@@ -0,0 +1,463 @@
+"""
+Score submission service
+An asyncio HTTP and WebSocket server for tournaments with many tables
+entering hands at once. Every table plays by the tracker's match rules,
+finished matches go through the write-behind queue's single writer in
+group commits, and subscribed WebSocket clients are pushed each table's
+totals and completed matches as they happen
+
+Only the standard library is needed. Hands of matches in progress are
+held in memory; a finished match is acknowledged once its batch has
+committed.
+
+HTTP:
+    GET  /tables                  totals at every table with a match in progress
+    GET  /tables/ID               totals at one table
+    POST /tables/ID/hands         {"zayaka": N, "brian": N}, answers with the new totals
+                                  (and the saved match_id when the hand ended the match)
+WebSocket (GET /ws):
+    {"subscribe": ["ID", ...]}    push events for these tables ("*" for all of them)
+    {"table": "ID", "zayaka": N, "brian": N, "id": ANY}
+                                  score a hand; answered with a "scored" or "error" event
+
+Usage: python -m gin_rummy.server [--db PATH] [--host HOST] [--port PORT] [--commit-delay SECONDS]
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+
+from . import db
+from .match import TARGET_SCORE, Match
+from .writer import WriteBehindQueue, WriteSettings
+
+DEFAULT_PORT = 8765
+# Finished matches arriving this close together share one commit
+COMMIT_DELAY = 0.002
+# Largest request body or WebSocket message accepted
+MAX_MESSAGE = 64 * 1024
+# Subscribers that let this much unsent data pile up are dropped
+MAX_BACKLOG = 1024 * 1024
+
+TABLE_ID = re.compile(r"[\w-]{1,64}")
+CONTENT_LENGTH = re.compile(r"[0-9]{1,19}")
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+# --- WebSocket frames (RFC 6455) ---------------------------------------------
+
+def websocket_accept(key):
+    """The Sec-WebSocket-Accept answer to a client's Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def mask_payload(payload, key):
+    """XOR payload with the 4-byte masking key (masking and unmasking are the same)"""
+    n = len(payload)
+    if not n:
+        return payload
+    repeated = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(n, "big")
+
+
+def encode_frame(payload, opcode=TEXT, mask=False):
+    """One final frame; clients must mask what they send, servers must not"""
+    n = len(payload)
+    mask_bit = 0x80 if mask else 0
+    header = bytearray([0x80 | opcode])
+    if n < 126:
+        header.append(mask_bit | n)
+    elif n < 1 << 16:
+        header.append(mask_bit | 126)
+        header += n.to_bytes(2, "big")
+    else:
+        header.append(mask_bit | 127)
+        header += n.to_bytes(8, "big")
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = mask_payload(payload, key)
+    return bytes(header) + payload
+
+
+async def read_frame(reader):
+    """(fin, opcode, payload) of the next frame"""
+    first, second = await reader.readexactly(2)
+    n = second & 0x7F
+    if n == 126:
+        n = int.from_bytes(await reader.readexactly(2), "big")
+    elif n == 127:
+        n = int.from_bytes(await reader.readexactly(8), "big")
+    if n > MAX_MESSAGE:
+        raise ValueError("frame too large")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(n)
+    return bool(first & 0x80), first & 0x0F, mask_payload(payload, key) if key else payload
+
+
+async def read_message(reader, writer, mask=False):
+    """The next text or binary message, answering pings on the way; None once closed"""
+    parts, size = [], 0
+    while True:
+        fin, opcode, payload = await read_frame(reader)
+        if opcode == CLOSE:
+            writer.write(encode_frame(payload[:2], CLOSE, mask))
+            return None
+        if opcode == PING:
+            writer.write(encode_frame(payload, PONG, mask))
+            continue
+        if opcode == PONG:
+            continue
+        parts.append(payload)
+        size += len(payload)
+        if size > MAX_MESSAGE:
+            raise ValueError("message too large")
+        if fin:
+            return b"".join(parts)
+
+
+# --- HTTP ----------------------------------------------------------------------
+
+class RequestError(Exception):
+    """A request answered with an HTTP error status, after which the connection is closed"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: dict
+    body: bytes
+
+    @property
+    def keep_alive(self):
+        return self.headers.get("connection", "").lower() != "close"
+
+
+async def read_request(reader):
+    """The next request on a connection, or None once the client has gone
+
+    Raises RequestError for a request that cannot be read: 400 when it is
+    malformed, 413 when its headers or body are over MAX_MESSAGE.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        # The stream's limit is MAX_MESSAGE, so the headers never ended within it
+        raise RequestError(413, "request headers too large") from None
+    lines = head.decode("latin-1").split("\r\n")
+    request_line = lines[0].split(" ", 2)
+    if len(request_line) != 3:
+        raise RequestError(400, "malformed request line")
+    method, path, _ = request_line
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not CONTENT_LENGTH.fullmatch(length):
+        raise RequestError(400, "Content-Length must be a whole number")
+    length = int(length)
+    if length > MAX_MESSAGE:
+        raise RequestError(413, "request body too large")
+    return Request(method, path, headers, await reader.readexactly(length) if length else b"")
+
+
+def http_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    return (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + body
+
+
+def parse_hand(payload):
+    """(zayaka, brian) points from a submitted hand"""
+    if not isinstance(payload, dict):
+        raise ValueError("a hand is a JSON object")
+    hand = payload.get("zayaka", 0), payload.get("brian", 0)
+    if not all(isinstance(points, int) and not isinstance(points, bool) for points in hand):
+        raise ValueError("scores must be whole numbers")
+    # As on the Score tab, only one player scores in a hand
+    if hand[0] and hand[1]:
+        raise ValueError("only one player can score in a hand")
+    return hand
+
+
+def table_state(table_id, match):
+    return {"table": table_id, "hands": len(match.hands), "zayaka_total": match.zayaka_total,
+            "brian_total": match.brian_total, "winner": match.winner}
+
+
+# --- Server --------------------------------------------------------------------
+
+class Subscriber:
+    """A WebSocket client's connection, fed pushed events"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.tables = set()
+
+    def send(self, frame):
+        """Queue a frame; False (and the connection dropped) if the client has stopped reading"""
+        if self.writer.is_closing():
+            return False
+        if self.writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+            self.writer.transport.abort()
+            return False
+        self.writer.write(frame)
+        return True
+
+
+class ScoreServer:
+    """Tables of matches in progress, scored from HTTP and WebSocket clients
+
+    All table state lives on the event loop, so it needs no locking; the
+    only other thread is the write-behind queue's writer.
+    """
+
+    def __init__(self, path=db.DB_PATH, settings=None, target_score=TARGET_SCORE):
+        self.writer = WriteBehindQueue(path, settings or WriteSettings(max_delay=COMMIT_DELAY))
+        self.target_score = target_score
+        # Table id -> its Match in progress
+        self.tables = {}
+        # Table id (or "*") -> Subscribers
+        self.subscribers = {}
+        self.hands = 0
+        self.matches = 0
+        self._server = None
+        self._connections = set()
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Listen on host:port (port 0 picks a free one)"""
+        self._server = await asyncio.start_server(self._serve, host, port, limit=MAX_MESSAGE)
+        return self
+
+    async def close(self):
+        """Stop listening, drop the clients and commit the matches still queued"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.to_thread(self.writer.close)
+
+    def score(self, table_id, zayaka, brian):
+        """Add a hand at a table; returns (totals, awaitable match id or None)
+
+        Raises ValueError when the match rules reject the hand. A hand that
+        ends the match frees the table for the next one straight away, and
+        the finished match is queued for the writer.
+        """
+        match = self.tables.get(table_id)
+        if match is None:
+            match = Match(target_score=self.target_score)
+        match.add_hand(zayaka, brian)
+        self.tables[table_id] = match
+        self.hands += 1
+        state = table_state(table_id, match)
+        self.publish(table_id, dict(state, event="hand"))
+        if not match.is_over:
+            return state, None
+        del self.tables[table_id]
+        self.matches += 1
+        # Shielded: a client going away must not cancel the write it started
+        return state, asyncio.shield(asyncio.wrap_future(self.writer.add_match(match.record())))
+
+    async def submit(self, table_id, zayaka, brian):
+        """Score a hand and, if it ended the match, wait for the match to be saved"""
+        state, saving = self.score(table_id, zayaka, brian)
+        if saving is not None:
+            state["match_id"] = await saving
+            self.publish(table_id, dict(state, event="match"))
+        return state
+
+    def publish(self, table_id, event):
+        """Push an event to the table's subscribers and everyone watching all tables"""
+        targets = self.subscribers.get(table_id, set()) | self.subscribers.get("*", set())
+        if not targets:
+            return
+        frame = encode_frame(json.dumps(event).encode())
+        for subscriber in targets:
+            if not subscriber.send(frame):
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, subscriber, tables):
+        for table_id in tables:
+            subscriber.tables.add(table_id)
+            self.subscribers.setdefault(table_id, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber):
+        for table_id in subscriber.tables:
+            watching = self.subscribers.get(table_id)
+            if watching is not None:
+                watching.discard(subscriber)
+                if not watching:
+                    del self.subscribers[table_id]
+        subscriber.tables.clear()
+
+    async def _serve(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RequestError as e:
+                    writer.write(http_response(e.status, {"error": str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                if request.headers.get("upgrade", "").lower() == "websocket" and request.path == "/ws":
+                    await self._websocket(request, reader, writer)
+                    break
+                status, payload = await self._route(request)
+                writer.write(http_response(status, payload, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _route(self, request):
+        parts = request.path.split("?", 1)[0].strip("/").split("/")
+        if parts[0] != "tables" or len(parts) > 3 or (len(parts) > 1 and not TABLE_ID.fullmatch(parts[1])):
+            return 404, {"error": f"no such resource {request.path}"}
+        if len(parts) == 1:
+            if request.method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, {"tables": [table_state(table_id, match) for table_id, match in self.tables.items()]}
+        table_id = parts[1]
+        if len(parts) == 2:
+            if request.method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, table_state(table_id, self.tables.get(table_id) or Match(target_score=self.target_score))
+        if parts[2] != "hands":
+            return 404, {"error": f"no such resource {request.path}"}
+        if request.method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            zayaka, brian = parse_hand(json.loads(request.body or b"{}"))
+            return 200, await self.submit(table_id, zayaka, brian)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"could not save the match: {e}"}
+
+    async def _websocket(self, request, reader, writer):
+        key = request.headers.get("sec-websocket-key")
+        if not key:
+            writer.write(http_response(400, {"error": "missing Sec-WebSocket-Key"}, keep_alive=False))
+            return
+        writer.write((f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n").encode())
+        subscriber = Subscriber(writer)
+        pending = set()
+        try:
+            while True:
+                try:
+                    message = await read_message(reader, writer)
+                except ValueError:
+                    writer.write(encode_frame((1009).to_bytes(2, "big"), CLOSE))
+                    break
+                if message is None:
+                    break
+                reply = self._on_message(subscriber, message)
+                if reply is not None:
+                    # Waiting for a commit must not hold up the hands behind it
+                    task = asyncio.create_task(self._reply(subscriber, reply))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _on_message(self, subscriber, message):
+        """Handle one client message; returns an awaitable reply event or None"""
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = None
+        request_id = payload.get("id") if isinstance(payload, dict) else None
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError("messages are JSON objects")
+            if "subscribe" in payload:
+                tables = payload["subscribe"]
+                tables = [tables] if isinstance(tables, str) else list(tables)
+                if not all(isinstance(t, str) and (t == "*" or TABLE_ID.fullmatch(t)) for t in tables):
+                    raise ValueError("table ids are 1-64 letters, digits, _ or -")
+                self.subscribe(subscriber, tables)
+                subscriber.send(encode_frame(json.dumps({"event": "subscribed", "tables": tables}).encode()))
+                return None
+            table_id = payload.get("table")
+            if not isinstance(table_id, str) or not TABLE_ID.fullmatch(table_id):
+                raise ValueError("a hand needs a table id of 1-64 letters, digits, _ or -")
+            state, saving = self.score(table_id, *parse_hand(payload))
+        except ValueError as e:
+            subscriber.send(encode_frame(json.dumps({"event": "error", "error": str(e),
+                                                     "id": request_id}).encode()))
+            return None
+        return self._saved(request_id, state, saving)
+
+    async def _saved(self, request_id, state, saving):
+        state = dict(state, event="scored", id=request_id)
+        if saving is not None:
+            try:
+                state["match_id"] = await saving
+            except Exception as e:
+                return {"event": "error", "error": f"could not save the match: {e}", "id": request_id}
+            self.publish(state["table"], dict(state, event="match", id=None))
+        return state
+
+    async def _reply(self, subscriber, reply):
+        subscriber.send(encode_frame(json.dumps(await reply).encode()))
+
+
+async def serve(path, host, port, commit_delay):
+    server = await ScoreServer(path, WriteSettings(max_delay=commit_delay)).start(host, port)
+    print(f"✓ Scoring on http://{host}:{server.port} (WebSocket at /ws), saving to {path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        print(f"✓ {server.hands} hands, {server.matches} matches saved")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve score submission for many tables")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--commit-delay", type=float, default=COMMIT_DELAY,
+                        help="seconds a finished match may wait for others to share its commit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.commit_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
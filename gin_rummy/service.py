@@ -0,0 +1,101 @@
+"""
+Statistics service
+Answers every statistics question over one connection: the O(1)
+aggregates row, hand score histograms and ratings for the Statistics tab,
+cached or parallel full recomputes, and (with NumPy) score distributions
+"""
+
+from . import aggregates, histograms, players, ratings, search
+from .stats import format_statistics
+from .stats_cache import StatisticsCache
+
+
+def rebuild(conn):
+    """Replace drifted aggregates, hand histograms, player totals and ratings
+    with a full recompute, and re-index the hand search (caller controls the transaction)
+
+    Returns the (field, stored, recomputed) values that were corrected.
+    """
+    return (aggregates.rebuild(conn) + histograms.rebuild(conn)
+            + players.rebuild(conn) + ratings.rebuild(conn) + search.rebuild(conn))
+
+
+class StatisticsService:
+    """Statistics for the history behind one SQLite connection"""
+
+    def __init__(self, conn, cache=None, write=None):
+        self.conn = conn
+        # write (e.g. WriteBehindQueue.submit) takes the writes off conn
+        self.write = write
+        # Pass the same cache for every service over a connection to keep its in-memory result
+        self.cache = cache or StatisticsCache(conn, write)
+
+    def current(self):
+        """Statistics from the running aggregates (a single-row read)"""
+        return self.with_stored_figures(aggregates.load(self.conn).statistics())
+
+    def recompute(self):
+        """Statistics recomputed from the match tables, ignoring the aggregates
+
+        Served from the fingerprint cache while the history is unchanged,
+        and only the new matches are read when it has just been appended to;
+        self.cache.last_source says which.
+        """
+        return self.with_stored_figures(self.cache.statistics())
+
+    def recompute_parallel(self, workers=None):
+        """Statistics recomputed across a process pool of `workers` (default: one per CPU)"""
+        from .parallel import parallel_aggregates
+
+        return self.with_stored_figures(parallel_aggregates(self.conn, workers).statistics())
+
+    def rebuild(self):
+        """Replace drifted aggregates, hand histograms, player totals and ratings
+        with a full recompute, and re-index the hand search
+
+        Returns (mismatches, statistics) where mismatches lists the
+        (field, stored, recomputed) values that were corrected. The derived
+        tables and the search index are rebuilt in one write transaction, so
+        a match committed meanwhile is either counted or waits for it, and
+        the index is never left half rebuilt.
+        """
+        if self.write is None:
+            with self.conn:
+                self.conn.execute('BEGIN IMMEDIATE')
+                mismatches = rebuild(self.conn)
+        else:
+            mismatches = self.write(rebuild).result()
+        return mismatches, self.current()
+
+    def with_stored_figures(self, stats):
+        """Fill in the hand score percentiles and ratings from their stored tables"""
+        found = histograms.load(self.conn)
+        stats.zayaka_hand_percentiles = found["Zayaka"].percentiles()
+        stats.brian_hand_percentiles = found["Brian"].percentiles()
+        stats.zayaka_scoring_percentiles = found["Zayaka"].scoring().percentiles()
+        stats.brian_scoring_percentiles = found["Brian"].scoring().percentiles()
+        current = ratings.current(self.conn, ("Zayaka", "Brian"))
+        stats.zayaka_rating, stats.brian_rating = current["Zayaka"], current["Brian"]
+        return stats
+
+    def hand_histograms(self):
+        """{player: ScoreHistogram} of hand scores, read from the stored counts"""
+        return histograms.load(self.conn)
+
+    def leaderboard(self, metric="win_rate", k=10, min_matches=1):
+        """The top k players by metric, read off the metric's index"""
+        return players.leaderboard(self.conn, metric, k, min_matches)
+
+    def head_to_head(self, player, opponent):
+        """player's record against opponent"""
+        return players.head_to_head(self.conn, player, opponent)
+
+    def distributions(self):
+        """Per-series score distributions; needs NumPy"""
+        from .columnar import load_columns
+
+        return load_columns(self.conn).distributions()
+
+    def report(self):
+        """The Statistics tab report text"""
+        return format_statistics(self.current())
@@ -0,0 +1,125 @@
+"""
+Statistics shown on the Statistics tab
+Holds the computed numbers and renders them as the tab's report text
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class Statistics:
+    """Every figure displayed on the Statistics tab"""
+    total_matches: int = 0
+    zayaka_wins: int = 0
+    brian_wins: int = 0
+    avg_zayaka_match: float = 0
+    avg_brian_match: float = 0
+    total_hands: int = 0
+    avg_zayaka_hand: float = 0
+    avg_brian_hand: float = 0
+    max_zayaka_hand: int = 0
+    max_brian_hand: int = 0
+    min_zayaka_hand: int = 0
+    min_brian_hand: int = 0
+    zayaka_non_zero: int = 0
+    brian_non_zero: int = 0
+    zayaka_streak: int = 0
+    brian_streak: int = 0
+    current_streak_winner: str = ""
+    current_streak: int = 0
+    avg_games_per_match: float = 0
+    stddev_games_per_match: float = 0
+    max_games_per_match: int = 0
+    min_games_per_match: int = 0
+    # Nearest-rank (p50, p90, p99) hand scores over all hands and over scoring hands
+    zayaka_hand_percentiles: tuple = (0, 0, 0)
+    brian_hand_percentiles: tuple = (0, 0, 0)
+    zayaka_scoring_percentiles: tuple = (0, 0, 0)
+    brian_scoring_percentiles: tuple = (0, 0, 0)
+    # Elo ratings after the latest match
+    zayaka_rating: float = 0
+    brian_rating: float = 0
+
+    @property
+    def zayaka_win_pct(self):
+        return (self.zayaka_wins / self.total_matches * 100) if self.total_matches else 0
+
+    @property
+    def brian_win_pct(self):
+        return (self.brian_wins / self.total_matches * 100) if self.total_matches else 0
+
+    @property
+    def zayaka_efficiency(self):
+        return (self.zayaka_non_zero / self.total_hands * 100) if self.total_hands else 0
+
+    @property
+    def brian_efficiency(self):
+        return (self.brian_non_zero / self.total_hands * 100) if self.total_hands else 0
+
+
+def format_statistics(stats):
+    """Render statistics as the monospaced report used by the Statistics tab"""
+    s = stats
+    if s.current_streak:
+        current_streak = f"{s.current_streak_winner} ({s.current_streak} in a row)"
+    else:
+        current_streak = "none"
+    return f"""
+GinRummy Statistics
+==================
+
+MATCH STATISTICS
+----------------
+Total Matches: {s.total_matches}
+Average Games per Match: {s.avg_games_per_match:.1f} (std dev {s.stddev_games_per_match:.1f})
+Longest Match: {s.max_games_per_match} games
+Shortest Match: {s.min_games_per_match} games
+
+WIN STATISTICS
+--------------
+Zayaka Wins: {s.zayaka_wins} ({s.zayaka_win_pct:.1f}%)
+Brian Wins: {s.brian_wins} ({s.brian_win_pct:.1f}%)
+
+Win Streaks:
+- Zayaka: {s.zayaka_streak} consecutive wins
+- Brian: {s.brian_streak} consecutive wins
+- Current: {current_streak}
+
+Elo Ratings:
+- Zayaka: {s.zayaka_rating:.0f}
+- Brian: {s.brian_rating:.0f}
+
+MATCH AVERAGES
+--------------
+Zayaka Average per Match: {s.avg_zayaka_match:.1f} points
+Brian Average per Match: {s.avg_brian_match:.1f} points
+
+HAND STATISTICS
+---------------
+Total Hands Played: {s.total_hands}
+
+Average Score per Hand:
+- Zayaka: {s.avg_zayaka_hand:.1f} points
+- Brian: {s.avg_brian_hand:.1f} points
+
+Hand Score Ranges:
+- Zayaka: {s.min_zayaka_hand} - {s.max_zayaka_hand} points
+- Brian: {s.min_brian_hand} - {s.max_brian_hand} points
+
+Hand Score Percentiles (p50 / p90 / p99):
+- Zayaka: {" / ".join(map(str, s.zayaka_hand_percentiles))} points (scoring hands: {" / ".join(map(str, s.zayaka_scoring_percentiles))})
+- Brian: {" / ".join(map(str, s.brian_hand_percentiles))} points (scoring hands: {" / ".join(map(str, s.brian_scoring_percentiles))})
+
+Scoring Efficiency (Non-Zero Hands):
+- Zayaka: {s.zayaka_efficiency:.1f}% ({s.zayaka_non_zero}/{s.total_hands} hands)
+- Brian: {s.brian_efficiency:.1f}% ({s.brian_non_zero}/{s.total_hands} hands)
+
+PERFORMANCE METRICS
+------------------
+Most Consistent Player: {"Zayaka" if abs(s.avg_zayaka_hand - s.avg_brian_hand) < 2 else "Brian"}
+Highest Single Hand: {"Zayaka" if s.max_zayaka_hand > s.max_brian_hand else "Brian"} ({max(s.max_zayaka_hand, s.max_brian_hand)} points)
+Most Efficient Scorer: {"Zayaka" if s.zayaka_efficiency > s.brian_efficiency else "Brian"} ({max(s.zayaka_efficiency, s.brian_efficiency):.1f}%)
+
+Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        """
@@ -0,0 +1,156 @@
+"""
+Fingerprint-keyed statistics cache
+Full recomputes are kept in a sidecar table with the fingerprint of the
+history they describe; an unchanged history is answered from the cache and
+newly appended matches are folded in without rescanning the rest
+"""
+
+from dataclasses import dataclass
+
+from .aggregates import FIELDS, StatsAccumulator
+from .queries import query_aggregates
+
+# Bump when the cached row layout changes; stale rows are simply recomputed
+CACHE_VERSION = 1
+
+SCHEMA = f'''
+    -- Bumped by every write that changes or removes existing matches, so
+    -- together with MAX(id) it tells "nothing new" and "only appended" apart
+    CREATE TABLE IF NOT EXISTS history_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        changes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO history_revision VALUES (1, 0);
+    CREATE TABLE IF NOT EXISTS stats_cache (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        changes INTEGER NOT NULL,
+        max_id INTEGER NOT NULL,
+        last_date INTEGER,
+        {", ".join(FIELDS)}
+    );
+'''
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Cheap summary of the history: two indexed single-row reads"""
+    changes: int
+    max_id: int
+
+
+def init_schema(conn):
+    conn.executescript(SCHEMA)
+
+
+def invalidate(conn):
+    """Record that existing matches changed (caller controls the transaction)"""
+    conn.execute('UPDATE history_revision SET changes = changes + 1')
+
+
+def save(conn, current, last_date, acc):
+    """Store acc as the statistics of the history with Fingerprint current (caller controls the transaction)"""
+    placeholders = ", ".join("?" for _ in FIELDS)
+    conn.execute(f'''
+        INSERT OR REPLACE INTO stats_cache (id, version, changes, max_id, last_date, {", ".join(FIELDS)})
+        VALUES (1, {CACHE_VERSION}, ?, ?, ?, {placeholders})
+    ''', [current.changes, current.max_id, last_date] + [getattr(acc, name) for name in FIELDS])
+
+
+def fingerprint(conn):
+    changes = conn.execute('SELECT changes FROM history_revision').fetchone()[0]
+    max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM matches').fetchone()[0]
+    return Fingerprint(changes, max_id)
+
+
+class StatisticsCache:
+    """Serves full-recompute statistics for one connection
+
+    aggregates() answers in one of four ways, reported in `last_source`:
+    "memory" when PRAGMA data_version shows no commit since the last call,
+    "cached" when the stored fingerprint still matches, "delta" when
+    matches were only appended after the newest cached one, and "full"
+    otherwise. Every answer other than "memory" is written back to the
+    sidecar table so it survives restarts.
+
+    By default that write is committed on conn itself. A reader that must
+    not write passes write, e.g. WriteBehindQueue.submit, which is given
+    fn(conn) to run on the writing connection; the answer does not wait for it.
+    """
+
+    def __init__(self, conn, write=None):
+        self.conn = conn
+        self.write = write
+        self.last_source = None
+        self._memo = None
+
+    def aggregates(self):
+        """The StatsAccumulator a full recompute would produce"""
+        # data_version moves on other connections' commits, total_changes on ours
+        version = (self.conn.execute('PRAGMA data_version').fetchone()[0], self.conn.total_changes)
+        if self._memo is not None and self._memo[0] == version:
+            self.last_source = "memory"
+            return self._memo[1]
+
+        current = fingerprint(self.conn)
+        cached = self._load()
+        if cached is not None and cached[0] == current:
+            acc, self.last_source = cached[2], "cached"
+        elif cached is not None and cached[0].changes == current.changes and self._appended_after(cached):
+            acc, self.last_source = self._fold_delta(cached), "delta"
+        else:
+            acc, self.last_source = query_aggregates(self.conn), "full"
+        if self.last_source != "cached":
+            self._save(current, acc)
+        self._memo = ((self.conn.execute('PRAGMA data_version').fetchone()[0], self.conn.total_changes), acc)
+        return acc
+
+    def statistics(self):
+        return self.aggregates().statistics()
+
+    def _load(self):
+        row = self.conn.execute(f'''
+            SELECT version, changes, max_id, last_date, {", ".join(FIELDS)} FROM stats_cache WHERE id = 1
+        ''').fetchone()
+        if row is None or row[0] != CACHE_VERSION:
+            return None
+        return Fingerprint(row[1], row[2]), row[3], StatsAccumulator(**dict(zip(FIELDS, row[4:])))
+
+    def _save(self, current, acc):
+        last_date = self.conn.execute('SELECT MAX(match_date) FROM matches').fetchone()[0]
+        if self.write is None:
+            with self.conn:
+                save(self.conn, current, last_date, acc)
+        else:
+            # The fingerprint is stored with the statistics it describes, so
+            # commits landing first only make the row older, never wrong
+            self.write(lambda conn: save(conn, current, last_date, acc))
+
+    def _appended_after(self, cached):
+        """True if every new match sorts after everything already cached"""
+        cached_print, last_date, _ = cached
+        if last_date is None:
+            return True
+        # The unary + keeps SQLite on the rowid range instead of the date index
+        earlier = self.conn.execute('''
+            SELECT COUNT(*) FROM matches WHERE id > ? AND +match_date < ?
+        ''', (cached_print.max_id, last_date)).fetchone()[0]
+        return earlier == 0
+
+    def _fold_delta(self, cached):
+        """Add the matches after the cached max id, in history order"""
+        cached_print, _, acc = cached
+        hands = {}
+        for match_id, zayaka, brian in self.conn.execute('''
+            SELECT match_id,
+                   SUM(points) FILTER (WHERE player = 'Zayaka'),
+                   SUM(points) FILTER (WHERE player = 'Brian')
+            FROM hands WHERE match_id > ? GROUP BY match_id, hand_no ORDER BY match_id, hand_no
+        ''', (cached_print.max_id,)):
+            hands.setdefault(match_id, []).append((zayaka, brian))
+        for match_id, zayaka_score, brian_score, winner in self.conn.execute('''
+            SELECT id, zayaka_score, brian_score, winner FROM matches
+            WHERE id > ? AND zayaka_score IS NOT NULL ORDER BY +match_date, id
+        ''', (cached_print.max_id,)):
+            acc.add_match(zayaka_score, brian_score, winner, hands.get(match_id, []))
+        return acc
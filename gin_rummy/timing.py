@@ -0,0 +1,163 @@
+"""
+Startup phase timing and hot-path tracing
+Records when each named phase of application startup finished, relative
+to a common start, and renders the timeline for the console. Tracer keeps
+opt-in timed spans of the GUI's hot paths and exports them as a Chrome trace
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Spans kept by a Tracer; the oldest are dropped first
+TRACE_CAPACITY = 100_000
+
+
+class PhaseTimer:
+    """Wall-clock timeline of named phases, each recorded once"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        # (phase, seconds since start) in the order the phases finished
+        self.phases = []
+
+    def mark(self, phase):
+        """Record that phase has just finished; later marks of the same phase are ignored"""
+        if any(name == phase for name, _ in self.phases):
+            return
+        self.phases.append((phase, time.perf_counter() - self.start))
+
+    def elapsed(self, phase):
+        """Seconds from the start to phase, or None if it hasn't happened yet"""
+        for name, seconds in self.phases:
+            if name == phase:
+                return seconds
+        return None
+
+    def report(self):
+        """One line per phase: its own duration and the running total"""
+        lines = []
+        previous = 0
+        for name, seconds in self.phases:
+            lines.append(f"{name:<28} +{(seconds - previous) * 1000:>8.1f} ms  {seconds * 1000:>9.1f} ms")
+            previous = seconds
+        return "\n".join(lines)
+
+
+class Span:
+    """One timed call, recorded when its with-block exits; set() attaches details such as rows"""
+
+    __slots__ = ("tracer", "name", "args", "start", "duration", "thread")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = self.duration = None
+        self.thread = None
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        self.thread = threading.get_ident()
+        self.tracer.record(self)
+        return False
+
+
+class NullSpan:
+    """Stands in for a Span while tracing is off, so call sites need no checks"""
+
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """Opt-in spans around hot paths, kept in a bounded buffer
+
+    Spans may finish on any thread. With tracing off span() returns the
+    shared NULL_SPAN, so an instrumented call costs one attribute check and
+    two no-op calls.
+    """
+
+    def __init__(self, enabled=False, start=None, capacity=TRACE_CAPACITY):
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        # Spans finish on the GUI and database threads while the GUI thread
+        # reads them, and iterating a deque that is being appended to raises
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=capacity)
+        # The newest span of each name, so the status bar never scans the buffer
+        self.last = {}
+        self.thread_names = {}
+
+    def span(self, name, **args):
+        """Context manager timing the block as name; args (e.g. rows=) go into the trace"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def record(self, span):
+        with self.lock:
+            self.spans.append(span)
+            self.last[span.name] = span
+            if span.thread not in self.thread_names:
+                self.thread_names[span.thread] = threading.current_thread().name
+
+    def latest(self, names):
+        """{name: the most recent finished span} for those of names that have run"""
+        with self.lock:
+            return {name: self.last[name] for name in names if name in self.last}
+
+    def status_line(self, names):
+        """Last duration (and rows, where recorded) of each named span, in the order given"""
+        latest = self.latest(names)
+        parts = []
+        for name in names:
+            span = latest.get(name)
+            if span is None:
+                continue
+            rows = span.args.get("rows")
+            parts.append(f"{name} {span.duration * 1000:.1f} ms" + ("" if rows is None else f" ({rows} rows)"))
+        return " · ".join(parts)
+
+    def chrome_events(self, marks=()):
+        """Chrome Trace Event dicts: a complete ("X") event per span, and an
+        instant ("i") event per (name, seconds since start) mark"""
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            thread_names = list(self.thread_names.items())
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in thread_names]
+        for span in spans:
+            events.append({"name": span.name, "ph": "X", "pid": pid, "tid": span.thread,
+                           "ts": (span.start - self.start) * 1e6, "dur": span.duration * 1e6,
+                           "args": span.args})
+        tid = threading.main_thread().ident
+        for name, seconds in marks:
+            events.append({"name": name, "ph": "i", "s": "p", "pid": pid, "tid": tid, "ts": seconds * 1e6})
+        return events
+
+    def export_chrome(self, path, marks=()):
+        """Write the spans as Chrome Trace Event JSON (chrome://tracing, Perfetto)"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(marks), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,216 @@
+"""
+Bulk import and export of match history
+Streams CSV or JSONL in constant memory; imports are written with
+executemany in large transactions with secondary indexes rebuilt afterwards
+
+Usage:
+    python -m gin_rummy.transfer export PATH [--db DB] [--format csv|jsonl]
+    python -m gin_rummy.transfer import PATH [--db DB] [--format csv|jsonl] [--replace]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+
+from . import aggregates, db, histograms, players, ratings, search
+from .scores import format_game_scores, parse_game_scores
+
+FIELDNAMES = ["match_date", "zayaka_score", "brian_score", "winner", "game_scores"]
+
+IMPORT_BATCH_SIZE = 20000
+EXPORT_FETCH_SIZE = 5000
+
+
+@dataclass
+class TransferStats:
+    """Row counts and timing for one import or export"""
+    matches: int = 0
+    hands: int = 0
+    seconds: float = 0
+
+    @property
+    def matches_per_second(self):
+        return self.matches / self.seconds if self.seconds else 0
+
+    def summary(self, verb):
+        return (f"{verb} {self.matches} matches ({self.hands} hands) in {self.seconds:.2f}s "
+                f"- {self.matches_per_second:,.0f} matches/s")
+
+
+def detect_format(path, fmt=None):
+    """Pick csv or jsonl from an explicit format or the file extension"""
+    if fmt:
+        return fmt
+    return "jsonl" if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def iter_matches(conn, fetch_size=EXPORT_FETCH_SIZE):
+    """Yield match rows in id order straight from the cursor, never fetching everything
+
+    match_date is converted back to the "YYYY-MM-DD HH:MM:SS" text used in files.
+    Only the tracker's own matches are exported; a match between other
+    players has no scores or hands in the file format.
+    """
+    cursor = conn.execute('''
+        SELECT match_date, zayaka_score, brian_score, winner, game_scores
+        FROM matches WHERE zayaka_score IS NOT NULL ORDER BY id
+    ''')
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        for match_date, *rest in rows:
+            yield (db.format_date(match_date), *rest)
+
+
+def export_matches(conn, path, fmt=None):
+    """Stream every match to a CSV or JSONL file"""
+    fmt = detect_format(path, fmt)
+    stats = TransferStats()
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDNAMES)
+            for row in iter_matches(conn):
+                writer.writerow(row)
+                stats.matches += 1
+                stats.hands += row[4].count("; ") + 1 if row[4] else 0
+        else:
+            for match_date, zayaka, brian, winner, game_scores in iter_matches(conn):
+                hands = parse_game_scores(game_scores)
+                f.write(json.dumps({
+                    "match_date": match_date,
+                    "zayaka_score": zayaka,
+                    "brian_score": brian,
+                    "winner": winner,
+                    "hands": hands,
+                }) + "\n")
+                stats.matches += 1
+                stats.hands += len(hands)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def read_records(path, fmt=None):
+    """Yield (match_date, zayaka, brian, winner, hands) from a CSV or JSONL file"""
+    fmt = detect_format(path, fmt)
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for record in csv.DictReader(f):
+                yield (record["match_date"], int(record["zayaka_score"]), int(record["brian_score"]),
+                       record["winner"], parse_game_scores(record["game_scores"]))
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "hands" in record:
+                    hands = [tuple(hand) for hand in record["hands"]]
+                else:
+                    hands = parse_game_scores(record.get("game_scores"))
+                yield (record["match_date"], int(record["zayaka_score"]), int(record["brian_score"]),
+                       record["winner"], hands)
+
+
+def secondary_indexes(conn):
+    """Return (name, sql) for the explicit indexes on the match tables"""
+    return conn.execute('''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ('matches', 'hands')
+    ''').fetchall()
+
+
+def import_matches(conn, path, fmt=None, replace=False, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Bulk load matches from a CSV or JSONL file
+
+    Rows are appended after the existing history (or replace it with
+    replace=True). Secondary indexes are dropped for the load and rebuilt
+    once at the end, and the statistics aggregates, hand histograms, player
+    totals and ratings are recomputed because imported matches may predate
+    existing ones. Only the new matches are added to the search index.
+
+    Each batch commits on its own, so a bad row stops the import with the
+    earlier batches kept; the indexes and derived tables are brought up to
+    date with whatever was committed before the error is raised.
+    """
+    stats = TransferStats()
+    start = time.perf_counter()
+    indexes = secondary_indexes(conn)
+    with conn:
+        if replace:
+            db.clear_matches(conn)
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX {name}')
+    next_id = last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM matches').fetchone()[0]
+
+    match_batch = []
+    hand_batch = []
+
+    def flush():
+        with conn:
+            conn.executemany('''
+                INSERT INTO matches (id, zayaka_score, brian_score, winner, match_date, game_scores)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', match_batch)
+            conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?)', hand_batch)
+        match_batch.clear()
+        hand_batch.clear()
+        if progress is not None:
+            progress(stats)
+
+    try:
+        for match_date, zayaka, brian, winner, hands in read_records(path, fmt):
+            next_id += 1
+            match_batch.append((next_id, zayaka, brian, winner, db.to_epoch(match_date),
+                                format_game_scores(hands)))
+            hand_batch.extend(db.hand_rows(next_id, hands))
+            stats.matches += 1
+            stats.hands += len(hands)
+            if len(match_batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        with conn:
+            for _, sql in indexes:
+                conn.execute(sql)
+        with conn:
+            aggregates.save(conn, aggregates.recompute(conn))
+            histograms.save(conn, histograms.recompute(conn))
+            players.rebuild_tables(conn)
+            ratings.replay(conn)
+            search.index_after(conn, last_id)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export GinRummy match history")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from extension)")
+    parser.add_argument("--replace", action="store_true", help="replace the existing history on import")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="matches per transaction")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    if args.command == "export":
+        stats = export_matches(conn, args.path, args.format)
+        print(f"✓ {stats.summary('Exported')}")
+    else:
+        def progress(running):
+            elapsed = time.perf_counter() - started
+            print(f"  {running.matches} matches ({running.matches / elapsed:,.0f}/s)", flush=True)
+
+        started = time.perf_counter()
+        stats = import_matches(conn, args.path, args.format, args.replace, args.batch_size, progress)
+        print(f"✓ {stats.summary('Imported')}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
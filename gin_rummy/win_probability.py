@@ -0,0 +1,167 @@
+"""
+Win probability
+Estimates each player's chance of winning from any pair of running totals
+by dynamic programming over the hand scores of past matches, and keeps the
+result as a compact lookup table so the Score tab can show it after every
+hand in O(1)
+
+Usage: python -m gin_rummy.win_probability [--db PATH] [--target N] [ZAYAKA BRIAN]
+"""
+
+import argparse
+from array import array
+
+from . import histograms
+from .match import TARGET_SCORE
+
+# Probabilities are stored as 16-bit fractions of SCALE
+SCALE = 65535
+# Rebuild once the number of scoring hands has moved by this share since the last build
+REBUILD_FRACTION = 0.01
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS win_probability (
+        target INTEGER PRIMARY KEY,
+        -- Scoring hands in the history the table was built from
+        hands INTEGER NOT NULL,
+        -- P(Zayaka wins) * SCALE as uint16, indexed zayaka_total * target + brian_total
+        probabilities BLOB NOT NULL
+    )
+'''
+
+
+class WinProbabilityTable:
+    """P(Zayaka wins) for every pair of totals below the target"""
+
+    def __init__(self, target, hands, probabilities):
+        self.target = target
+        self.hands = hands
+        self.probabilities = probabilities
+
+    @classmethod
+    def build(cls, found, target=TARGET_SCORE):
+        """Solve the match from {player: ScoreHistogram}; None without any scoring hands
+
+        Each hand is one player scoring some points, drawn from the scoring
+        hands of the history; zero-point hands leave the totals alone and
+        are ignored. A state's chance is the probability-weighted chance of
+        the states one hand can lead to, so filling the table from the
+        highest totals down needs every state only once.
+        """
+        zayaka, brian = found["Zayaka"].scoring(), found["Brian"].scoring()
+        hands = zayaka.count + brian.count
+        if not hands:
+            return None
+        zayaka_steps = [(points, n / hands) for points, n in sorted(zayaka.counts.items()) if n]
+        brian_steps = [(points, n / hands) for points, n in sorted(brian.counts.items()) if n]
+
+        rows = [[0.0] * target for _ in range(target)]
+        for z in reversed(range(target)):
+            row = rows[z]
+            # Zayaka hands that reach the target win outright; the rest move down a row
+            finish = sum(p for points, p in zayaka_steps if z + points >= target)
+            moves = [(rows[z + points], p) for points, p in zayaka_steps if z + points < target]
+            for b in reversed(range(target)):
+                chance = finish
+                for next_row, p in moves:
+                    chance += p * next_row[b]
+                for points, p in brian_steps:
+                    if b + points >= target:
+                        break
+                    chance += p * row[b + points]
+                row[b] = chance
+        return cls(target, hands, array('H', (round(p * SCALE) for row in rows for p in row)))
+
+    def zayaka_chance(self, zayaka_total, brian_total):
+        """Probability that Zayaka wins from these totals"""
+        if zayaka_total >= self.target:
+            return 1.0
+        if brian_total >= self.target:
+            return 0.0
+        return self.probabilities[zayaka_total * self.target + brian_total] / SCALE
+
+    def chances(self, match):
+        """(Zayaka, Brian) chances of winning the match in progress"""
+        zayaka = self.zayaka_chance(match.zayaka_total, match.brian_total)
+        return zayaka, 1.0 - zayaka
+
+
+def init_schema(conn):
+    conn.execute(SCHEMA)
+
+
+def load(conn, target=TARGET_SCORE):
+    """The stored table for target, or None"""
+    row = conn.execute('SELECT hands, probabilities FROM win_probability WHERE target = ?',
+                       (target,)).fetchone()
+    if row is None:
+        return None
+    return WinProbabilityTable(target, row[0], array('H', row[1]))
+
+
+def save(conn, table, target=TARGET_SCORE):
+    """Store table for target, or forget the stored one when table is None (caller controls the transaction)"""
+    if table is None:
+        conn.execute('DELETE FROM win_probability WHERE target = ?', (target,))
+    else:
+        conn.execute('INSERT OR REPLACE INTO win_probability VALUES (?, ?, ?)',
+                     (table.target, table.hands, table.probabilities.tobytes()))
+
+
+def scoring_hands(found):
+    return found["Zayaka"].scoring().count + found["Brian"].scoring().count
+
+
+def refresh(conn, target=TARGET_SCORE, write=None):
+    """The table for target, rebuilt from the hand histograms first if the history has moved on
+
+    A table stays in use until the scoring hands grow or shrink by
+    REBUILD_FRACTION, so a long history is not re-solved after every match
+    while a short one, where each match shifts the odds, always is.
+
+    A rebuilt table is committed on conn unless write is given, e.g.
+    WriteBehindQueue.submit, which runs fn(conn) on the writing connection.
+    """
+    found = histograms.load(conn)
+    hands = scoring_hands(found)
+    table = load(conn, target)
+    if table is not None and abs(hands - table.hands) <= REBUILD_FRACTION * table.hands:
+        return table
+    table = WinProbabilityTable.build(found, target)
+    if write is None:
+        with conn:
+            save(conn, table, target)
+    else:
+        write(lambda conn: save(conn, table, target))
+    return table
+
+
+def main():
+    from . import db
+
+    parser = argparse.ArgumentParser(description="Print win probabilities from the match history")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database path")
+    parser.add_argument("--target", type=int, default=TARGET_SCORE, help="points needed to win")
+    parser.add_argument("totals", nargs="*", type=int, metavar="TOTAL",
+                        help="Zayaka and Brian totals to look up (default: a grid)")
+    args = parser.parse_args()
+
+    conn = db.connect(args.db)
+    table = refresh(conn, args.target)
+    conn.close()
+    if table is None:
+        print("✗ No scoring hands in the history yet")
+        return
+    if len(args.totals) == 2:
+        zayaka, brian = args.totals
+        chance = table.zayaka_chance(zayaka, brian)
+        print(f"Zayaka {zayaka} - Brian {brian}: Zayaka {chance:.1%}, Brian {1 - chance:.1%}")
+        return
+    step = max(args.target // 10, 1)
+    print("Zayaka \\ Brian" + "".join(f"{b:>6}" for b in range(0, args.target, step)))
+    for z in range(0, args.target, step):
+        print(f"{z:>14}" + "".join(f"{table.zayaka_chance(z, b):>6.0%}" for b in range(0, args.target, step)))
+
+
+if __name__ == "__main__":
+    main()
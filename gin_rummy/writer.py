@@ -0,0 +1,171 @@
+"""
+Write-behind queue with group commit
+A dedicated writer thread owns the only writing connection; everything
+queued while it is busy is committed together in one transaction, so a
+burst of results pays for one fsync instead of one each
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from . import db
+
+
+@dataclass
+class WriteSettings:
+    """Durability and latency trade-offs for the writer thread"""
+    # How long the first write of a batch may wait for others to join it; at
+    # 0 a batch is whatever queued up while the previous commit was syncing
+    max_delay: float = 0.0
+    # Most writes committed in one transaction
+    max_batch: int = 500
+    # PRAGMA synchronous for the writing connection: "FULL" syncs the WAL on
+    # every commit, "NORMAL" only at checkpoints (the last commits can be
+    # lost on power failure, never on an application crash)
+    synchronous: str = "NORMAL"
+
+
+class WriteBehindQueue:
+    """Runs queued writes on a writer thread and group-commits them
+
+    submit() returns a Future that resolves only once the write's batch has
+    committed. Writes run in submission order, each inside a savepoint so a
+    failing write is rolled back alone. close() (also registered with
+    atexit) commits everything still queued before the thread stops.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path=db.DB_PATH, settings=None):
+        self.path = path
+        self.settings = settings or WriteSettings()
+        self.ready = threading.Event()
+        self.batches = 0
+        self.committed = 0
+        self._queue = queue.Queue()
+        # Guards _closed so nothing can be queued behind the stop marker
+        self._lock = threading.Lock()
+        self._closed = False
+        self._open_error = None
+        self._thread = threading.Thread(target=self._run, name="gin-rummy-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, fn):
+        """Queue fn(conn) to run inside the next group commit; returns a Future of its result"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("the write queue is closed")
+            self._queue.put((fn, future))
+        return future
+
+    def add_match(self, record):
+        """Queue a finished MatchRecord; the Future resolves to its match id"""
+        return self.submit(lambda conn: db.write_match(
+            conn, record.zayaka_score, record.brian_score, record.winner, record.match_date, record.hands))
+
+    def add_players_match(self, match_date, participants):
+        """Queue a match between any players, given as Participants; the Future resolves to its match id"""
+        return self.submit(lambda conn: db.write_players_match(conn, match_date, participants))
+
+    def restore_match(self, record):
+        """Queue a journaled MatchRecord unless an earlier run already committed it"""
+        def restore(conn):
+            return (db.find_match(conn, record.zayaka_score, record.brian_score, record.winner, record.match_date)
+                    or db.write_match(conn, record.zayaka_score, record.brian_score, record.winner,
+                                      record.match_date, record.hands))
+        return self.submit(restore)
+
+    def update_match(self, match_id, record):
+        """Queue saving an edited MatchRecord over match_id; resolves to False if it is gone"""
+        return self.submit(lambda conn: db.rewrite_match(
+            conn, match_id, record.zayaka_score, record.brian_score, record.winner, record.hands))
+
+    def clear(self):
+        """Queue deleting every match"""
+        return self.submit(db.delete_all_matches)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been committed"""
+        self.submit(lambda conn: None).result(timeout)
+
+    def close(self):
+        """Commit all queued writes and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        atexit.unregister(self.close)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            # Opening also creates or upgrades the schema, before any reader needs it
+            conn = db.connect(self.path)
+            conn.execute(f'PRAGMA synchronous = {self.settings.synchronous}')
+            # Transactions are managed explicitly so a batch spans many writes
+            conn.isolation_level = None
+        except Exception as e:
+            conn = None
+            self._open_error = e
+        self.ready.set()
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.settings.max_delay
+            while len(batch) < self.settings.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        if conn is not None:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        if conn is None:
+            for _, future in batch:
+                future.set_exception(self._open_error)
+            return
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    results.append((future, fn(conn), None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    results.append((future, None, e))
+                conn.execute('RELEASE write')
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.committed += len(batch)
+        # Only now are the writes durable, so only now are callers told
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -5,39 +5,69 @@ PyQt5 version with database integration
 """
 
 import sys
-import sqlite3
-from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                              QTextEdit, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QMessageBox, QTabWidget, QFrame)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIntValidator, QFont
+                             QTableView, QHeaderView, QMessageBox, QTabWidget, QFrame)
+from PyQt5.QtCore import Qt, QTimer, QEvent
+from PyQt5.QtGui import QIntValidator, QFont, QBrush
+
+from gin_rummy import MatchRepository, StatisticsService, db, format_statistics, parse_entry, win_probability
+from gin_rummy.events import MatchLog
+from gin_rummy.journal import MatchJournal, journal_path
+from gin_rummy.qt.history_filter import HistoryFilterBar
+from gin_rummy.qt.history_model import HistoryTableModel
+from gin_rummy.qt.match_editor import MatchEditorDialog, corrected_hand
+from gin_rummy.qt.workers import DatabaseThread, MainThreadDispatcher
+from gin_rummy.timing import PhaseTimer, Tracer
+from gin_rummy.writer import WriteBehindQueue, WriteSettings
+
+# How the Refresh Statistics button got its answer (StatisticsCache.last_source)
+REFRESH_SOURCES = {
+    "memory": "unchanged since the last refresh",
+    "cached": "unchanged since the last refresh",
+    "delta": "new matches added to the cached totals",
+    "full": "recomputed from the full history",
+}
+
+# Spans whose latest timings the status bar shows while tracing
+HOT_PATHS = ("add_scores", "update_current_scores_table", "end_match", "load_match_history",
+             "history page", "update_statistics", "statistics query")
+TRACE_REFRESH_MS = 1000
+
 
 class GinRummyTracker(QMainWindow):
-    def __init__(self):
+    def __init__(self, db_path=db.DB_PATH, startup=None, profile_startup=False, write_settings=None,
+                 tracer=None, trace_path=None):
         super().__init__()
+        # Startup phases are timed from the launcher's start when it passes its timer
+        self.startup = startup or PhaseTimer()
+        self.profile_startup = profile_startup
+        # Hot-path spans; off (and near free) unless the caller passes an enabled Tracer
+        self.tracer = tracer or Tracer(start=self.startup.start)
+        self.trace_path = trace_path
+        self.db_path = db_path
+        self.write_settings = write_settings or WriteSettings()
         self.init_database()
+        self.startup.mark("database threads started")
         self.init_ui()
-        self.load_match_history()
+        self.startup.mark("score tab built")
         
     def init_database(self):
-        """Initialize database and create tables if needed"""
-        self.conn = sqlite3.connect('gin_rummy_history.db')
-        self.cursor = self.conn.cursor()
-        
-        # Create matches table if it doesn't exist
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                zayaka_score INTEGER,
-                brian_score INTEGER,
-                winner TEXT,
-                match_date TEXT,
-                game_scores TEXT
-            )
-        ''')
-        self.conn.commit()
+        """Start the writer and background reader threads"""
+        with self.tracer.span("init_database"):
+            # The writer's connection creates the schema and migrates old
+            # game_scores text, so even a long migration never delays the window;
+            # the reader waits for it before opening its own connection
+            self.writer = WriteBehindQueue(self.db_path, self.write_settings)
+            self.db_thread = DatabaseThread(self.db_path, self, ready=self.writer.ready)
+            # Delivers writer results back on the GUI thread
+            self.dispatcher = MainThreadDispatcher(self)
+            self.stats_service = None
+            # Built from past hands on the database thread; None until then or without history
+            self.win_table = None
+            # Hands of the match in progress survive a crash in the journal
+            self.journal = MatchJournal(journal_path(self.db_path))
         
     def init_ui(self):
         """Initialize the user interface"""
@@ -53,13 +83,70 @@ class GinRummyTracker(QMainWindow):
         self.tab_widget = QTabWidget()
         main_layout.addWidget(self.tab_widget)
         
-        # Create tabs
+        # Create tabs; History and Statistics are built on first activation,
+        # or in idle time once the window has been painted
+        self.history_model = None
+        self.stats_text = None
+        self.pending_tabs = {}
         self.create_score_tab()
-        self.create_history_tab()
-        self.create_stats_tab()
+        self.add_lazy_tab("Match History", self.create_history_tab)
+        self.add_lazy_tab("Statistics", self.create_stats_tab)
+        self.tab_widget.currentChanged.connect(self.build_tab)
         
         # Status bar
         self.statusBar().showMessage("Ready")
+        if self.tracer.enabled:
+            self.trace_label = QLabel()
+            self.statusBar().addPermanentWidget(self.trace_label)
+            self.trace_timer = QTimer(self)
+            self.trace_timer.timeout.connect(self.show_trace)
+            self.trace_timer.start(TRACE_REFRESH_MS)
+        
+    def show_trace(self):
+        """Show the latest hot-path timings in the status bar"""
+        self.trace_label.setText(self.tracer.status_line(HOT_PATHS))
+        
+    def add_lazy_tab(self, title, builder):
+        """Add an empty page that builder(page) fills in when it is first needed"""
+        page = QWidget()
+        self.tab_widget.addTab(page, title)
+        self.pending_tabs[page] = (title, builder)
+        
+    def build_tab(self, index):
+        """Build the tab at index if it is still an empty placeholder"""
+        page = self.tab_widget.widget(index)
+        pending = self.pending_tabs.pop(page, None)
+        if pending is None:
+            return
+        title, builder = pending
+        builder(page)
+        self.startup.mark(f"{title} tab built")
+        
+    def build_idle_tabs(self):
+        """Build one pending tab per event-loop pass so input stays responsive"""
+        for index in range(self.tab_widget.count()):
+            if self.tab_widget.widget(index) in self.pending_tabs:
+                self.build_tab(index)
+                QTimer.singleShot(0, self.build_idle_tabs)
+                return
+        
+    def event(self, event):
+        if event.type() == QEvent.Paint and self.startup.elapsed("first paint") is None:
+            self.startup.mark("first paint")
+            QTimer.singleShot(0, self.build_idle_tabs)
+        return super().event(event)
+        
+    def finish_startup(self):
+        """Report the startup timeline once the first statistics have arrived"""
+        if self.startup.elapsed("statistics loaded") is not None:
+            return
+        self.startup.mark("statistics loaded")
+        first_paint = self.startup.elapsed("first paint")
+        if first_paint is not None:
+            self.statusBar().showMessage(f"Ready - first paint after {first_paint * 1000:.0f} ms")
+        if self.profile_startup:
+            print("Startup timeline:", file=sys.stderr)
+            print(self.startup.report(), file=sys.stderr)
         
     def create_score_tab(self):
         """Create the score entry tab"""
@@ -132,6 +219,17 @@ class GinRummyTracker(QMainWindow):
         self.clear_button.setStyleSheet("QPushButton { padding: 10px; font-size: 12px; }")
         button_layout.addWidget(self.clear_button)
         
+        # Undo/redo step through the match's event log
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.clicked.connect(self.undo_hand)
+        self.undo_button.setStyleSheet("QPushButton { padding: 10px; font-size: 12px; }")
+        button_layout.addWidget(self.undo_button)
+        
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.redo_hand)
+        self.redo_button.setStyleSheet("QPushButton { padding: 10px; font-size: 12px; }")
+        button_layout.addWidget(self.redo_button)
+        
         entry_layout.addLayout(button_layout)
         layout.addWidget(entry_frame)
         
@@ -160,6 +258,16 @@ class GinRummyTracker(QMainWindow):
         # Set table properties
         self.current_scores_table.setMaximumHeight(200)
         self.current_scores_table.setAlternatingRowColors(True)
+        # Editing a hand's score records a correction
+        self.current_scores_table.itemChanged.connect(self.on_current_score_edited)
+        
+        # Fonts and brushes are created once and shared by every cell
+        self.hand_font = QFont("Arial", 12, QFont.Bold)
+        self.totals_font = QFont("Arial", 16, QFont.Bold)  # 30% bigger (12 * 1.3 ≈ 16)
+        self.totals_foreground = QBrush(Qt.red)
+        self.totals_background = self.current_scores_table.palette().alternateBase()
+        self.zayaka_total_item = None
+        self.brian_total_item = None
         
         scores_layout.addWidget(self.current_scores_table)
         layout.addWidget(scores_frame)
@@ -182,6 +290,11 @@ class GinRummyTracker(QMainWindow):
         self.totals_layout.addWidget(self.brian_total_label)
         totals_layout.addLayout(self.totals_layout)
         
+        # Each player's chance to win from the current totals
+        self.win_chance_label = QLabel("")
+        self.win_chance_label.setStyleSheet("color: #666;")
+        totals_layout.addWidget(self.win_chance_label)
+        
         layout.addWidget(totals_frame)
         
         # Status
@@ -191,15 +304,31 @@ class GinRummyTracker(QMainWindow):
         
         self.tab_widget.addTab(score_widget, "Score Entry")
         
-        # Initialize totals and game scores
-        self.zayaka_total = 0
-        self.brian_total = 0
-        self.game_scores = []
-        self.update_current_scores_table()
-        
-    def create_history_tab(self):
+        # Scoring rules and running totals live in the headless Match, changed
+        # only through the match's event log; both are rebuilt from the
+        # journal if the last session did not end cleanly
+        self.recover_match()
+        self.refresh_win_probability()
+        
+    @property
+    def match(self):
+        """The match in progress at the event log's current position"""
+        return self.log.match
+        
+    def recover_match(self):
+        """Restore the journaled match in progress and resave unconfirmed results"""
+        recovery = self.journal.recover()
+        for record in recovery.finished:
+            self.dispatcher.deliver(self.writer.restore_match(record),
+                                    on_result=lambda _, record=record: self.on_match_saved(record),
+                                    on_error=self.on_database_error)
+        self.log = recovery.log
+        self.show_current_match()
+        if self.match.hands:
+            self.status_label.setText(f"Recovered the match in progress ({len(self.match.hands)} hands)")
+        
+    def create_history_tab(self, history_widget):
         """Create the match history tab"""
-        history_widget = QWidget()
         layout = QVBoxLayout(history_widget)
         
         # Title
@@ -208,12 +337,23 @@ class GinRummyTracker(QMainWindow):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         
-        # Table
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels([
-            "Date", "Zayaka Score", "Brian Score", "Winner", "Game Scores", "ID"
-        ])
+        # Filters become indexed SQL; the table re-reads from the first page
+        self.history_filter_bar = HistoryFilterBar()
+        layout.addWidget(self.history_filter_bar)
+        
+        # Table - rows are paged in from SQLite as the view scrolls
+        self.history_model = HistoryTableModel(self.db_thread, self, tracer=self.tracer)
+        self.history_filter_bar.changed.connect(self.history_model.set_filter)
+        self.history_model.rowsInserted.connect(lambda *_: self.startup.mark("history first page"))
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        self.history_table.setAlternatingRowColors(True)
+        self.history_table.setWordWrap(True)
+        self.history_table.doubleClicked.connect(self.toggle_history_row)
+        
+        # Sorting happens in SQLite; start with the newest matches first
+        self.history_table.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.history_table.setSortingEnabled(True)
         
         # Set column widths
         header = self.history_table.horizontalHeader()
@@ -233,17 +373,18 @@ class GinRummyTracker(QMainWindow):
         refresh_button.clicked.connect(self.load_match_history)
         button_layout.addWidget(refresh_button)
         
+        edit_button = QPushButton("Edit Selected Match")
+        edit_button.clicked.connect(self.edit_history_match)
+        button_layout.addWidget(edit_button)
+        
         clear_history_button = QPushButton("Clear All History")
         clear_history_button.clicked.connect(self.clear_match_history)
         button_layout.addWidget(clear_history_button)
         
         layout.addLayout(button_layout)
         
-        self.tab_widget.addTab(history_widget, "Match History")
-        
-    def create_stats_tab(self):
+    def create_stats_tab(self, stats_widget):
         """Create the statistics tab"""
-        stats_widget = QWidget()
         layout = QVBoxLayout(stats_widget)
         
         # Title
@@ -273,7 +414,7 @@ class GinRummyTracker(QMainWindow):
         
         # Refresh button
         refresh_stats_button = QPushButton("🔄 Refresh Statistics")
-        refresh_stats_button.clicked.connect(self.update_statistics)
+        refresh_stats_button.clicked.connect(self.refresh_statistics)
         refresh_stats_button.setStyleSheet("""
             QPushButton {
                 background-color: #007bff;
@@ -289,6 +430,24 @@ class GinRummyTracker(QMainWindow):
         """)
         button_layout.addWidget(refresh_stats_button)
         
+        # Rebuild aggregates button
+        rebuild_stats_button = QPushButton("🧮 Rebuild Aggregates")
+        rebuild_stats_button.clicked.connect(self.rebuild_aggregates)
+        rebuild_stats_button.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+        """)
+        button_layout.addWidget(rebuild_stats_button)
+        
         # Clear statistics button
         clear_stats_button = QPushButton("🗑️ Clear All Data")
         clear_stats_button.clicked.connect(self.clear_all_data)
@@ -315,97 +474,82 @@ class GinRummyTracker(QMainWindow):
         self.stats_status_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.stats_status_label)
         
-        self.tab_widget.addTab(stats_widget, "Statistics")
-        
         # Initialize statistics
         self.update_statistics()
         
     def add_scores(self):
         """Add scores to the current match"""
+        match_over = False
         try:
-            zayaka_text = self.zayaka_entry.text().strip()
-            brian_text = self.brian_entry.text().strip()
-            
-            if not zayaka_text and not brian_text:
-                self.status_label.setText("Please enter at least one score")
-                return
-            
-            # Determine scores based on which field has a value
-            if zayaka_text:
-                zayaka_score = int(zayaka_text)
-                brian_score = 0
-                self.status_label.setText(f"Added score: Zayaka={zayaka_score}, Brian=0")
-            elif brian_text:
-                brian_score = int(brian_text)
-                zayaka_score = 0
-                self.status_label.setText(f"Added score: Zayaka=0, Brian={brian_score}")
-            else:
-                zayaka_score = 0
-                brian_score = 0
-            
-            # Add to totals
-            self.zayaka_total += zayaka_score
-            self.brian_total += brian_score
-            
-            # Store game scores
-            game_score = f"Zayaka:{zayaka_score}, Brian:{brian_score}"
-            self.game_scores.append(game_score)
-            
-            # Update display
-            self.zayaka_total_label.setText(f"Zayaka: {self.zayaka_total}")
-            self.brian_total_label.setText(f"Brian: {self.brian_total}")
-            
-            # Update the current scores table
-            self.update_current_scores_table()
-            
-            # Clear input fields and re-enable them
-            self.zayaka_entry.clear()
-            self.brian_entry.clear()
-            self.zayaka_entry.setEnabled(True)
-            self.brian_entry.setEnabled(True)
-            self.zayaka_entry.setPlaceholderText("Enter score")
-            self.brian_entry.setPlaceholderText("Enter score")
-            self.zayaka_entry.setFocus()
-            
-            # Check for winner
-            if self.zayaka_total >= 100 or self.brian_total >= 100:
-                self.end_match()
+            with self.tracer.span("add_scores") as span:
+                with self.tracer.span("parse_entry"):
+                    hand = parse_entry(self.zayaka_entry.text(), self.brian_entry.text())
+                if hand is None:
+                    self.status_label.setText("Please enter at least one score")
+                    return
+                
+                zayaka_score, brian_score = hand
+                match_over = self.log.add_hand(zayaka_score, brian_score)
+                span.set(rows=len(self.match.hands))
+                self.journal.record_hand(self.match, zayaka_score, brian_score)
+                if self.journal.pending:
+                    # Hands entered in quick succession share one fsync
+                    QTimer.singleShot(int(self.journal.sync_interval * 1000), self.journal.sync)
+                self.status_label.setText(f"Added score: Zayaka={zayaka_score}, Brian={brian_score}")
+                
+                # Update display
+                self.zayaka_total_label.setText(f"Zayaka: {self.match.zayaka_total}")
+                self.brian_total_label.setText(f"Brian: {self.match.brian_total}")
+                self.show_win_chance()
+                
+                # Add just the new hand to the current scores table
+                self.append_current_score_row(zayaka_score, brian_score)
+                self.update_undo_buttons()
+                
+                # Clear input fields and re-enable them
+                self.zayaka_entry.clear()
+                self.brian_entry.clear()
+                self.zayaka_entry.setEnabled(True)
+                self.brian_entry.setEnabled(True)
+                self.zayaka_entry.setPlaceholderText("Enter score")
+                self.brian_entry.setPlaceholderText("Enter score")
+                self.zayaka_entry.setFocus()
                 
         except ValueError:
             self.status_label.setText("Error: Please enter valid numbers")
             
+        # Check for winner; outside the span, which would otherwise time the winner dialog
+        if match_over:
+            self.end_match()
+            
     def end_match(self):
         """End the current match and save to database"""
-        winner = "Zayaka" if self.zayaka_total >= 100 else "Brian"
-        
-        # Save to database
-        game_scores_str = "; ".join(self.game_scores)
-        self.cursor.execute('''
-            INSERT INTO matches (zayaka_score, brian_score, winner, match_date, game_scores)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (self.zayaka_total, self.brian_total, winner, 
-              datetime.now().strftime("%Y-%m-%d %H:%M:%S"), game_scores_str))
-        self.conn.commit()
+        with self.tracer.span("end_match", rows=len(self.match.hands)):
+            record = self.match.record()
+            self.journal.record_end(record)
+            
+            # Queued for the writer thread, which group-commits bursts of results
+            self.dispatcher.deliver(self.writer.add_match(record),
+                                    on_result=lambda _: self.on_match_saved(record),
+                                    on_error=self.on_database_error)
         
         # Show winner message
         QMessageBox.information(self, "Match Complete!", 
-                              f"Winner: {winner}\n"
+                              f"Winner: {record.winner}\n"
                               f"Final Scores:\n"
-                              f"Zayaka: {self.zayaka_total}\n"
-                              f"Brian: {self.brian_total}")
+                              f"Zayaka: {record.zayaka_score}\n"
+                              f"Brian: {record.brian_score}")
         
         # Reset for new match
         self.reset_match()
         
     def reset_match(self):
         """Reset the current match"""
-        self.zayaka_total = 0
-        self.brian_total = 0
-        self.game_scores = []
-        self.zayaka_total_label.setText("Zayaka: 0")
-        self.brian_total_label.setText("Brian: 0")
+        # A match abandoned part way through is not kept for recovery
+        self.journal.discard()
+        self.log = MatchLog()
+        self.show_current_match()
         self.status_label.setText("New match started - enter scores")
-        self.update_current_scores_table()
         
         # Re-enable both entry fields
         self.zayaka_entry.setEnabled(True)
@@ -425,17 +569,40 @@ class GinRummyTracker(QMainWindow):
         self.status_label.setText("Fields cleared")
         
     def load_match_history(self):
-        """Load match history into the table"""
-        self.cursor.execute('SELECT * FROM matches ORDER BY match_date DESC')
-        matches = self.cursor.fetchall()
-        
-        self.history_table.setRowCount(len(matches))
-        
-        for row, match in enumerate(matches):
-            for col, value in enumerate(match):
-                item = QTableWidgetItem(str(value))
-                self.history_table.setItem(row, col, item)
+        """Reload match history; pages are fetched lazily as the table scrolls"""
+        # An unbuilt History tab reads fresh pages when it is first shown
+        if self.history_model is not None:
+            with self.tracer.span("load_match_history"):
+                self.history_model.refresh()
+        
+    def toggle_history_row(self, index):
+        """Expand or collapse the game scores of a history row"""
+        row = index.row()
+        self.history_model.toggle_expanded(
+            index, on_loaded=lambda: self.history_table.resizeRowToContents(row))
                 
+    def edit_history_match(self):
+        """Open the selected saved match for correction"""
+        match_id = self.history_model.match_id(self.history_table.currentIndex())
+        if match_id is None:
+            QMessageBox.information(self, "Edit Match", "Select a match in the history first.")
+            return
+        self.db_thread.submit("edit", lambda conn, report: MatchRepository(conn).get(match_id),
+                              on_result=lambda record: self.open_match_editor(match_id, record),
+                              on_error=self.on_database_error)
+        
+    def open_match_editor(self, match_id, record):
+        if record is None:
+            self.load_match_history()
+            return
+        dialog = MatchEditorDialog(match_id, record, self)
+        if dialog.exec_() != MatchEditorDialog.Accepted:
+            return
+        # Saved like a new result; the statistics are adjusted, not recomputed
+        self.dispatcher.deliver(self.writer.update_match(match_id, dialog.edited_record()),
+                                on_result=lambda _: self.on_data_changed(),
+                                on_error=self.on_database_error)
+        
     def clear_match_history(self):
         """Clear all match history"""
         reply = QMessageBox.question(self, "Clear History", 
@@ -443,167 +610,107 @@ class GinRummyTracker(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.cursor.execute('DELETE FROM matches')
-            self.conn.commit()
-            self.load_match_history()
-            self.update_statistics()
+            self.dispatcher.deliver(self.writer.clear(),
+                                    on_result=lambda _: self.on_data_changed(),
+                                    on_error=self.on_database_error)
             
     def update_statistics(self):
-        """Update the statistics display with comprehensive stats"""
-        # Basic match statistics
-        self.cursor.execute('SELECT COUNT(*) FROM matches')
-        total_matches = self.cursor.fetchone()[0]
-        
-        self.cursor.execute('SELECT COUNT(*) FROM matches WHERE winner = "Zayaka"')
-        zayaka_wins = self.cursor.fetchone()[0]
-        
-        self.cursor.execute('SELECT COUNT(*) FROM matches WHERE winner = "Brian"')
-        brian_wins = self.cursor.fetchone()[0]
-        
-        # Average scores per match
-        self.cursor.execute('SELECT AVG(zayaka_score), AVG(brian_score) FROM matches')
-        avg_scores = self.cursor.fetchone()
-        avg_zayaka_match = avg_scores[0] if avg_scores[0] else 0
-        avg_brian_match = avg_scores[1] if avg_scores[1] else 0
-        
-        # Get all game scores for hand-level analysis
-        self.cursor.execute('SELECT game_scores FROM matches')
-        all_game_scores = self.cursor.fetchall()
-        
-        # Parse individual hand scores
-        zayaka_hands = []
-        brian_hands = []
-        total_hands = 0
-        
-        for match_scores in all_game_scores:
-            if match_scores[0]:  # game_scores column
-                game_list = match_scores[0].split('; ')
-                for game in game_list:
-                    if "Zayaka:" in game and "Brian:" in game:
-                        try:
-                            zayaka_part = game.split("Brian:")[0].replace("Zayaka:", "").strip()
-                            brian_part = game.split("Brian:")[1].strip()
-                            
-                            zayaka_score = int(zayaka_part) if zayaka_part else 0
-                            brian_score = int(brian_part) if brian_part else 0
-                            
-                            zayaka_hands.append(zayaka_score)
-                            brian_hands.append(brian_score)
-                            total_hands += 1
-                        except ValueError:
-                            continue
-        
-        # Calculate hand-level statistics
-        avg_zayaka_hand = sum(zayaka_hands) / len(zayaka_hands) if zayaka_hands else 0
-        avg_brian_hand = sum(brian_hands) / len(brian_hands) if brian_hands else 0
-        
-        # Calculate additional statistics
-        max_zayaka_hand = max(zayaka_hands) if zayaka_hands else 0
-        max_brian_hand = max(brian_hands) if brian_hands else 0
-        min_zayaka_hand = min(zayaka_hands) if zayaka_hands else 0
-        min_brian_hand = min(brian_hands) if brian_hands else 0
-        
-        # Calculate win streaks
-        self.cursor.execute('SELECT winner FROM matches ORDER BY match_date')
-        winners = [row[0] for row in self.cursor.fetchall()]
-        
-        zayaka_streak = 0
-        brian_streak = 0
-        current_zayaka_streak = 0
-        current_brian_streak = 0
-        
-        for winner in winners:
-            if winner == "Zayaka":
-                current_zayaka_streak += 1
-                current_brian_streak = 0
-                zayaka_streak = max(zayaka_streak, current_zayaka_streak)
-            else:
-                current_brian_streak += 1
-                current_zayaka_streak = 0
-                brian_streak = max(brian_streak, current_brian_streak)
-        
-        # Calculate match duration statistics (games per match)
-        self.cursor.execute('SELECT game_scores FROM matches')
-        match_games = []
-        for match in self.cursor.fetchall():
-            if match[0]:
-                games_in_match = len(match[0].split('; '))
-                match_games.append(games_in_match)
-        
-        avg_games_per_match = sum(match_games) / len(match_games) if match_games else 0
-        max_games_per_match = max(match_games) if match_games else 0
-        min_games_per_match = min(match_games) if match_games else 0
-        
-        # Calculate scoring efficiency (hands with non-zero scores)
-        zayaka_non_zero = sum(1 for score in zayaka_hands if score > 0)
-        brian_non_zero = sum(1 for score in brian_hands if score > 0)
-        
-        zayaka_efficiency = (zayaka_non_zero / len(zayaka_hands) * 100) if zayaka_hands else 0
-        brian_efficiency = (brian_non_zero / len(brian_hands) * 100) if brian_hands else 0
-        
-        # Calculate win percentages
-        zayaka_win_pct = (zayaka_wins / total_matches * 100) if total_matches > 0 else 0
-        brian_win_pct = (brian_wins / total_matches * 100) if total_matches > 0 else 0
-        
-        # Format statistics text
-        stats_text = f"""
-GinRummy Statistics
-==================
-
-MATCH STATISTICS
-----------------
-Total Matches: {total_matches}
-Average Games per Match: {avg_games_per_match:.1f}
-Longest Match: {max_games_per_match} games
-Shortest Match: {min_games_per_match} games
-
-WIN STATISTICS
---------------
-Zayaka Wins: {zayaka_wins} ({zayaka_win_pct:.1f}%)
-Brian Wins: {brian_wins} ({brian_win_pct:.1f}%)
-
-Win Streaks:
-- Zayaka: {zayaka_streak} consecutive wins
-- Brian: {brian_streak} consecutive wins
-
-MATCH AVERAGES
---------------
-Zayaka Average per Match: {avg_zayaka_match:.1f} points
-Brian Average per Match: {avg_brian_match:.1f} points
-
-HAND STATISTICS
----------------
-Total Hands Played: {total_hands}
-
-Average Score per Hand:
-- Zayaka: {avg_zayaka_hand:.1f} points
-- Brian: {avg_brian_hand:.1f} points
-
-Hand Score Ranges:
-- Zayaka: {min_zayaka_hand} - {max_zayaka_hand} points
-- Brian: {min_brian_hand} - {max_brian_hand} points
-
-Scoring Efficiency (Non-Zero Hands):
-- Zayaka: {zayaka_efficiency:.1f}% ({zayaka_non_zero}/{len(zayaka_hands)} hands)
-- Brian: {brian_efficiency:.1f}% ({brian_non_zero}/{len(brian_hands)} hands)
-
-PERFORMANCE METRICS
-------------------
-Most Consistent Player: {"Zayaka" if abs(avg_zayaka_hand - avg_brian_hand) < 2 else "Brian"}
-Highest Single Hand: {"Zayaka" if max_zayaka_hand > max_brian_hand else "Brian"} ({max(max_zayaka_hand, max_brian_hand)} points)
-Most Efficient Scorer: {"Zayaka" if zayaka_efficiency > brian_efficiency else "Brian"} ({max(zayaka_efficiency, brian_efficiency):.1f}%)
-
-Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-        """
-        
-        self.stats_text.setText(stats_text)
+        """Load statistics from the running aggregates on the database thread"""
+        if self.stats_text is None:
+            return
+        
+        def load(conn, report):
+            report("Loading statistics...")
+            # The aggregates row is maintained by end_match, so this is a single-row read
+            with self.tracer.span("statistics query") as span:
+                stats = self.statistics_service(conn).current()
+                span.set(rows=stats.total_matches)
+            return stats
+        
+        with self.tracer.span("update_statistics"):
+            self.stats_status_label.setText("Loading statistics...")
+            self.db_thread.submit("stats", load, on_result=self.show_statistics,
+                                  on_progress=self.stats_status_label.setText,
+                                  on_error=self.on_database_error, replace=True)
+        
+    def refresh_statistics(self):
+        """Re-derive the statistics from the match tables, reusing the cached result where possible"""
+        if self.stats_text is None:
+            return
+        
+        def refresh(conn, report):
+            report("Checking the history for changes...")
+            service = self.statistics_service(conn)
+            return service.recompute(), service.cache.last_source
+        
+        def done(result):
+            stats, source = result
+            self.show_statistics(stats)
+            self.stats_status_label.setText(
+                f"Statistics refreshed - {stats.total_matches} matches, {REFRESH_SOURCES[source]}")
+        
+        self.stats_status_label.setText("Refreshing statistics...")
+        self.db_thread.submit("stats", refresh, on_result=done,
+                              on_progress=self.stats_status_label.setText,
+                              on_error=self.on_database_error, replace=True)
+        
+    def statistics_service(self, conn):
+        """The StatisticsService for the database thread's connection; only called on that thread"""
+        # Kept across jobs so the statistics cache can answer from memory
+        if self.stats_service is None or self.stats_service.conn is not conn:
+            # The writer thread owns the only writing connection, so the cache is saved there
+            self.stats_service = StatisticsService(conn, write=self.writer.submit)
+        return self.stats_service
+        
+    def show_statistics(self, stats):
+        """Display statistics delivered by the database thread"""
+        with self.tracer.span("show_statistics"):
+            self.stats_text.setText(format_statistics(stats))
+        self.finish_startup()
         
         # Update status label
-        if hasattr(self, 'stats_status_label'):
-            if total_matches > 0:
-                self.stats_status_label.setText(f"Statistics updated - {total_matches} matches, {total_hands} hands analyzed")
+        if stats.total_matches > 0:
+            self.stats_status_label.setText(f"Statistics updated - {stats.total_matches} matches, {stats.total_hands} hands analyzed")
+        else:
+            self.stats_status_label.setText("No match data available - play some games to see statistics")
+        
+    def rebuild_aggregates(self):
+        """Recompute the statistics aggregates from scratch and report any drift"""
+        def rebuild(conn, report):
+            report("Rebuilding aggregates from a full recompute...")
+            return self.statistics_service(conn).rebuild()
+        
+        def done(result):
+            mismatches, stats = result
+            self.show_statistics(stats)
+            # A re-indexed search can change which matches a filter shows
+            self.load_match_history()
+            if mismatches:
+                fields = ", ".join(name for name, _, _ in mismatches)
+                self.stats_status_label.setText(f"Aggregates rebuilt - corrected: {fields}")
             else:
-                self.stats_status_label.setText("No match data available - play some games to see statistics")
+                self.stats_status_label.setText("Aggregates rebuilt - stored values matched a full recompute")
+        
+        self.stats_status_label.setText("Rebuilding aggregates...")
+        # Not cancellable: a later statistics refresh must not cut the rebuild short
+        self.db_thread.submit("stats", rebuild, on_result=done,
+                              on_progress=self.stats_status_label.setText,
+                              on_error=self.on_database_error, cancellable=False, replace=True)
+        
+    def on_match_saved(self, record):
+        """The result is committed, so its journal entries are no longer needed"""
+        self.journal.compact(record)
+        self.on_data_changed()
+        
+    def on_data_changed(self):
+        """Refresh history and statistics after a write has been committed"""
+        self.load_match_history()
+        self.update_statistics()
+        self.refresh_win_probability()
+        
+    def on_database_error(self, message):
+        """Report a failed background database job"""
+        self.statusBar().showMessage(f"Database error: {message}")
         
     def on_zayaka_score_changed(self, text):
         """Handle Zayaka score entry changes - block Brian's entry if Zayaka has a score"""
@@ -625,68 +732,155 @@ Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             self.zayaka_entry.setEnabled(True)
             self.zayaka_entry.setPlaceholderText("Enter score")
     
+    def show_current_match(self):
+        """Show the totals, hands table and undo state of the current match"""
+        self.zayaka_total_label.setText(f"Zayaka: {self.match.zayaka_total}")
+        self.brian_total_label.setText(f"Brian: {self.match.brian_total}")
+        self.update_current_scores_table()
+        self.update_undo_buttons()
+        self.show_win_chance()
+        
+    def show_win_chance(self):
+        """Show each player's chance to win from the current totals (a table lookup)"""
+        table = self.win_table
+        if table is None or table.target != self.match.target_score or self.match.is_over:
+            self.win_chance_label.setText("")
+            return
+        zayaka, brian = table.chances(self.match)
+        self.win_chance_label.setText(f"Chance to win: Zayaka {zayaka:.0%} - Brian {brian:.0%}")
+        
+    def refresh_win_probability(self):
+        """Load the win probability table, re-solving it first if the history has moved on"""
+        # A re-solved table is saved by the writer thread, which owns the only writing connection
+        self.db_thread.submit("win probability",
+                              lambda conn, report: win_probability.refresh(conn, write=self.writer.submit),
+                              on_result=self.set_win_table, on_error=self.on_database_error,
+                              replace=True)
+        
+    def set_win_table(self, table):
+        self.win_table = table
+        self.show_win_chance()
+        
+    def update_undo_buttons(self):
+        self.undo_button.setEnabled(self.log.can_undo)
+        self.redo_button.setEnabled(self.log.can_redo)
+        
+    def undo_hand(self):
+        """Step the current match back one hand or correction"""
+        event = self.log.undo()
+        if event is None:
+            return
+        self.journal.record_undo(self.match)
+        self.show_current_match()
+        self.status_label.setText(f"Undid {event.describe()}")
+        
+    def redo_hand(self):
+        """Re-apply the last undone hand or correction"""
+        event = self.log.redo()
+        if event is None:
+            return
+        self.journal.record_redo(self.match)
+        self.show_current_match()
+        self.status_label.setText(f"Redid {event.describe()}")
+        
+    def on_current_score_edited(self, item):
+        """Record an edited hand score as a correction to that hand"""
+        # Game numbers and the totals row are read-only and only change from code
+        if not item.flags() & Qt.ItemIsEditable:
+            return
+        row, column = item.row(), item.column()
+        hand = self.match.hands[row]
+        try:
+            corrected = corrected_hand(hand, column, item.text())
+            if corrected == hand:
+                return
+            match_over = self.log.correct_hand(row, *corrected)
+        except ValueError as e:
+            item.setText(str(hand[column - 1]))
+            self.status_label.setText(f"Correction not applied: {e}")
+            return
+        self.journal.record_correction(self.match, row, *corrected)
+        # Points for one player clear the other's, so both cells are refreshed
+        for position, points in enumerate(corrected, start=1):
+            self.current_scores_table.item(row, position).setText(str(points))
+        self.zayaka_total_label.setText(f"Zayaka: {self.match.zayaka_total}")
+        self.brian_total_label.setText(f"Brian: {self.match.brian_total}")
+        self.zayaka_total_item.setText(str(self.match.zayaka_total))
+        self.brian_total_item.setText(str(self.match.brian_total))
+        self.update_undo_buttons()
+        self.show_win_chance()
+        self.status_label.setText(f"Corrected game {row + 1}: Zayaka={corrected[0]}, Brian={corrected[1]}")
+        if match_over:
+            # Not from inside the table's own signal: ending rebuilds the table
+            QTimer.singleShot(0, self.end_match)
+        
     def update_current_scores_table(self):
-        """Update the current match scores table"""
-        self.current_scores_table.setRowCount(len(self.game_scores))
-        
-        for row, game_score in enumerate(self.game_scores):
-            # Parse the game score string
-            if "Zayaka:" in game_score and "Brian:" in game_score:
-                zayaka_part = game_score.split("Brian:")[0].replace("Zayaka:", "").strip()
-                brian_part = game_score.split("Brian:")[1].strip()
-                
-                zayaka_score = zayaka_part if zayaka_part else "0"
-                brian_score = brian_part if brian_part else "0"
-            else:
-                zayaka_score = "0"
-                brian_score = "0"
-            
+        """Rebuild the current match scores table from self.match"""
+        with self.tracer.span("update_current_scores_table", rows=len(self.match.hands)):
+            self.current_scores_table.setRowCount(0)
+            self.zayaka_total_item = None
+            self.brian_total_item = None
+            for zayaka_score, brian_score in self.match.hands:
+                self.append_current_score_row(zayaka_score, brian_score)
+        
+    def append_current_score_row(self, zayaka_score, brian_score):
+        """Insert the newest hand above the totals row and refresh the totals in place"""
+        # QTableWidgetItem creation and the table updates for one hand
+        with self.tracer.span("append_current_score_row"):
+            table = self.current_scores_table
+            if self.zayaka_total_item is None:
+                self.add_totals_row()
+        
+            # The totals row is always last, so the new hand goes just above it
+            row = table.rowCount() - 1
+            table.insertRow(row)
+        
             # Add game number
             game_num_item = QTableWidgetItem(f"Game {row + 1}")
             game_num_item.setTextAlignment(Qt.AlignCenter)
-            self.current_scores_table.setItem(row, 0, game_num_item)
-            
+            game_num_item.setFlags(game_num_item.flags() & ~Qt.ItemIsEditable)
+            table.setItem(row, 0, game_num_item)
+        
             # Add Zayaka score
-            zayaka_item = QTableWidgetItem(zayaka_score)
+            zayaka_item = QTableWidgetItem(str(zayaka_score))
             zayaka_item.setTextAlignment(Qt.AlignCenter)
-            zayaka_item.setFont(QFont("Arial", 12, QFont.Bold))
-            self.current_scores_table.setItem(row, 1, zayaka_item)
-            
+            zayaka_item.setFont(self.hand_font)
+            table.setItem(row, 1, zayaka_item)
+        
             # Add Brian score
-            brian_item = QTableWidgetItem(brian_score)
+            brian_item = QTableWidgetItem(str(brian_score))
             brian_item.setTextAlignment(Qt.AlignCenter)
-            brian_item.setFont(QFont("Arial", 12, QFont.Bold))
-            self.current_scores_table.setItem(row, 2, brian_item)
-        
-        # Add totals row if there are games
-        if self.game_scores:
-            self.current_scores_table.setRowCount(len(self.game_scores) + 1)
-            
-            # Totals row
-            totals_row = len(self.game_scores)
-            
-            # Game number for totals
-            totals_num_item = QTableWidgetItem("TOTALS")
-            totals_num_item.setTextAlignment(Qt.AlignCenter)
-            totals_num_item.setFont(QFont("Arial", 16, QFont.Bold))  # 30% bigger (12 * 1.3 ≈ 16)
-            totals_num_item.setForeground(Qt.red)
-            self.current_scores_table.setItem(totals_row, 0, totals_num_item)
-            
-            # Zayaka total
-            zayaka_total_item = QTableWidgetItem(str(self.zayaka_total))
-            zayaka_total_item.setTextAlignment(Qt.AlignCenter)
-            zayaka_total_item.setFont(QFont("Arial", 16, QFont.Bold))  # 30% bigger (12 * 1.3 ≈ 16)
-            zayaka_total_item.setForeground(Qt.red)
-            zayaka_total_item.setBackground(self.current_scores_table.palette().alternateBase())
-            self.current_scores_table.setItem(totals_row, 1, zayaka_total_item)
-            
-            # Brian total
-            brian_total_item = QTableWidgetItem(str(self.brian_total))
-            brian_total_item.setTextAlignment(Qt.AlignCenter)
-            brian_total_item.setFont(QFont("Arial", 16, QFont.Bold))  # 30% bigger (12 * 1.3 ≈ 16)
-            brian_total_item.setForeground(Qt.red)
-            brian_total_item.setBackground(self.current_scores_table.palette().alternateBase())
-            self.current_scores_table.setItem(totals_row, 2, brian_total_item)
+            brian_item.setFont(self.hand_font)
+            table.setItem(row, 2, brian_item)
+        
+            # Update totals
+            self.zayaka_total_item.setText(str(self.match.zayaka_total))
+            self.brian_total_item.setText(str(self.match.brian_total))
+        
+    def add_totals_row(self):
+        """Create the TOTALS row once; later hands only update its text"""
+        table = self.current_scores_table
+        totals_row = table.rowCount()
+        table.insertRow(totals_row)
+        
+        # Game number for totals
+        totals_num_item = QTableWidgetItem("TOTALS")
+        totals_num_item.setTextAlignment(Qt.AlignCenter)
+        totals_num_item.setFont(self.totals_font)
+        totals_num_item.setForeground(self.totals_foreground)
+        totals_num_item.setFlags(totals_num_item.flags() & ~Qt.ItemIsEditable)
+        table.setItem(totals_row, 0, totals_num_item)
+        
+        # Zayaka and Brian totals
+        self.zayaka_total_item = QTableWidgetItem(str(self.match.zayaka_total))
+        self.brian_total_item = QTableWidgetItem(str(self.match.brian_total))
+        for col, item in ((1, self.zayaka_total_item), (2, self.brian_total_item)):
+            item.setTextAlignment(Qt.AlignCenter)
+            item.setFont(self.totals_font)
+            item.setForeground(self.totals_foreground)
+            item.setBackground(self.totals_background)
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            table.setItem(totals_row, col, item)
         
     def clear_all_data(self):
         """Clear all match history and statistics"""
@@ -695,24 +889,53 @@ Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.cursor.execute('DELETE FROM matches')
-            self.conn.commit()
-            self.load_match_history()
-            self.update_statistics()
-            self.stats_status_label.setText("All data cleared - click Refresh to update")
-            self.stats_text.clear()
+            self.db_thread.cancel("stats")
+            self.dispatcher.deliver(self.writer.clear(),
+                                    on_result=lambda _: self.on_history_cleared(),
+                                    on_error=self.on_database_error)
+            if self.stats_text is not None:
+                self.stats_status_label.setText("All data cleared - click Refresh to update")
+                self.stats_text.clear()
             QMessageBox.information(self, "Data Cleared", "All match history and statistics have been cleared.")
             
+    def on_history_cleared(self):
+        """Show the empty history and drop the win probabilities solved from the old one"""
+        self.load_match_history()
+        self.refresh_win_probability()
+        
     def closeEvent(self, event):
         """Handle application close"""
-        self.conn.close()
+        # Reader jobs finish first, as they may still queue cache writes;
+        # then every queued result is committed before the writer closes
+        # Results committed only now are dropped from the journal on the next start
+        self.db_thread.stop()
+        self.writer.close()
+        self.journal.close()
+        if self.trace_path is not None:
+            self.tracer.export_chrome(self.trace_path, marks=self.startup.phases)
+            print(f"Trace written to {self.trace_path}", file=sys.stderr)
         event.accept()
 
-def main():
+def main(startup=None, profile_startup=None, durable=None, trace_path=None):
+    """Run the application; the launcher passes its own timer and options"""
+    startup = startup or PhaseTimer()
+    if profile_startup is None:
+        profile_startup = "--profile-startup" in sys.argv
+    if durable is None:
+        durable = "--durable" in sys.argv
+    if trace_path is None and "--trace" in sys.argv[1:-1]:
+        trace_path = sys.argv[sys.argv.index("--trace") + 1]
+    # --trace PATH records hot-path spans and writes them as a Chrome trace on exit
+    tracer = Tracer(enabled=True, start=startup.start) if trace_path else None
+    # --durable syncs every commit to disk instead of at WAL checkpoints
+    write_settings = WriteSettings(synchronous="FULL" if durable else "NORMAL")
     app = QApplication(sys.argv)
-    window = GinRummyTracker()
+    startup.mark("QApplication created")
+    window = GinRummyTracker(startup=startup, profile_startup=profile_startup,
+                             write_settings=write_settings, tracer=tracer, trace_path=trace_path)
     window.show()
-    sys.exit(app.exec_())
+    startup.mark("window shown")
+    return app.exec_()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
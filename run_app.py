@@ -1,73 +1,71 @@
 #!/usr/bin/env python3
 """
 Launcher script for GinRummy Score Tracker
-Automatically tries PyQt5 first, then PyQt6 if needed
+Probes for PyQt5 and runs the front end in-process
+
+Usage: python run_app.py [--profile-startup] [--durable] [--trace PATH]
 """
 
+import argparse
+import importlib
+import importlib.util
 import sys
-import subprocess
-import os
+import time
+
+STARTED = time.perf_counter()
+
+# (Qt binding, front-end module) in order of preference
+FRONT_ENDS = [
+    ("PyQt5", "gin_rummy_tracker_pyqt5"),
+]
+
+
+def find_front_ends():
+    """Yield (binding, module) pairs whose binding and module are both installed
 
-def try_pyqt5():
-    """Try to run the PyQt5 version"""
-    try:
-        print("Attempting to run PyQt5 version...")
-        result = subprocess.run([sys.executable, "gin_rummy_tracker_pyqt5.py"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print("PyQt5 version ran successfully!")
-            return True
-        else:
-            print(f"PyQt5 version failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"Error running PyQt5 version: {e}")
-        return False
+    find_spec only locates the packages; nothing is imported yet.
+    """
+    for binding, module in FRONT_ENDS:
+        if importlib.util.find_spec(binding) is not None and importlib.util.find_spec(module) is not None:
+            yield binding, module
 
-def try_pyqt6():
-    """Try to run the PyQt6 version"""
-    try:
-        print("Attempting to run PyQt6 version...")
-        result = subprocess.run([sys.executable, "gin_rummy_tracker.py"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print("PyQt6 version ran successfully!")
-            return True
-        else:
-            print(f"PyQt6 version failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"Error running PyQt6 version: {e}")
-        return False
 
 def main():
+    parser = argparse.ArgumentParser(description="Launch the GinRummy Score Tracker")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import and construction timings to stderr")
+    parser.add_argument("--durable", action="store_true",
+                        help="sync every saved match to disk before reporting it saved")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="time hot paths, show them in the status bar and write a Chrome trace to PATH on exit")
+    args = parser.parse_args()
+
+    from gin_rummy.timing import PhaseTimer
+
+    startup = PhaseTimer(STARTED)
     print("=" * 50)
     print("GinRummy Score Tracker Launcher")
     print("=" * 50)
-    
-    # Check if files exist
-    pyqt5_exists = os.path.exists("gin_rummy_tracker_pyqt5.py")
-    pyqt6_exists = os.path.exists("gin_rummy_tracker.py")
-    
-    if not pyqt5_exists and not pyqt6_exists:
-        print("Error: No application files found!")
-        print("Please make sure gin_rummy_tracker_pyqt5.py or gin_rummy_tracker.py exists.")
-        return
-    
-    # Try PyQt5 first (better macOS compatibility)
-    if pyqt5_exists:
-        if try_pyqt5():
-            return
-    
-    # Try PyQt6 as fallback
-    if pyqt6_exists:
-        if try_pyqt6():
-            return
-    
-    print("\nBoth versions failed to run.")
+
+    candidates = list(find_front_ends())
+    startup.mark("Qt bindings probed")
+    for binding, module in candidates:
+        print(f"Starting the {binding} version...", flush=True)
+        try:
+            front_end = importlib.import_module(module)
+        except ImportError as e:
+            # Installed but unusable, e.g. missing Qt platform libraries
+            print(f"{binding} version could not be loaded: {e}", file=sys.stderr)
+            continue
+        startup.mark(f"{binding} front end imported")
+        return front_end.main(startup=startup, profile_startup=args.profile_startup, durable=args.durable,
+                              trace_path=args.trace)
+
+    print("\nNo usable Qt front end was found.")
     print("Please check your PyQt installation:")
     print("  pip install PyQt5")
-    print("  pip install PyQt6")
+    return 1
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the NumPy columnar statistics engine
+Checks that vectorized figures agree with the SQL statistics query
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.synthetic import build_database
+from gin_rummy import db
+from gin_rummy.columnar import HandColumns, load_columns
+from gin_rummy.queries import query_statistics
+
+
+def test_columnar_matches_sql():
+    """Every Statistics figure matches the set-based query"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, 'history.db'), 500, seed=5)
+        expected = query_statistics(conn)
+        actual = load_columns(conn).statistics()
+        for name, value in vars(expected).items():
+            assert np.isclose(getattr(actual, name), value) if isinstance(value, float) \
+                else getattr(actual, name) == value, (name, getattr(actual, name), value)
+        conn.close()
+    print("✓ Columnar statistics match the SQL query")
+
+
+def test_streak_run_lengths():
+    """Run-length encoding finds every streak in match order"""
+    won = np.array([True, True, False, True, True, True, False, False])
+    scores = np.zeros(len(won), dtype=np.int64)
+    empty = np.zeros(0, dtype=np.int64)
+    columns = HandColumns(won, scores, scores, empty, empty, empty)
+    winners, lengths = columns.streak_runs()
+    assert winners.tolist() == [True, False, True, False]
+    assert lengths.tolist() == [2, 1, 3, 2]
+    stats = columns.statistics()
+    assert (stats.zayaka_streak, stats.brian_streak) == (3, 2)
+    assert (stats.current_streak_winner, stats.current_streak) == ("Brian", 2)
+    print("✓ Streaks found by run-length encoding")
+
+
+def test_distributions():
+    """Histograms and percentiles cover every hand"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        assert load_columns(conn).distributions()["Zayaka hand"].count == 0
+        db.insert_match(conn, 110, 20, "Zayaka", "2025-01-01 10:00:00", [(10, 0), (0, 20), (100, 0)])
+        dists = load_columns(conn).distributions()
+        zayaka = dists["Zayaka hand"]
+        assert zayaka.count == 3 and zayaka.histogram.sum() == 3
+        assert zayaka.histogram[100] == 1 and zayaka.percentiles[50] == 10
+        assert dists["Zayaka scoring hand"].count == 2
+        assert dists["Winning margin"].mean == 90
+        conn.close()
+    print("✓ Score distributions built")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Columnar Stats Tests")
+    print("=" * 50)
+
+    test_columnar_matches_sql()
+    test_streak_run_lengths()
+    test_distributions()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
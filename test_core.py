@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless core library
+Covers the match rules, repository and statistics service without Qt
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from gin_rummy import Match, MatchRepository, StatisticsService, parse_entry
+
+
+def test_match_rules():
+    """The first player to reach 100 wins and the match then refuses hands"""
+    match = Match()
+    assert match.add_hand(60, 0) is False
+    assert match.add_hand(0, 99) is False
+    assert match.winner is None
+    assert match.add_hand(40, 0) is True
+    assert (match.winner, match.zayaka_total, match.brian_total) == ("Zayaka", 100, 99)
+
+    for match_state, hand in ((match, (5, 0)), (Match(), (-5, 0))):
+        try:
+            match_state.add_hand(*hand)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"hand {hand} accepted")
+
+    record = match.record("2025-01-01 10:00:00")
+    assert record.hands == [(60, 0), (0, 99), (40, 0)]
+    try:
+        Match().record()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unfinished match recorded")
+    print("✓ Match rules enforced")
+
+
+def test_parse_entry():
+    """Score fields parse the way the Score Entry tab reads them"""
+    assert parse_entry("", "  ") is None
+    assert parse_entry("25", "") == (25, 0)
+    assert parse_entry(" ", "12") == (0, 12)
+    assert parse_entry("7", "9") == (7, 0)
+    try:
+        parse_entry("x", "")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("non-numeric score accepted")
+    print("✓ Score entry parsing")
+
+
+def test_repository_and_statistics():
+    """Matches round-trip through the repository and show up in statistics"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repository:
+            for hands in ([(70, 0), (0, 20), (30, 0)], [(0, 50), (0, 55)]):
+                match = Match()
+                for hand in hands:
+                    match.add_hand(*hand)
+                match_id = repository.add(match.record("2025-01-01 10:00:00"))
+
+            assert repository.count() == 2
+            record = repository.get(match_id)
+            assert (record.winner, record.brian_score, record.hands) == ("Brian", 105, [(0, 50), (0, 55)])
+            assert repository.get(999) is None
+            assert [row[0] for row in repository.page("id", descending=False)] == [1, 2]
+
+            service = StatisticsService(repository.conn)
+            assert service.current() == service.recompute()
+            assert service.current().total_hands == 5
+            assert "Total Matches: 2" in service.report()
+
+            repository.clear()
+            assert repository.count() == 0
+            assert service.current().total_matches == 0
+    print("✓ Repository and statistics service")
+
+
+def test_core_does_not_import_qt():
+    """Importing the core library and CLI never loads PyQt5"""
+    code = "import sys, gin_rummy, gin_rummy.__main__; assert 'PyQt5' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    print("✓ Core library is Qt-free")
+
+
+def test_cli_record():
+    """A match can be scored and saved from the command line"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        here = os.path.dirname(os.path.abspath(__file__))
+        result = subprocess.run([sys.executable, "-m", "gin_rummy", "--db", path, "record", "60,0", "0,10", "45,0"],
+                                capture_output=True, text=True, cwd=here)
+        assert result.returncode == 0, result.stderr
+        assert "Zayaka wins 105-10" in result.stdout
+        unfinished = subprocess.run([sys.executable, "-m", "gin_rummy", "--db", path, "record", "10,0"],
+                                    capture_output=True, text=True, cwd=here)
+        assert unfinished.returncode != 0
+        with MatchRepository.open(path) as repository:
+            assert repository.count() == 1
+    print("✓ Command-line match recording")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Core Library Tests")
+    print("=" * 50)
+
+    test_match_rules()
+    test_parse_entry()
+    test_repository_and_statistics()
+    test_core_does_not_import_qt()
+    test_cli_record()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-player hand score histograms
+Checks percentiles, merging, and that the stored counts follow every write
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+
+from conftest import random_match
+from gin_rummy import MatchRecord, MatchRepository, StatisticsService, db, format_statistics, histograms
+from gin_rummy.events import MatchLog
+from gin_rummy.histograms import ScoreHistogram
+from gin_rummy.transfer import export_matches, import_matches
+
+
+def nearest_rank(values, percentile):
+    ordered = sorted(values)
+    rank = max(1, -(-percentile * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def test_percentiles_and_merge():
+    """Percentiles equal a sort of the raw scores, and merged histograms equal the combined scores"""
+    rng = random.Random(2)
+    for _ in range(100):
+        first = [rng.choice([0, 0, rng.randint(0, 120)]) for _ in range(rng.randint(1, 300))]
+        second = [rng.randint(0, 40) for _ in range(rng.randint(0, 50))]
+        a, b = ScoreHistogram(), ScoreHistogram()
+        for points in first:
+            a.add(points)
+        for points in second:
+            b.add(points)
+        merged = a.merge(b)
+        for p in (1, 50, 90, 99, 100):
+            assert a.quantile(p) == nearest_rank(first, p)
+            assert merged.quantile(p) == nearest_rank(first + second, p)
+        assert merged.count == len(first) + len(second)
+        assert sum(hands for _, _, hands in merged.buckets(10)) == merged.count
+        scoring = [points for points in first if points]
+        assert a.scoring().percentiles() == (tuple(nearest_rank(scoring, p) for p in (50, 90, 99))
+                                             if scoring else (0, 0, 0))
+    assert ScoreHistogram().percentiles() == (0, 0, 0) and ScoreHistogram().buckets() == []
+    print("✓ Percentiles and merging")
+
+
+def test_counts_follow_writes():
+    """Saving, editing, importing and clearing keep the stored counts equal to a recount"""
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as repo:
+            repo.add_many(random_match(rng).record(f"2025-08-06 19:{n:02d}:00") for n in range(40))
+            assert histograms.verify(repo.conn) == []
+            assert histograms.load(repo.conn)["Zayaka"].count == repo.conn.execute(
+                'SELECT COUNT(*) FROM hands').fetchone()[0] // 2
+
+            for _ in range(20):
+                match_id = rng.randint(1, 40)
+                record = repo.get(match_id)
+                log = MatchLog(hands=record.hands)
+                try:
+                    log.correct_hand(rng.randrange(len(record.hands)), rng.randint(0, 90), 0)
+                    edited = log.match.record(record.match_date)
+                except ValueError:
+                    continue
+                repo.update(match_id, edited)
+                assert histograms.verify(repo.conn) == []
+
+            export_path = os.path.join(tmp, 'export.jsonl')
+            export_matches(repo.conn, export_path)
+            import_matches(repo.conn, export_path)
+            assert histograms.verify(repo.conn) == []
+            assert histograms.load(repo.conn)["Brian"].count == repo.conn.execute(
+                "SELECT COUNT(*) FROM hands WHERE player = 'Brian'").fetchone()[0]
+
+            repo.clear()
+            assert histograms.load(repo.conn)["Zayaka"].count == 0
+
+        # A database from before the histograms is counted when first opened
+        repo = MatchRepository.open(path)
+        repo.add(MatchRecord(105, 0, "Zayaka", "2025-08-07 19:00:00", [(60, 0), (45, 0)]))
+        repo.close()
+        conn = sqlite3.connect(path)
+        conn.execute('DROP TABLE hand_histogram')
+        conn.close()
+        conn = db.connect(path)
+        assert histograms.load(conn)["Zayaka"].counts == {60: 1, 45: 1}
+        conn.close()
+    print("✓ Stored counts follow every write")
+
+
+def test_statistics_report_percentiles():
+    """The Statistics tab report shows p50/p90/p99 hand scores"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            repo.add(MatchRecord(105, 12, "Zayaka", "2025-08-06 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+            service = StatisticsService(repo.conn)
+            stats = service.current()
+            assert stats.zayaka_hand_percentiles == (45, 60, 60)
+            assert stats.brian_scoring_percentiles == (12, 12, 12)
+            assert service.recompute() == stats
+            assert "- Zayaka: 45 / 60 / 60 points (scoring hands: 45 / 60 / 60)" in format_statistics(stats)
+
+            # A drifted histogram is reported and recounted by rebuild
+            repo.conn.execute("UPDATE hand_histogram SET hands = 5 WHERE player = 'Brian' AND points = 12")
+            repo.conn.commit()
+            mismatches, _ = service.rebuild()
+            assert [name for name, _, _ in mismatches] == ["brian_hand_histogram"]
+            assert histograms.verify(repo.conn) == []
+    print("✓ Statistics report percentiles")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Hand Histogram Tests")
+    print("=" * 50)
+
+    test_percentiles_and_merge()
+    test_counts_follow_writes()
+    test_statistics_report_percentiles()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
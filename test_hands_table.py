@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the normalized hands table
+Checks parsing, transactional inserts and the game_scores migration
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from gin_rummy import db
+from gin_rummy.scores import format_game_scores, parse_game_scores
+
+
+def make_legacy_db(path):
+    """Create a database with only the original matches table"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            zayaka_score INTEGER,
+            brian_score INTEGER,
+            winner TEXT,
+            match_date TEXT,
+            game_scores TEXT
+        )
+    ''')
+    conn.executemany('''
+        INSERT INTO matches (zayaka_score, brian_score, winner, match_date, game_scores)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (104, 22, 'Zayaka', '2025-08-06 19:12:28',
+         'Zayaka:12, Brian:0; Zayaka:77, Brian:0; Zayaka:0, Brian:22; Zayaka:15, Brian:0'),
+        (3, 100, 'Brian', '2025-08-07 19:00:00', 'Zayaka:3, Brian:0; Zayaka:0, Brian:100'),
+        (0, 0, 'Brian', '2025-08-08 19:00:00', ''),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_parse_game_scores():
+    """Round-trip the stored game_scores format"""
+    hands = [(12, 0), (0, 22), (15, 0)]
+    text = format_game_scores(hands)
+    assert text == 'Zayaka:12, Brian:0; Zayaka:0, Brian:22; Zayaka:15, Brian:0'
+    assert parse_game_scores(text) == hands
+    assert parse_game_scores('') == []
+    assert parse_game_scores('Zayaka: 25,30,50; Brian: 20,25,50') == []
+    print("✓ game_scores parsing works")
+
+
+def test_migration():
+    """Existing game_scores text is streamed into the hands table"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        make_legacy_db(path)
+
+        conn = db.connect(path)
+        rows = conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0]
+        assert rows == 12, rows
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == db.SCHEMA_VERSION
+        points = conn.execute('''
+            SELECT points FROM hands WHERE match_id = 1 AND player = 'Zayaka' ORDER BY hand_no
+        ''').fetchall()
+        assert [p for (p,) in points] == [12, 77, 0, 15]
+
+        # Re-running the migration must not duplicate anything
+        assert db.migrate_hands(conn) == 1  # only the empty match is revisited
+        assert conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 12
+        conn.close()
+    print("✓ Legacy game_scores migrated to hands")
+
+
+def test_insert_and_clear():
+    """Matches and hands are written and deleted together"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        match_id = db.insert_match(conn, 101, 40, 'Zayaka', '2025-09-01 20:00:00',
+                                   [(60, 0), (0, 40), (41, 0)])
+        game_scores = conn.execute('SELECT game_scores FROM matches WHERE id = ?',
+                                   (match_id,)).fetchone()[0]
+        assert parse_game_scores(game_scores) == [(60, 0), (0, 40), (41, 0)]
+        assert conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 6
+
+        try:
+            conn.execute('INSERT INTO hands VALUES (999, 1, "Zayaka", 5)')
+            raise AssertionError("foreign key not enforced")
+        except sqlite3.IntegrityError:
+            pass
+
+        db.clear_matches(conn)
+        assert conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 0
+        conn.close()
+    print("✓ Match and hands inserted in one transaction")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Hands Table Tests")
+    print("=" * 50)
+
+    test_parse_game_scores()
+    test_migration()
+    test_insert_and_clear()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
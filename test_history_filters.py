@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Test script for History tab filtering and search
+Checks filtered keyset pages against a plain scan whichever access path the
+planner picks, that the plans walk indexes, and that the full-text index
+follows every write
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from conftest import random_match
+from gin_rummy import Match, MatchRepository, StatisticsService, db, search
+from gin_rummy.history import (ROW_INDEX, SORTABLE, HistoryFilter, HistoryPager, page_query,
+                               plan_filter)
+from gin_rummy.transfer import export_matches, import_matches
+from gin_rummy.writer import WriteBehindQueue
+
+
+def make_history(path, count=300, seed=4):
+    rng = random.Random(seed)
+    repo = MatchRepository.open(path)
+    # Two matches at each time, so ties in every sort column come up
+    start = datetime(2025, 3, 1, 8)
+    repo.add_many(random_match(rng).record((start + timedelta(hours=n // 2)).strftime("%Y-%m-%d %H:%M:%S"))
+                  for n in range(count))
+    return repo
+
+
+def passes(history_filter, record):
+    """The filter applied in Python to one MatchRecord"""
+    f = history_filter
+    date = db.to_epoch(record.match_date)
+    margin = abs(record.zayaka_score - record.brian_score)
+    tokens = {f"{player}:{points}".lower() for hand in record.hands for player, points in zip(("Zayaka", "Brian"), hand)}
+    words = [word for word in f.text.split() if word.lower() not in ("zayaka", "brian")]
+    return all([
+        f.date_from is None or date >= f.date_from,
+        f.date_to is None or date < f.date_to,
+        f.winner is None or record.winner == f.winner,
+        f.min_margin is None or margin >= f.min_margin,
+        f.max_margin is None or margin <= f.max_margin,
+        f.min_hands is None or len(record.hands) >= f.min_hands,
+        f.max_hands is None or len(record.hands) <= f.max_hands,
+        all(word.lower() in tokens if ":" in word else
+            {f"zayaka:{word}", f"brian:{word}"} & tokens for word in words),
+    ])
+
+
+def load_all(pager):
+    while pager.fetch_next_page():
+        pass
+    return [pager.row(i) for i in range(pager.loaded_rows)]
+
+
+FILTERS = [
+    HistoryFilter(),
+    HistoryFilter(winner="Brian"),
+    HistoryFilter(min_margin=40),
+    HistoryFilter(min_margin=10, max_margin=30, winner="Zayaka"),
+    HistoryFilter(max_hands=3),
+    HistoryFilter(min_hands=4, max_hands=6, max_margin=60),
+    HistoryFilter(date_from=db.to_epoch("2025-03-05 00:00:00"), date_to=db.to_epoch("2025-03-09 00:00:00")),
+    HistoryFilter(text="Brian:12"),
+    HistoryFilter(text="Zayaka:0"),
+    HistoryFilter(text="25 zayaka"),
+    HistoryFilter(text="Brian:0 Zayaka:0", min_hands=5, winner="Brian"),
+    HistoryFilter(text="Brian:999"),
+]
+
+
+def test_filtered_pages_match_a_scan():
+    """Every filter and sort gives the rows of a plain scan, driven from an index or walking the sort"""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = make_history(os.path.join(tmp, 'history.db'))
+        conn = repo.conn
+        records = {match_id: repo.get(match_id) for (match_id,) in conn.execute('SELECT id FROM matches')}
+        rows = {row[0]: row for row in conn.execute(
+            'SELECT id, match_date, zayaka_score, brian_score, winner FROM matches')}
+        for history_filter in FILTERS:
+            wanted = [rows[match_id] for match_id, record in records.items() if passes(history_filter, record)]
+            assert history_filter.text != "Brian:12" or 0 < len(wanted) < len(rows)
+            # selective=0 never drives from an index; a huge one always does
+            for selective in (0, 10 ** 9):
+                plan = plan_filter(conn, history_filter, selective)
+                for column in SORTABLE:
+                    for descending in (True, False):
+                        pager = HistoryPager(conn, page_size=7, max_pages=2)
+                        pager.set_sort(column, descending)
+                        pager.set_filter(history_filter)
+                        pager.plan = plan
+                        expected = sorted(wanted, key=lambda row: (row[ROW_INDEX[column]], row[0]),
+                                          reverse=descending)
+                        assert load_all(pager) == expected, (history_filter, selective, column)
+        repo.close()
+    print("✓ Filtered pages match a scan")
+
+
+def query_plan(conn, sort_column, plan, after=None):
+    sql, params = page_query(sort_column, True, after, plan=plan)
+    return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_plans_walk_indexes():
+    """Rare filters start at their own index, common ones walk the sort order without sorting"""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = make_history(os.path.join(tmp, 'history.db'), count=600)
+        conn = repo.conn
+        for column in SORTABLE:
+            plan = query_plan(conn, column, plan_filter(conn, HistoryFilter()), after=(1, 1))
+            assert "TEMP B-TREE" not in plan and "SCAN matches" not in plan, (column, plan)
+
+        # A rare margin, hand count or hand drives; everything else is checked on its rows
+        for history_filter, driver in ((HistoryFilter(min_margin=130), "idx_matches_margin"),
+                                       (HistoryFilter(min_hands=9, winner="Zayaka"), "idx_matches_hand_count"),
+                                       (HistoryFilter(text="Zayaka:59 Brian:58"), search.FTS_TABLE)):
+            plan = plan_filter(conn, history_filter, selective=50)
+            assert plan.driver == driver, (history_filter, plan)
+            text = query_plan(conn, "match_date", plan)
+            assert (driver in text) if driver != search.FTS_TABLE else "INTEGER PRIMARY KEY" in text, text
+
+        # Common conditions leave the date order to be walked, whatever index they have
+        plan = plan_filter(conn, HistoryFilter(min_margin=0, min_hands=1, winner="Brian"), selective=50)
+        assert plan.driver is None
+        text = query_plan(conn, "match_date", plan)
+        assert "idx_matches_date" in text and "TEMP B-TREE" not in text, text
+
+        # A hand in nearly every match is checked per row instead of listing its hits
+        assert "EXISTS" in " ".join(plan_filter(conn, HistoryFilter(text="Zayaka:0"), selective=50).conditions)
+        assert "EXISTS" not in " ".join(plan_filter(conn, HistoryFilter(text="Brian:12"), selective=5).conditions)
+        repo.close()
+    print("✓ Filter plans walk indexes")
+
+
+def hits(conn, text):
+    return {row[0] for row in conn.execute(f'SELECT rowid FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH ?',
+                                           (search.match_expression(text),))}
+
+
+def test_search_index_follows_writes():
+    """Saving, editing, importing and clearing keep the search index in step, and old files are upgraded"""
+    assert search.match_expression('Brian:12 60 zayaka') == '"Brian:12" ("Zayaka:60" OR "Brian:60")'
+    assert search.match_expression('say "hi"') == '"say" """hi"""'
+    assert search.match_expression('Brian') == ''
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        repo = make_history(path, count=40)
+        conn = repo.conn
+        assert search.verify(conn) == []
+        record = repo.get(7)
+        zayaka, brian = record.hands[0]
+        assert 7 in hits(conn, f"Zayaka:{zayaka} Brian:{brian}")
+
+        edited = Match()
+        for hand in [(0, 77), (0, 31)]:
+            edited.add_hand(*hand)
+        repo.update(7, edited.record(record.match_date))
+        assert hits(conn, "Brian:77 Brian:31") == {7}
+        assert search.verify(conn) == []
+
+        export_path = os.path.join(tmp, 'export.jsonl')
+        export_matches(conn, export_path)
+        import_matches(conn, export_path)
+        assert hits(conn, "Brian:77 Brian:31") == {7, 47}
+        assert search.verify(conn) == []
+
+        # Drift is found and rebuilt away by the Statistics tab's rebuild
+        conn.execute("UPDATE matches SET game_scores = 'Zayaka:1, Brian:0' WHERE id = 3")
+        conn.commit()
+        mismatches, _ = StatisticsService(conn).rebuild()
+        assert search.FTS_TABLE in [name for name, _, _ in mismatches]
+        assert search.verify(conn) == [] and 3 in hits(conn, "Zayaka:1")
+
+        # The window's rebuild re-indexes on the writer thread, never on its reader
+        conn.execute("UPDATE matches SET game_scores = 'Zayaka:2, Brian:0' WHERE id = 3")
+        conn.commit()
+        writer = WriteBehindQueue(path)
+        reader = db.connect(path)
+        reader.execute('PRAGMA query_only = ON')
+        mismatches, _ = StatisticsService(reader, write=writer.submit).rebuild()
+        writer.close()
+        reader.close()
+        assert search.FTS_TABLE in [name for name, _, _ in mismatches]
+        assert search.verify(conn) == [] and 3 in hits(conn, "Zayaka:2")
+
+        repo.clear()
+        assert hits(conn, "0") == set() and search.verify(conn) == []
+        repo.add(edited.record("2025-04-01 20:00:00"))
+        repo.close()
+
+        # A file from before the filter columns and search index gets both when opened
+        conn = sqlite3.connect(path)
+        conn.executescript(f'''
+            DROP TABLE {search.FTS_TABLE};
+            DROP INDEX idx_matches_margin;
+            DROP INDEX idx_matches_hand_count;
+            ALTER TABLE matches DROP COLUMN margin;
+            ALTER TABLE matches DROP COLUMN hand_count;
+            PRAGMA user_version = {db.EPOCH_DATES_VERSION};
+        ''')
+        conn.close()
+        conn = db.connect(path)
+        assert conn.execute('SELECT margin, hand_count FROM matches').fetchall() == [(108, 2)]
+        pager = HistoryPager(conn)
+        pager.set_filter(HistoryFilter(min_margin=100, max_hands=2, text="Brian:77"))
+        assert pager.fetch_next_page() == 1
+        conn.close()
+    print("✓ Search index follows every write")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - History Filter Tests")
+    print("=" * 50)
+
+    test_filtered_pages_match_a_scan()
+    test_plans_walk_indexes()
+    test_search_index_follows_writes()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
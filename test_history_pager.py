@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for paged match history
+Checks keyset pagination order, page eviction and server-side sorting
+"""
+
+import os
+import tempfile
+
+from gin_rummy import db
+from gin_rummy.history import HistoryPager
+
+
+def make_history(path, count=50):
+    conn = db.connect(path)
+    for i in range(count):
+        winner = "Zayaka" if i % 3 else "Brian"
+        # Repeat dates so ties have to be broken by id
+        db.insert_match(conn, 100 + i % 7, i % 11, winner, f"2025-01-{1 + i // 4:02d} 20:00:00",
+                        [(100 + i % 7, 0), (0, i % 11)])
+    return conn
+
+
+def load_all(pager):
+    while pager.fetch_next_page():
+        pass
+    return [pager.row(i) for i in range(pager.loaded_rows)]
+
+
+def test_pages_follow_sort_order():
+    """Paged rows equal a single ORDER BY over the whole table"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = make_history(os.path.join(tmp, 'history.db'))
+        pager = HistoryPager(conn, page_size=7, max_pages=2)
+        expected = conn.execute('''
+            SELECT id, match_date, zayaka_score, brian_score, winner FROM matches
+            ORDER BY match_date DESC, id DESC
+        ''').fetchall()
+        assert load_all(pager) == expected
+        assert pager.exhausted
+        assert pager.cached_pages <= 2
+
+        pager.set_sort("winner", descending=False)
+        expected = conn.execute('''
+            SELECT id, match_date, zayaka_score, brian_score, winner FROM matches
+            ORDER BY winner, id
+        ''').fetchall()
+        assert load_all(pager) == expected
+        conn.close()
+    print("✓ Keyset pages follow the server-side sort")
+
+
+def test_evicted_pages_reload():
+    """Rows from pages dropped by the LRU are read back identically"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = make_history(os.path.join(tmp, 'history.db'))
+        pager = HistoryPager(conn, page_size=5, max_pages=1)
+        rows = load_all(pager)
+        for index in (0, 17, 3, 49, 22):
+            assert pager.row(index) == rows[index]
+        assert pager.cached_pages == 1
+        assert pager.game_scores(rows[0][0]).startswith("Zayaka:")
+        conn.close()
+    print("✓ Evicted pages reload on demand")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - History Paging Tests")
+    print("=" * 50)
+
+    test_pages_follow_sort_order()
+    test_evicted_pages_reload()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
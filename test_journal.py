@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-progress match journal
+Checks recovery, torn writes, compaction and restoring the window after a crash
+"""
+
+import os
+import tempfile
+import time
+
+from gin_rummy import Match, MatchRepository
+from gin_rummy.journal import MatchJournal, journal_path
+from gin_rummy.writer import WriteBehindQueue
+
+
+def play(journal, match, hands):
+    for zayaka, brian in hands:
+        match.add_hand(zayaka, brian)
+        journal.record_hand(match, zayaka, brian)
+
+
+def test_recover_match_in_progress():
+    """Hands written before a crash come back as the current match"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db-match')
+        journal = MatchJournal(path)
+        assert journal.recover().match == Match()
+        play(journal, Match(), [(25, 0), (0, 40), (12, 0)])
+        # No close(): the process dies here
+
+        recovery = MatchJournal(path).recover()
+        assert recovery.finished == []
+        assert recovery.match.hands == [(25, 0), (0, 40), (12, 0)]
+        assert (recovery.match.zayaka_total, recovery.match.brian_total) == (37, 40)
+    print("✓ Match in progress recovered")
+
+
+def test_torn_tail_dropped():
+    """A half-written last record is ignored and cut from the file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db-match')
+        journal = MatchJournal(path)
+        journal.recover()
+        play(journal, Match(), [(25, 0), (0, 40)])
+        journal.close()
+        with open(path, 'a') as f:
+            f.write("H\t30\t")
+        size = os.path.getsize(path)
+
+        journal = MatchJournal(path)
+        match = journal.recover().match
+        assert match.hands == [(25, 0), (0, 40)]
+        assert os.path.getsize(path) < size
+        # Appending carries on from the last intact record
+        play(journal, match, [(5, 0)])
+        journal.close()
+        assert MatchJournal(path).recover().match.hands == [(25, 0), (0, 40), (5, 0)]
+    print("✓ Torn tail dropped")
+
+
+def test_finished_match_compacted_after_commit():
+    """An ended match stays journaled until its commit is confirmed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db-match')
+        journal = MatchJournal(path)
+        journal.recover()
+        match = Match()
+        play(journal, match, [(60, 0), (45, 0)])
+        record = match.record('2025-08-06 19:12:28')
+        journal.record_end(record)
+        # The next match starts before the commit comes back
+        play(journal, Match(), [(0, 10)])
+
+        recovery = MatchJournal(path).recover()
+        assert recovery.finished == [record]
+        assert recovery.match.hands == [(0, 10)]
+
+        journal.compact(record)
+        recovery = MatchJournal(path).recover()
+        assert recovery.finished == [] and recovery.match.hands == [(0, 10)]
+
+        journal.discard()
+        assert os.path.getsize(path) == 0
+        journal.close()
+    print("✓ Finished matches compacted once committed")
+
+
+def test_failed_save_kept_after_later_commit():
+    """Confirming one match's commit leaves an earlier match whose save failed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db-match')
+        journal = MatchJournal(path)
+        journal.recover()
+        records = []
+        for hands in ([(100, 0)], [(0, 100)]):
+            match = Match()
+            play(journal, match, hands)
+            records.append(match.record('2025-08-06 19:12:28'))
+            journal.record_end(records[-1])
+        failed, saved = records
+
+        journal.compact(saved)
+        journal.close()
+        assert MatchJournal(path).recover().finished == [failed]
+    print("✓ Failed saves kept after a later commit")
+
+
+def test_restore_is_idempotent():
+    """Resaving a recovered result that was already committed adds nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'history.db')
+        match = Match()
+        match.add_hand(100, 0)
+        record = match.record('2025-08-06 19:12:28')
+        writer = WriteBehindQueue(db_path)
+        first = writer.add_match(record).result(5)
+        assert writer.restore_match(record).result(5) == first
+        writer.close()
+        with MatchRepository.open(db_path) as repo:
+            assert repo.count() == 1
+    print("✓ Recovered results saved once")
+
+
+def test_window_recovers_after_crash():
+    """A new window picks up the hands an unclosed one had entered"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'history.db')
+        crashed = GinRummyTracker(db_path=db_path)
+        for zayaka, brian in [("30", ""), ("", "12")]:
+            crashed.zayaka_entry.setText(zayaka)
+            crashed.brian_entry.setText(brian)
+            crashed.add_scores()
+
+        window = GinRummyTracker(db_path=db_path)
+        assert window.match.hands == [(30, 0), (0, 12)]
+        assert window.zayaka_total_label.text() == "Zayaka: 30"
+        assert window.current_scores_table.rowCount() == 3
+        assert window.current_scores_table.item(2, 2).text() == "12"
+
+        # Starting over abandons the recovered match
+        window.reset_match()
+        assert os.path.getsize(journal_path(db_path)) == 0
+        window.close()
+        crashed.close()
+        app.processEvents()
+    print("✓ Window restored after a crash")
+
+
+def test_window_keeps_unsaved_result():
+    """A result the writer failed to save is resaved by the next window"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from concurrent.futures import Future
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'history.db')
+        window = GinRummyTracker(db_path=db_path)
+        add_match = window.writer.add_match
+
+        def fail_once(record):
+            window.writer.add_match = add_match
+            future = Future()
+            future.set_exception(OSError("disk full"))
+            return future
+
+        window.writer.add_match = fail_once
+        information = QMessageBox.information
+        QMessageBox.information = staticmethod(lambda *args: QMessageBox.Ok)
+        try:
+            for zayaka, brian in [("100", ""), ("", "100")]:
+                window.zayaka_entry.setText(zayaka)
+                window.brian_entry.setText(brian)
+                window.add_scores()
+        finally:
+            QMessageBox.information = information
+        # Wait for Brian's commit to be confirmed and compacted
+        window.writer.flush(5)
+        deadline = time.time() + 5
+        while len(window.journal._segments) > 1 and time.time() < deadline:
+            app.processEvents()
+        window.close()
+        assert [record.winner for record in MatchJournal(journal_path(db_path)).recover().finished] == ["Zayaka"]
+
+        window = GinRummyTracker(db_path=db_path)
+        window.writer.flush(5)
+        window.close()
+        with MatchRepository.open(db_path) as repo:
+            winners = [row[0] for row in repo.conn.execute('SELECT winner FROM matches ORDER BY winner')]
+        assert winners == ["Brian", "Zayaka"]
+        app.processEvents()
+    print("✓ Unsaved result kept for the next window")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Match Journal Tests")
+    print("=" * 50)
+
+    test_recover_match_in_progress()
+    test_torn_tail_dropped()
+    test_finished_match_compacted_after_commit()
+    test_failed_save_kept_after_later_commit()
+    test_restore_is_idempotent()
+    test_window_recovers_after_crash()
+    test_window_keeps_unsaved_result()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel sharded statistics
+Checks that merged shard partials equal a single full recompute
+"""
+
+import os
+import random
+import tempfile
+from functools import reduce
+
+from gin_rummy import MatchRecord, MatchRepository, StatisticsService
+from gin_rummy.parallel import ShardStats, compute_shard, parallel_aggregates, shard_bounds
+from gin_rummy.queries import query_aggregates
+
+
+def random_record(rng, minute):
+    hands = [rng.choice([(rng.randint(0, 40), 0), (0, rng.randint(0, 40))])
+             for _ in range(rng.randint(0, 6))]
+    # Long runs of one winner so streaks cross shard boundaries
+    winner = "Zayaka" if (minute // rng.choice([1, 3, 7])) % 2 else "Brian"
+    return MatchRecord(sum(h[0] for h in hands), sum(h[1] for h in hands), winner,
+                       f"2025-08-{1 + minute // 1440:02d} {minute // 60 % 24:02d}:{minute % 60:02d}:00", hands)
+
+
+def test_merge_matches_sequential_fold():
+    """Folding pieces separately and merging equals folding everything in order"""
+    rng = random.Random(3)
+    for _ in range(200):
+        matches = [(rng.randint(0, 150), rng.randint(0, 150), rng.choice(["Zayaka", "Brian", "Brian"]),
+                    [(rng.randint(0, 30), 0)] * rng.randint(0, 3)) for _ in range(rng.randint(0, 40))]
+        whole = ShardStats()
+        for match in matches:
+            whole.add_match(*match)
+
+        cuts = sorted(rng.sample(range(len(matches) + 1), rng.randint(0, min(6, len(matches) + 1))))
+        pieces = []
+        for start, end in zip([0] + cuts, cuts + [len(matches)]):
+            piece = ShardStats()
+            for match in matches[start:end]:
+                piece.add_match(*match)
+            pieces.append(piece)
+        assert reduce(ShardStats.merge, pieces, ShardStats()) == whole
+    print("✓ Merged partials equal a sequential fold")
+
+
+def test_shards_cover_history_exactly():
+    """Every shard split reproduces the full recompute, out-of-order and undated matches included"""
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            records = [random_record(rng, minute) for minute in range(300)]
+            rng.shuffle(records[200:])  # a late import of older matches
+            repo.add_many(records)
+            repo.add(MatchRecord(0, 0, "Brian", None, []))
+            expected = query_aggregates(repo.conn)
+            path = repo.conn.execute('PRAGMA database_list').fetchone()[2]
+
+            for shards in (1, 2, 3, 7, 64, 1000):
+                bounds = shard_bounds(repo.conn, shards)
+                assert len(bounds) <= shards
+                partials = [compute_shard(path, shard) for shard in bounds]
+                assert sum(p.acc.matches for p in partials) == 301
+                assert reduce(ShardStats.merge, partials, ShardStats()).acc == expected, shards
+    print("✓ Shards cover the history exactly")
+
+
+def test_process_pool():
+    """Two worker processes give the same statistics as the service's recompute"""
+    rng = random.Random(8)
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            repo.add_many(random_record(rng, minute) for minute in range(500))
+            assert parallel_aggregates(repo.conn, workers=2) == query_aggregates(repo.conn)
+            service = StatisticsService(repo.conn)
+            assert service.recompute_parallel(workers=1) == service.current()
+    print("✓ Process pool recompute")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Parallel Statistics Tests")
+    print("=" * 50)
+
+    test_merge_matches_sequential_fold()
+    test_shards_cover_history_exactly()
+    test_process_pool()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test script for the player-keyed results
+Checks the running player totals against a rebuild and that leaderboards
+come off an index in the right order
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+
+from conftest import random_match
+from gin_rummy import MatchRecord, MatchRepository, StatisticsService, aggregates, db, players, ratings
+from gin_rummy.events import MatchLog
+from gin_rummy.players import Participant
+from gin_rummy.transfer import export_matches, import_matches
+from gin_rummy.writer import WriteBehindQueue
+
+
+def test_totals_follow_writes():
+    """Saving, editing, importing and clearing keep the player tables equal to a rebuild"""
+    rng = random.Random(6)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as repo:
+            repo.add_many(random_match(rng).record(f"2025-08-06 19:{n:02d}:00") for n in range(40))
+            assert players.verify(repo.conn) == []
+
+            for _ in range(20):
+                match_id = rng.randint(1, 40)
+                record = repo.get(match_id)
+                log = MatchLog(hands=record.hands)
+                try:
+                    log.correct_hand(rng.randrange(len(record.hands)), 0, rng.randint(0, 90))
+                    edited = log.match.record(record.match_date)
+                except ValueError:
+                    continue
+                repo.update(match_id, edited)
+                assert players.verify(repo.conn) == []
+
+            export_path = os.path.join(tmp, 'export.jsonl')
+            export_matches(repo.conn, export_path)
+            import_matches(repo.conn, export_path)
+            assert players.verify(repo.conn) == []
+            zayaka = players.head_to_head(repo.conn, "Zayaka", "Brian")
+            brian = players.head_to_head(repo.conn, "Brian", "Zayaka")
+            assert zayaka.matches == brian.matches == 80
+            assert zayaka.wins == brian.losses and zayaka.points == brian.opponent_points
+            assert zayaka.wins == repo.conn.execute(
+                "SELECT COUNT(*) FROM matches WHERE winner = 'Zayaka'").fetchone()[0]
+
+            repo.clear()
+            assert players.leaderboard(repo.conn) == []
+            assert players.head_to_head(repo.conn, "Zayaka", "Brian").matches == 0
+
+        # A database from before the player tables is filled in when first opened
+        repo = MatchRepository.open(path)
+        repo.add(MatchRecord(105, 12, "Zayaka", "2025-08-07 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+        repo.close()
+        conn = sqlite3.connect(path)
+        conn.executescript('DROP TABLE match_players; DROP TABLE player_stats; DROP TABLE head_to_head')
+        conn.close()
+        conn = db.connect(path)
+        top = players.leaderboard(conn)
+        assert [(s.name, s.matches, s.wins, s.win_rate, s.avg_hand) for s in top] == [
+            ("Zayaka", 1, 1, 1.0, 35.0), ("Brian", 1, 0, 0.0, 4.0)]
+        conn.close()
+    print("✓ Player totals follow every write")
+
+
+def test_leaderboards_for_a_club():
+    """Leaderboards over many players match a sort of their totals and walk an index"""
+    rng = random.Random(8)
+    names = [f"player{n:03d}" for n in range(200)]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'club.db'))
+        with conn:
+            for n in range(1500):
+                a, b = rng.sample(names, 2)
+                hands = [rng.choice([(rng.randint(1, 60), 0), (0, rng.randint(1, 60))]) for _ in range(5)]
+                a_score, b_score = sum(h[0] for h in hands), sum(h[1] for h in hands)
+                match_id = conn.execute('INSERT INTO matches (match_date) VALUES (?)', (n,)).lastrowid
+                players.record_match(conn, match_id, [
+                    Participant(a, a_score, a_score > b_score, [h[0] for h in hands]),
+                    Participant(b, b_score, b_score > a_score, [h[1] for h in hands])])
+        # Results of matches between other players are kept by a rebuild
+        assert players.verify(conn) == []
+
+        totals = {name: [0, 0, 0, 0] for name in names}
+        for name, won, hands, points in conn.execute('''
+            SELECT p.name, mp.won, mp.hands, mp.hand_points FROM match_players mp JOIN players p ON p.id = mp.player_id
+        '''):
+            total = totals[name]
+            total[0] += 1
+            total[1] += won
+            total[2] += hands
+            total[3] += points
+        played = {name: t for name, t in totals.items() if t[0] >= 10}
+
+        def expected(key):
+            return sorted(played, key=lambda name: (key(played[name]), played[name][0]), reverse=True)[:5]
+
+        for metric, key in (("win_rate", lambda t: t[1] / t[0]), ("avg_hand", lambda t: t[3] / t[2]),
+                            ("wins", lambda t: t[1])):
+            top = players.leaderboard(conn, metric, k=5, min_matches=10)
+            assert [key(played[s.name]) for s in top] == [key(played[name]) for name in expected(key)]
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + players.leaderboard_query(metric), (10, 5)))
+            assert f"idx_player_stats_{metric}" in plan and "TEMP B-TREE" not in plan, plan
+
+        try:
+            players.leaderboard(conn, "elo")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("unknown metric accepted")
+        conn.close()
+    print("✓ Leaderboards for a club of players")
+
+
+def test_service_head_to_head():
+    """The statistics service answers leaderboard and head-to-head questions and repairs drift"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as repo:
+            repo.add(MatchRecord(105, 12, "Zayaka", "2025-08-06 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+            repo.add(MatchRecord(20, 110, "Brian", "2025-08-06 20:00:00", [(20, 0), (0, 110)]))
+            repo.add(MatchRecord(101, 0, "Zayaka", "2025-08-06 21:00:00", [(101, 0)]))
+            service = StatisticsService(repo.conn)
+            h = service.head_to_head("Zayaka", "Brian")
+            assert (h.matches, h.wins, h.losses, h.points, h.opponent_points) == (3, 2, 1, 226, 122)
+            assert [s.name for s in service.leaderboard("wins")] == ["Zayaka", "Brian"]
+
+            repo.conn.execute('UPDATE player_stats SET wins = 0')
+            repo.conn.commit()
+            # Checking only reads, so it runs beside the writer on a read-only connection
+            reader = db.connect(path)
+            reader.execute('PRAGMA query_only = ON')
+            assert [name for name, _, _ in players.verify(reader)] == ["player_stats"]
+            reader.close()
+            mismatches, _ = service.rebuild()
+            assert [name for name, _, _ in mismatches] == ["player_stats"]
+            assert players.verify(repo.conn) == []
+    print("✓ Service head-to-head and leaderboards")
+
+
+def test_writer_records_any_players():
+    """Matches with a third player are saved through the writer beside the tracker's own"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path)
+        writer.add_match(MatchRecord(105, 12, "Zayaka", "2025-08-06 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+        carol = writer.add_players_match("2025-08-06 20:00:00", [
+            Participant("Zayaka", 40, False, [40, 0]), Participant("Carol", 100, True, [0, 100])])
+        writer.add_players_match("2025-08-06 21:00:00", [
+            Participant("Brian", 0, False, []), Participant("Carol", 100, True, [100]),
+            Participant("Dev", 30, False, [30])])
+        writer.flush(5)
+        assert carol.result() == 2
+        try:
+            writer.add_players_match("2025-08-06 22:00:00", [Participant("Carol", 100, True, [100])]).result(5)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a match with one player was saved")
+
+        with MatchRepository.open(path) as repo:
+            service = StatisticsService(repo.conn, write=writer.submit)
+            h = service.head_to_head("Carol", "Zayaka")
+            assert (h.matches, h.wins, h.points, h.opponent_points) == (1, 1, 100, 40)
+            assert [s.name for s in service.leaderboard("wins")][0] == "Carol"
+            assert ratings.current(repo.conn, ("Carol",))["Carol"] > 1500
+            # The tracker's own statistics only cover Zayaka and Brian's matches
+            assert service.current().total_matches == 1
+            mismatches, _ = service.rebuild()
+            assert mismatches == [], mismatches
+            assert players.verify(repo.conn) == ratings.verify(repo.conn) == aggregates.verify(repo.conn) == []
+            assert service.head_to_head("Carol", "Dev").matches == 1
+        writer.close()
+    print("✓ Writer records matches between any players")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Player Tests")
+    print("=" * 50)
+
+    test_totals_follow_writes()
+    test_leaderboards_for_a_club()
+    test_service_head_to_head()
+    test_writer_records_any_players()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test script for the Elo ratings
+Checks the rating formula, that ratings saved match by match equal a full
+replay, and that a chunked replay gives the same history
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+
+from conftest import random_match
+from gin_rummy import MatchRecord, MatchRepository, StatisticsService, db, format_statistics, players, ratings
+from gin_rummy.ratings import RatingSettings, rate
+from gin_rummy.transfer import export_matches, import_matches
+
+
+def swapped(record):
+    """The same match with the players' hands swapped, so the other player wins"""
+    winner = "Brian" if record.winner == "Zayaka" else "Zayaka"
+    return MatchRecord(record.brian_score, record.zayaka_score, winner, record.match_date,
+                       [(brian, zayaka) for zayaka, brian in record.hands])
+
+
+def test_rate():
+    """Equal players swap K/2, upsets move more, and every match is zero-sum"""
+    settings = RatingSettings()
+    assert rate([1500, 1500], [1, 0], settings) == [1512, 1488]
+    assert rate([1500, 1500], [0, 0], settings) == [1500, 1500]
+    favourite, underdog = rate([1700, 1500], [1, 0], settings)
+    assert abs(favourite - (1700 + 24 * (1 - 1 / (1 + 10 ** (-200 / 400))))) < 1e-9
+    upset = rate([1700, 1500], [0, 1], settings)
+    assert 1500 - upset[1] < 0 and upset[1] - 1500 > favourite - 1700
+    rng = random.Random(1)
+    for _ in range(100):
+        before = [rng.uniform(1000, 2000) for _ in range(rng.randint(2, 5))]
+        won = [0] * len(before)
+        won[rng.randrange(len(before))] = 1
+        assert abs(sum(rate(before, won, settings)) - sum(before)) < 1e-6
+    print("✓ Rating formula")
+
+
+def test_ratings_follow_writes():
+    """Saving, editing, importing and clearing keep the ratings equal to a full replay"""
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as repo:
+            repo.add_many(random_match(rng).record(f"2025-08-06 19:{n:02d}:00") for n in range(50))
+            assert ratings.verify(repo.conn) == []
+            history = ratings.history(repo.conn, "Zayaka", last=50)
+            assert len(history) == 50 and history[0][0] == 50
+            assert all(newer[2] == older[3] for newer, older in zip(history, history[1:]))
+
+            # Flipping a result rerates that match and every match after it
+            before = ratings.current(repo.conn, ("Zayaka", "Brian"))
+            for match_id in (30, 1, 50):
+                repo.update(match_id, swapped(repo.get(match_id)))
+                assert ratings.verify(repo.conn) == []
+            assert ratings.current(repo.conn, ("Zayaka", "Brian")) != before
+
+            export_path = os.path.join(tmp, 'export.jsonl')
+            export_matches(repo.conn, export_path)
+            import_matches(repo.conn, export_path)
+            assert ratings.verify(repo.conn) == []
+            current = ratings.current(repo.conn, ("Zayaka", "Brian"))
+            assert abs(current["Zayaka"] + current["Brian"] - 3000) < 1e-6
+
+            # New settings replay the whole history under them
+            matches, _ = ratings.recompute(repo.conn, RatingSettings(k_factor=40))
+            assert matches == 100 and ratings.load_settings(repo.conn).k_factor == 40
+            assert ratings.verify(repo.conn) == []
+            spread = abs(ratings.current(repo.conn, ("Zayaka",))["Zayaka"] - 1500)
+            assert spread != abs(current["Zayaka"] - 1500)
+
+            repo.clear()
+            assert ratings.current(repo.conn, ("Zayaka", "Brian")) == {"Zayaka": 1500, "Brian": 1500}
+            assert ratings.history(repo.conn, "Zayaka") == []
+
+        # A database from before the ratings is rated when first opened
+        repo = MatchRepository.open(path)
+        repo.add(MatchRecord(105, 12, "Zayaka", "2025-08-07 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+        repo.close()
+        conn = sqlite3.connect(path)
+        conn.executescript('DROP TABLE rating_history; DROP TABLE player_ratings; DROP TABLE rating_settings')
+        conn.close()
+        conn = db.connect(path)
+        assert ratings.current(conn, ("Zayaka", "Brian")) == {"Zayaka": 1512, "Brian": 1488}
+        conn.close()
+    print("✓ Ratings follow every write")
+
+
+def test_matches_saved_out_of_order():
+    """A match dated before saved ones is rated at its date, and the later ones rerated"""
+    rng = random.Random(9)
+    names = ["Zayaka", "Brian", "Carmen", "Dev"]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        for n in range(80):
+            match_date = f"2025-08-06 19:{rng.randrange(60):02d}:00"
+            with conn:
+                if n % 3:
+                    record = random_match(rng).record(match_date)
+                    db.write_match(conn, record.zayaka_score, record.brian_score, record.winner,
+                                   match_date, record.hands)
+                else:
+                    seated = rng.sample(names, rng.choice([2, 3]))
+                    db.write_players_match(conn, match_date, [
+                        players.Participant(name, 0, name == seated[0], []) for name in seated])
+            assert ratings.verify(conn) == [], n
+        with conn:
+            db.write_players_match(conn, None, [
+                players.Participant("Carmen", 0, True, []), players.Participant("Dev", 0, False, [])])
+        assert ratings.verify(conn) == []
+        conn.close()
+    print("✓ Ratings follow matches saved out of date order")
+
+
+def test_chunked_replay_and_rating_leaderboard():
+    """A replay split across many chunks matches one in a single chunk, for a club of players"""
+    rng = random.Random(5)
+    names = [f"player{n:02d}" for n in range(30)]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'club.db'))
+        with conn:
+            for n in range(600):
+                seated = rng.sample(names, rng.choice([2, 2, 3]))
+                winner = rng.choice(seated)
+                match_id = conn.execute('INSERT INTO matches (match_date) VALUES (?)', (n,)).lastrowid
+                rows = players.record_match(conn, match_id, [
+                    players.Participant(name, 0, name == winner, []) for name in seated])
+                ratings.record_match(conn, match_id, rows)
+        incremental = conn.execute('SELECT * FROM rating_history ORDER BY match_id, player_id').fetchall()
+
+        # A history row for a player who was not in the match is dropped by a full replay
+        stranger = conn.execute('''
+            SELECT MAX(player_id) + 1 FROM match_players WHERE match_id = 1
+        ''').fetchone()[0]
+        conn.execute('INSERT INTO rating_history VALUES (1, ?, 1500, 1500)', (stranger,))
+        chunk = ratings.REPLAY_CHUNK
+        try:
+            ratings.REPLAY_CHUNK = 7
+            with conn:
+                assert ratings.replay(conn) == 600
+            assert ratings.verify(conn) == []
+        finally:
+            ratings.REPLAY_CHUNK = chunk
+        assert conn.execute('SELECT * FROM rating_history ORDER BY match_id, player_id').fetchall() == incremental
+
+        top = players.leaderboard(conn, "rating", k=5, min_matches=10)
+        stored = sorted(conn.execute('''
+            SELECT rating, matches FROM player_ratings WHERE matches >= 10
+        ''').fetchall(), reverse=True)[:5]
+        assert [(s.rating, s.matches) for s in top] == stored
+        conn.close()
+    print("✓ Chunked replay and rating leaderboard")
+
+
+def test_statistics_report_ratings():
+    """The Statistics tab shows both players' ratings and rebuild repairs drifted ones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as repo:
+            repo.add(MatchRecord(105, 12, "Zayaka", "2025-08-06 19:00:00", [(60, 0), (0, 12), (45, 0)]))
+            service = StatisticsService(repo.conn)
+            stats = service.current()
+            assert (stats.zayaka_rating, stats.brian_rating) == (1512, 1488)
+            assert "Elo Ratings:\n- Zayaka: 1512\n- Brian: 1488" in format_statistics(stats)
+
+            repo.conn.execute('UPDATE player_ratings SET rating = 2000')
+            repo.conn.commit()
+            # Checking only reads, so it runs beside the writer on a read-only connection
+            reader = db.connect(path)
+            reader.execute('PRAGMA query_only = ON')
+            assert [name for name, _, _ in ratings.verify(reader)] == ["player_ratings"]
+            reader.close()
+            mismatches, stats = service.rebuild()
+            assert [name for name, _, _ in mismatches] == ["player_ratings"]
+            assert stats.zayaka_rating == 1512
+    print("✓ Statistics report ratings")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Rating Tests")
+    print("=" * 50)
+
+    test_rate()
+    test_ratings_follow_writes()
+    test_matches_saved_out_of_order()
+    test_chunked_replay_and_rating_leaderboard()
+    test_statistics_report_ratings()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the score submission service
+Plays tables over HTTP and WebSocket against a server on a scratch database
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks.loadtest import HttpClient, WebSocketClient, run_load
+from gin_rummy import MatchRepository
+from gin_rummy.server import MAX_MESSAGE, ScoreServer
+
+
+async def http_request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    status = int((await reader.readline()).split()[1])
+    _, _, body = (await reader.read()).partition(b"\r\n\r\n")
+    writer.close()
+    return status, json.loads(body)
+
+
+async def raw_status(port, data):
+    """Status of the answer to bytes sent as they are"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    status = int((await reader.readline()).split()[1])
+    writer.close()
+    return status
+
+
+def test_http_tables():
+    """Hands at separate tables keep separate totals and a finished match is saved"""
+    async def scenario(path):
+        server = await ScoreServer(path).start(port=0)
+        try:
+            client = await HttpClient().open("127.0.0.1", server.port)
+            assert (await client.score("one", 60, 0))["zayaka_total"] == 60
+            assert (await client.score("two", 0, 30))["brian_total"] == 30
+            finished = await client.score("one", 45, 0)
+            assert finished["winner"] == "Zayaka" and finished["match_id"] == 1
+            assert (await client.score("one", 0, 5))["hands"] == 1  # the table starts a new match
+            await client.close()
+
+            status, tables = await http_request(server.port, "GET", "/tables")
+            assert status == 200 and {t["table"] for t in tables["tables"]} == {"one", "two"}
+            assert (await http_request(server.port, "GET", "/tables/two"))[1]["brian_total"] == 30
+            status, reply = await http_request(server.port, "POST", "/tables/two/hands", b'{"zayaka": -5}')
+            assert status == 400 and "negative" in reply["error"]
+            assert (await http_request(server.port, "POST", "/tables/two/hands", b'{"zayaka": "5"}'))[0] == 400
+            status, reply = await http_request(server.port, "POST", "/tables/two/hands", b'{"zayaka": 5, "brian": 5}')
+            assert status == 400 and "one player" in reply["error"]
+            assert (await http_request(server.port, "GET", "/nowhere"))[0] == 404
+            assert (await http_request(server.port, "GET", "/tables/two/hands"))[0] == 405
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        asyncio.run(scenario(path))
+        with MatchRepository.open(path) as repo:
+            assert repo.count() == 1
+            record = repo.get(1)
+            assert (record.zayaka_score, record.brian_score, record.hands) == (105, 0, [(60, 0), (45, 0)])
+    print("✓ HTTP tables")
+
+
+def test_http_bad_requests():
+    """Malformed requests are answered 400 and oversized ones 413"""
+    async def scenario(path):
+        server = await ScoreServer(path).start(port=0)
+        try:
+            port = server.port
+            assert await raw_status(port, b"NONSENSE\r\n\r\n") == 400
+            assert await raw_status(port, b"POST /tables/a/hands HTTP/1.1\r\nContent-Length: ten\r\n\r\n") == 400
+            assert await raw_status(port, b"POST /tables/a/hands HTTP/1.1\r\nContent-Length: -1\r\n\r\n") == 400
+            assert await raw_status(port, b"POST /tables/a/hands HTTP/1.1\r\nContent-Length: 10000000\r\n\r\n") == 413
+            assert await raw_status(port, b"GET /tables HTTP/1.1\r\nX-Long: " + b"x" * (MAX_MESSAGE + 10)) == 413
+            # The server is still serving afterwards
+            assert (await http_request(port, "GET", "/tables"))[0] == 200
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(scenario(os.path.join(tmp, 'history.db')))
+    print("✓ HTTP bad requests")
+
+
+def test_websocket_push():
+    """Subscribers are pushed hands and saved matches for the tables they watch"""
+    async def scenario(path):
+        server = await ScoreServer(path).start(port=0)
+        try:
+            watcher = await WebSocketClient().open("127.0.0.1", server.port)
+            watcher.send({"subscribe": ["east"]})
+            assert (await watcher.receive()) == {"event": "subscribed", "tables": ["east"]}
+
+            player = await WebSocketClient().open("127.0.0.1", server.port)
+            assert (await player.score("west", 10, 0))["event"] == "scored"
+            reply = await player.score("east", 0, 100)
+            assert reply["event"] == "scored" and reply["winner"] == "Brian" and reply["match_id"] == 1
+            error = await player.score("east", -1, 0)
+            assert error["event"] == "error" and "negative" in error["error"]
+            player.send("not an object")
+            assert (await player.receive())["event"] == "error"
+
+            hand = await watcher.receive()
+            assert (hand["event"], hand["table"], hand["brian_total"]) == ("hand", "east", 100)
+            match = await watcher.receive()
+            assert (match["event"], match["winner"], match["match_id"]) == ("match", "Brian", 1)
+            await player.close()
+            await watcher.close()
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(scenario(os.path.join(tmp, 'history.db')))
+    print("✓ WebSocket push")
+
+
+def test_load_saves_every_match():
+    """A short load test over both transports saves every match it finished"""
+    async def scenario(path):
+        server = await ScoreServer(path).start(port=0)
+        try:
+            results = [await run_load("127.0.0.1", server.port, tables=8, duration=0.3,
+                                      transport=transport, subscribers=1, seed=n)
+                       for n, transport in enumerate(("http", "ws"))]
+        finally:
+            await server.close()
+        return results, server
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        results, server = asyncio.run(scenario(path))
+        for result in results:
+            assert result.hands > 0 and result.errors == 0 and result.latency(99) > 0
+            assert result.pushed > 0
+        with MatchRepository.open(path) as repo:
+            assert repo.count() == sum(result.matches for result in results) == server.matches
+        assert server.writer.batches <= server.matches
+    print("✓ Load test saves every match")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Score Server Tests")
+    print("=" * 50)
+
+    test_http_tables()
+    test_http_bad_requests()
+    test_websocket_push()
+    test_load_saves_every_match()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for staged startup
+Checks the phase timer and that History/Statistics tabs are built lazily
+"""
+
+import os
+import tempfile
+import time
+
+from gin_rummy.timing import PhaseTimer
+
+
+def test_phase_timer():
+    """Phases are recorded once each, in order, relative to the start"""
+    timer = PhaseTimer()
+    timer.mark("first")
+    timer.mark("second")
+    timer.mark("first")
+    assert [name for name, _ in timer.phases] == ["first", "second"]
+    assert 0 <= timer.elapsed("first") <= timer.elapsed("second")
+    assert timer.elapsed("missing") is None
+    assert len(timer.report().splitlines()) == 2
+    print("✓ Startup phases timed")
+
+
+def test_tabs_built_lazily():
+    """Only the Score tab exists until the window paints or a tab is opened"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        window = GinRummyTracker(db_path=os.path.join(tmp, 'history.db'))
+        assert window.history_model is None and window.stats_text is None
+        assert len(window.pending_tabs) == 2
+
+        # Opening a tab builds it straight away
+        window.tab_widget.setCurrentIndex(2)
+        assert window.stats_text is not None and window.history_model is None
+
+        # The rest is built in idle time after the first paint
+        window.show()
+        deadline = time.time() + 5
+        while (window.pending_tabs or window.startup.elapsed("statistics loaded") is None) \
+                and time.time() < deadline:
+            app.processEvents()
+        assert window.history_model is not None
+        assert window.startup.elapsed("first paint") is not None
+        assert window.startup.elapsed("statistics loaded") is not None
+        window.close()
+    print("✓ History and Statistics tabs built lazily")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Startup Tests")
+    print("=" * 50)
+
+    test_phase_timer()
+    test_tabs_built_lazily()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
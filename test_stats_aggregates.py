@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for the running statistics aggregates
+Checks that incremental updates agree with a full recompute
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from gin_rummy import MatchRecord, StatisticsService, aggregates, db
+from gin_rummy.writer import WriteBehindQueue
+
+
+def play_random_match(rng):
+    """Generate one match with the tracker's 100-point rule"""
+    zayaka_total = brian_total = 0
+    hands = []
+    while zayaka_total < 100 and brian_total < 100:
+        points = rng.randint(0, 60)
+        if rng.random() < 0.5:
+            hands.append((points, 0))
+            zayaka_total += points
+        else:
+            hands.append((0, points))
+            brian_total += points
+    winner = "Zayaka" if zayaka_total >= 100 else "Brian"
+    return zayaka_total, brian_total, winner, hands
+
+
+def test_incremental_matches_recompute():
+    """Aggregates maintained by insert_match equal a from-scratch rebuild"""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        for day in range(200):
+            zayaka, brian, winner, hands = play_random_match(rng)
+            db.insert_match(conn, zayaka, brian, winner, f"2025-01-01 {day // 60:02d}:{day % 60:02d}:00", hands)
+
+        assert aggregates.verify(conn) == []
+        stats = aggregates.load(conn).statistics()
+        assert stats.total_matches == 200
+        assert stats.zayaka_wins + stats.brian_wins == 200
+        assert stats.total_hands == conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] // 2
+        conn.close()
+    print("✓ Incremental aggregates match a full recompute")
+
+
+def test_streaks():
+    """Longest and current streaks follow match order"""
+    acc = aggregates.StatsAccumulator()
+    for winner in ["Zayaka", "Zayaka", "Brian", "Zayaka", "Zayaka", "Zayaka", "Brian", "Brian"]:
+        acc.add_match(100, 0, winner, [(100, 0)])
+    stats = acc.statistics()
+    assert stats.zayaka_streak == 3
+    assert stats.brian_streak == 2
+    assert (stats.current_streak_winner, stats.current_streak) == ("Brian", 2)
+    print("✓ Win streaks tracked incrementally")
+
+
+def test_matches_saved_out_of_order():
+    """Matches dated before the latest one still keep the streaks right"""
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        for n in range(150):
+            zayaka, brian, winner, hands = play_random_match(rng)
+            minute = rng.randrange(60)
+            db.insert_match(conn, zayaka, brian, winner, f"2025-01-01 10:{minute:02d}:00", hands)
+            assert aggregates.verify(conn) == [], n
+        db.insert_match(conn, 100, 0, "Zayaka", None, [(100, 0)])
+        assert aggregates.verify(conn) == []
+        conn.close()
+    print("✓ Aggregates follow matches saved out of date order")
+
+
+def test_verify_and_rebuild():
+    """A drifted aggregates row is detected and corrected"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        db.insert_match(conn, 110, 20, "Zayaka", "2025-01-01 10:00:00", [(110, 0), (0, 20)])
+        conn.execute('UPDATE stats_aggregates SET zayaka_wins = 5')
+        conn.commit()
+
+        with conn:
+            mismatches = aggregates.rebuild(conn)
+        assert mismatches == [("zayaka_wins", 5, 1)], mismatches
+        assert aggregates.verify(conn) == []
+
+        db.clear_matches(conn)
+        assert aggregates.load(conn).statistics().total_matches == 0
+        assert aggregates.verify(conn) == []
+        conn.close()
+    print("✓ Rebuild detects and fixes drift")
+
+
+def test_rebuild_while_saving():
+    """A match saved while the aggregates are being recomputed is still counted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path)
+        for day in range(1, 51):
+            writer.add_match(MatchRecord(100, 0, "Zayaka", f"2025-01-{day % 28 + 1:02d} 10:00:00", [(100, 0)]))
+        writer.flush(5)
+        reader = db.connect(path)
+        reader.execute('PRAGMA query_only = ON')
+
+        recompute = aggregates.recompute
+
+        def save_during_recompute(conn):
+            fresh = recompute(conn)
+            writer.add_match(MatchRecord(0, 100, "Brian", "2025-02-01 10:00:00", [(0, 100)]))
+            # Time for the writer to commit it, were the rebuild not holding the write lock
+            time.sleep(0.2)
+            return fresh
+
+        aggregates.recompute = save_during_recompute
+        try:
+            StatisticsService(reader, write=writer.submit).rebuild()
+        finally:
+            aggregates.recompute = recompute
+        writer.close()
+        assert aggregates.load(reader).matches == 51
+        assert aggregates.verify(reader) == []
+        reader.close()
+    print("✓ Rebuild keeps a match saved meanwhile")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Aggregates Tests")
+    print("=" * 50)
+
+    test_incremental_matches_recompute()
+    test_streaks()
+    test_matches_saved_out_of_order()
+    test_verify_and_rebuild()
+    test_rebuild_while_saving()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
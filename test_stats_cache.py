@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the fingerprint-keyed statistics cache
+Checks each way a refresh is answered and that answers match a full recompute
+"""
+
+import os
+import tempfile
+
+from gin_rummy import MatchRecord, MatchRepository, StatisticsService, db
+from gin_rummy.queries import query_aggregates
+from gin_rummy.stats_cache import StatisticsCache
+from gin_rummy.writer import WriteBehindQueue
+
+
+def record(n, winner="Zayaka", date=None):
+    hands = [(60, 0), (0, n), (45, 0)] if winner == "Zayaka" else [(0, 70), (n, 0), (0, 35)]
+    zayaka, brian = sum(h[0] for h in hands), sum(h[1] for h in hands)
+    return MatchRecord(zayaka, brian, winner, date or f"2025-08-06 19:{n:02d}:00", hands)
+
+
+def check(cache, expected_source):
+    acc = cache.aggregates()
+    assert cache.last_source == expected_source, (cache.last_source, expected_source)
+    assert acc == query_aggregates(cache.conn)
+    return acc
+
+
+def test_cache_sources():
+    """Refreshes are served from memory, the sidecar table, a delta or a full recompute"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with MatchRepository.open(path) as writer, MatchRepository.open(path) as reader:
+            writer.add_many(record(n, "Zayaka" if n % 3 else "Brian") for n in range(1, 20))
+            cache = StatisticsCache(reader.conn)
+            check(cache, "full")
+            check(cache, "memory")
+            # A fresh cache, as after a restart, reads the sidecar table
+            check(StatisticsCache(reader.conn), "cached")
+
+            writer.add_many([record(30, "Brian"), record(31, "Brian")])
+            assert check(cache, "delta").current_streak == 2
+
+            # A match dated before the cached history breaks the order, so everything is re-read
+            writer.add(record(5, date="2025-08-06 18:00:00"))
+            check(cache, "full")
+
+            edited = record(40, "Brian")
+            writer.update(3, edited)
+            check(cache, "full")
+            check(cache, "memory")
+
+            writer.clear()
+            assert check(cache, "full").matches == 0
+    print("✓ Cache answers from memory, sidecar, delta or full recompute")
+
+
+def test_cache_saved_through_writer():
+    """A read-only connection hands the sidecar write to the writer thread"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        queue = WriteBehindQueue(path)
+        try:
+            for n in range(1, 8):
+                queue.add_match(record(n))
+            queue.flush()
+            reader = db.connect(path)
+            reader.execute('PRAGMA query_only = ON')
+            check(StatisticsCache(reader, write=queue.submit), "full")
+            queue.flush()
+            check(StatisticsCache(reader, write=queue.submit), "cached")
+            reader.close()
+        finally:
+            queue.close()
+    print("✓ Cache saved through the writer thread")
+
+
+def test_service_recompute_uses_cache():
+    """StatisticsService.recompute goes through the cache and matches the aggregates"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            repo.add_many(record(n) for n in range(1, 6))
+            service = StatisticsService(repo.conn)
+            assert service.recompute() == service.current()
+            assert service.cache.last_source == "full"
+            repo.add(record(9, "Brian"))
+            assert service.recompute() == service.current()
+            assert service.cache.last_source == "delta"
+    print("✓ Service recompute served from the cache")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Statistics Cache Tests")
+    print("=" * 50)
+
+    test_cache_sources()
+    test_cache_saved_through_writer()
+    test_service_recompute_uses_cache()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the versioned storage layer
+Checks connection tuning, indexes and the upgrade to epoch timestamps
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from gin_rummy import db
+
+
+def make_v1_db(path):
+    """Create a file as the hands-table release left it: TEXT dates, user_version 1"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            zayaka_score INTEGER,
+            brian_score INTEGER,
+            winner TEXT,
+            match_date TEXT,
+            game_scores TEXT
+        );
+        CREATE TABLE hands (
+            match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+            hand_no INTEGER NOT NULL,
+            player TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (match_id, hand_no, player)
+        ) WITHOUT ROWID;
+        INSERT INTO matches VALUES (1, 100, 0, 'Zayaka', '2025-08-06 19:12:28', 'Zayaka:100, Brian:0');
+        INSERT INTO matches VALUES (2, 0, 100, 'Brian', '2025-08-07 20:00:00', 'Zayaka:0, Brian:100');
+        INSERT INTO hands VALUES (1, 1, 'Zayaka', 100), (1, 1, 'Brian', 0),
+                                 (2, 1, 'Zayaka', 0), (2, 1, 'Brian', 100);
+        PRAGMA user_version = 1;
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def test_connection_settings():
+    """Connections use WAL, relaxed sync and the history indexes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'history.db'))
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == db.SCHEMA_VERSION
+        plan = conn.execute('''
+            EXPLAIN QUERY PLAN SELECT id FROM matches ORDER BY match_date DESC, id DESC LIMIT 200
+        ''').fetchall()
+        assert any('idx_matches_date' in step[3] for step in plan), plan
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM matches WHERE winner = 'Zayaka'").fetchall()
+        assert any('idx_matches_winner' in step[3] for step in plan), plan
+        conn.close()
+    print("✓ WAL, pragmas and indexes in place")
+
+
+def test_epoch_round_trip():
+    """Stored epoch seconds render back to the original local time text"""
+    epoch = db.to_epoch('2025-08-06 19:12:28')
+    assert isinstance(epoch, int)
+    assert db.format_date(epoch) == '2025-08-06 19:12:28'
+    assert db.to_epoch(epoch) == epoch
+    assert db.format_date(None) == ''
+    print("✓ Epoch timestamps round-trip")
+
+
+def test_upgrade_to_epoch_dates():
+    """A version 1 file is rebuilt with integer dates and keeps its hands"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        make_v1_db(path)
+
+        conn = db.connect(path)
+        rows = conn.execute('SELECT id, match_date, typeof(match_date) FROM matches ORDER BY id').fetchall()
+        assert rows == [(1, db.to_epoch('2025-08-06 19:12:28'), 'integer'),
+                        (2, db.to_epoch('2025-08-07 20:00:00'), 'integer')], rows
+        # Dropping the old table must not have cascaded into hands
+        assert conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 4
+        assert conn.execute('PRAGMA foreign_key_check').fetchall() == []
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == db.SCHEMA_VERSION
+
+        # The rebuilt table keeps AUTOINCREMENT ids and cascading deletes
+        match_id = db.insert_match(conn, 100, 5, 'Zayaka', '2025-08-08 19:00:00', [(100, 5)])
+        assert match_id == 3
+        conn.execute('DELETE FROM matches WHERE id = 1')
+        assert conn.execute('SELECT COUNT(*) FROM hands WHERE match_id = 1').fetchone()[0] == 0
+        conn.close()
+    print("✓ Version 1 files upgraded to epoch dates")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Storage Tests")
+    print("=" * 50)
+
+    test_connection_settings()
+    test_epoch_round_trip()
+    test_upgrade_to_epoch_dates()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
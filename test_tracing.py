@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for hot-path tracing
+Checks that a disabled tracer records nothing, that spans nest and carry
+row counts across threads, that the Chrome trace export is well formed,
+and that the window's hot paths are traced
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from gin_rummy.timing import NULL_SPAN, Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    """With tracing off every span is the shared no-op span"""
+    tracer = Tracer()
+    with tracer.span("add_scores", rows=3) as span:
+        span.set(rows=4)
+    assert span is NULL_SPAN and not tracer.spans
+    assert tracer.status_line(("add_scores",)) == ""
+    print("✓ Disabled tracer records nothing")
+
+
+def test_spans_nest_and_export():
+    """Spans nest in time, keep their rows and threads, and export as Chrome trace events"""
+    tracer = Tracer(enabled=True, capacity=50)
+    with tracer.span("outer", rows=2) as outer:
+        with tracer.span("inner"):
+            time.sleep(0.001)
+        outer.set(rows=3)
+
+    def worker():
+        with tracer.span("query") as span:
+            span.set(rows=7)
+
+    thread = threading.Thread(target=worker, name="db worker")
+    thread.start()
+    thread.join()
+
+    inner, outer, query = tracer.spans
+    assert (inner.name, outer.name, query.name) == ("inner", "outer", "query")
+    assert outer.start <= inner.start and inner.start + inner.duration <= outer.start + outer.duration
+    assert inner.duration >= 0.001 and outer.args == {"rows": 3}
+    assert query.thread != outer.thread
+    assert tracer.status_line(("query", "missing", "outer")).startswith("query ")
+    assert "(7 rows)" in tracer.status_line(("query",))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        tracer.export_chrome(path, marks=[("first paint", 0.5)])
+        with open(path, encoding="utf-8") as f:
+            trace = json.load(f)
+    events = trace["traceEvents"]
+    complete = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(complete) == {"outer", "inner", "query"}
+    assert complete["query"]["args"] == {"rows": 7}
+    assert complete["inner"]["dur"] >= 1000 and complete["outer"]["ts"] <= complete["inner"]["ts"]
+    names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+    assert "db worker" in names
+    assert [event["ts"] for event in events if event["ph"] == "i"] == [500000.0]
+
+    # The buffer keeps only the newest spans
+    for n in range(100):
+        with tracer.span(f"span {n}"):
+            pass
+    assert len(tracer.spans) == 50 and tracer.spans[-1].name == "span 99"
+    print("✓ Spans nest and export as a Chrome trace")
+
+
+def test_tracer_read_while_recording():
+    """The status line and export can be read while another thread records spans"""
+    tracer = Tracer(enabled=True, capacity=5000)
+    done = threading.Event()
+
+    def worker():
+        while not done.is_set():
+            with tracer.span("history page", rows=1):
+                pass
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        for _ in range(300):
+            tracer.status_line(("history page", "never run"))
+            tracer.chrome_events()
+    finally:
+        done.set()
+        thread.join()
+    assert set(tracer.latest(("history page", "never run"))) == {"history page"}
+    print("✓ Tracer read while recording")
+
+
+def test_window_hot_paths_traced():
+    """Entering hands and loading statistics and history record spans with row counts"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from gin_rummy_tracker_pyqt5 import HOT_PATHS, GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = Tracer(enabled=True)
+        trace_path = os.path.join(tmp, "trace.json")
+        window = GinRummyTracker(db_path=os.path.join(tmp, 'history.db'), tracer=tracer, trace_path=trace_path)
+        for index in range(window.tab_widget.count()):
+            window.tab_widget.setCurrentIndex(index)
+        window.zayaka_entry.setText("25")
+        window.add_scores()
+        window.zayaka_entry.setText("30")
+        window.add_scores()
+        window.load_match_history()
+        # Statistics and the history page are read on the database thread and shown back here
+        awaited = ("show_statistics", "history page")
+        deadline = time.time() + 5
+        while len(tracer.latest(awaited)) < len(awaited) and time.time() < deadline:
+            app.processEvents()
+
+        latest = tracer.latest(HOT_PATHS)
+        assert {"init_database", "add_scores", "load_match_history", "update_statistics",
+                "statistics query", "history page"} <= {span.name for span in tracer.spans}
+        assert latest["add_scores"].args["rows"] == 2
+        assert latest["history page"].args["rows"] == 0
+        assert latest["statistics query"].thread != latest["add_scores"].thread
+        window.show_trace()
+        assert "add_scores" in window.trace_label.text()
+        window.close()
+        with open(trace_path, encoding="utf-8") as f:
+            names = {event["name"] for event in json.load(f)["traceEvents"]}
+        assert {"parse_entry", "append_current_score_row", "statistics loaded"} <= names
+    print("✓ Window hot paths traced")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Tracing Tests")
+    print("=" * 50)
+
+    test_disabled_tracer_records_nothing()
+    test_spans_nest_and_export()
+    test_tracer_read_while_recording()
+    test_window_hot_paths_traced()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk import/export
+Round-trips match history through CSV and JSONL files, and checks that
+an import stopped by a bad row leaves the derived tables consistent
+"""
+
+import json
+import os
+import tempfile
+
+from gin_rummy import aggregates, db, histograms, players, ratings, search
+from gin_rummy.transfer import export_matches, import_matches
+
+MATCHES = [
+    (104, 22, "Zayaka", "2025-08-06 19:12:28", [(12, 0), (77, 0), (0, 22), (15, 0)]),
+    (64, 102, "Brian", "2025-08-06 19:56:13", [(9, 0), (0, 39), (55, 0), (0, 63)]),
+    (107, 51, "Zayaka", "2025-08-06 20:42:01", [(38, 0), (0, 51), (69, 0)]),
+]
+
+
+def dump(conn):
+    return conn.execute('''
+        SELECT zayaka_score, brian_score, winner, match_date, game_scores FROM matches ORDER BY id
+    ''').fetchall()
+
+
+def round_trip(fmt):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = db.connect(os.path.join(tmp, 'source.db'))
+        for match in MATCHES:
+            db.insert_match(source, *match)
+        path = os.path.join(tmp, f'history.{fmt}')
+        exported = export_matches(source, path)
+        assert exported.matches == 3 and exported.hands == 11, exported
+
+        target = db.connect(os.path.join(tmp, 'target.db'))
+        imported = import_matches(target, path, batch_size=2)
+        assert imported.matches == 3 and imported.hands == 11, imported
+        assert dump(target) == dump(source)
+        assert target.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 22
+        assert aggregates.verify(target) == []
+
+        # Importing again appends; --replace restores exactly
+        import_matches(target, path)
+        assert len(dump(target)) == 6
+        import_matches(target, path, replace=True)
+        assert dump(target) == dump(source)
+        indexes = target.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall()
+        assert ('idx_hands_player_points',) in indexes
+        source.close()
+        target.close()
+
+
+def test_failed_import_keeps_derived_tables():
+    """Batches committed before a bad row are counted, rated and searchable"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for zayaka, brian, winner, match_date, hands in MATCHES * 2:
+                f.write(json.dumps({"match_date": match_date, "zayaka_score": zayaka, "brian_score": brian,
+                                    "winner": winner, "hands": hands}) + "\n")
+            f.write('{"match_date": "2025-08-07 19:00:00", "zayaka_score": "lots"}\n')
+
+        conn = db.connect(os.path.join(tmp, 'target.db'))
+        try:
+            import_matches(conn, path, batch_size=4)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("the bad row was imported")
+        assert conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0] == 4
+        assert aggregates.load(conn).matches == 4
+        for module in (aggregates, histograms, players, ratings, search):
+            assert module.verify(conn) == [], module.__name__
+        hits = conn.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH '\"Brian:63\"'")
+        assert hits.fetchone()[0] == 1
+        conn.close()
+    print("✓ Failed import keeps derived tables consistent")
+
+
+def test_csv_round_trip():
+    round_trip("csv")
+    print("✓ CSV export/import round trip")
+
+
+def test_jsonl_round_trip():
+    round_trip("jsonl")
+    print("✓ JSONL export/import round trip")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Import/Export Tests")
+    print("=" * 50)
+
+    test_csv_round_trip()
+    test_jsonl_round_trip()
+    test_failed_import_keeps_derived_tables()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Test script for the match event log
+Checks undo/redo, snapshots, corrections, journaling and editing saved matches
+"""
+
+import os
+import random
+import tempfile
+
+from gin_rummy import Match, MatchRecord, MatchRepository, aggregates
+from gin_rummy.events import SNAPSHOT_INTERVAL, MatchLog
+from gin_rummy.journal import MatchJournal
+
+
+def test_undo_redo():
+    """Undo and redo step through hands and corrections; a new event drops the redo tail"""
+    log = MatchLog()
+    log.add_hand(25, 0)
+    log.add_hand(0, 40)
+    log.correct_hand(0, 30, 0)
+    assert log.match.hands == [(30, 0), (0, 40)] and log.match.zayaka_total == 30
+
+    assert log.undo().index == 0
+    assert log.match.hands == [(25, 0), (0, 40)]
+    log.undo()
+    assert log.match.hands == [(25, 0)] and log.can_redo
+    log.redo()
+    assert log.match.brian_total == 40
+
+    log.add_hand(10, 0)
+    assert not log.can_redo and log.match.hands == [(25, 0), (0, 40), (10, 0)]
+    while log.undo():
+        pass
+    assert log.match == Match() and not log.can_undo
+    print("✓ Undo and redo")
+
+
+def test_snapshots_match_replay():
+    """Every position rebuilt from a snapshot equals a replay from the start"""
+    rng = random.Random(7)
+    log = MatchLog(target_score=10 ** 9)
+    for _ in range(10 * SNAPSHOT_INTERVAL):
+        if log.match.hands and rng.random() < 0.3:
+            log.correct_hand(rng.randrange(len(log.match.hands)), rng.randint(0, 50), 0)
+        else:
+            log.add_hand(rng.randint(0, 50), 0)
+    for position in range(len(log.events) + 1):
+        replayed = Match(log.target_score)
+        for event in log.events[:position]:
+            event.apply(replayed)
+        assert log.state_at(position) == replayed, position
+    print("✓ Snapshots agree with a full replay")
+
+
+def test_invalid_corrections_rejected():
+    """Negative scores, two scorers and corrections that end a match early leave the log unchanged"""
+    log = MatchLog()
+    log.add_hand(60, 0)
+    log.add_hand(0, 20)
+    for bad in [(0, -5, 0), (5, 10, 0), (0, 100, 0), (1, 45, 20)]:
+        try:
+            log.correct_hand(*bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"accepted {bad}")
+    assert log.match.hands == [(60, 0), (0, 20)] and len(log.events) == 2
+    # Both players reaching the target at once would leave no clear winner
+    try:
+        log.add_hand(40, 80)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("accepted a hand where both players scored")
+
+    # Correcting the last hand can finish the match
+    assert log.correct_hand(1, 45, 0)
+    assert log.match.winner == "Zayaka"
+    print("✓ Invalid corrections rejected")
+
+
+def test_journal_replays_undo_and_corrections():
+    """A crash after undo, redo and corrections recovers the same position"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db-match')
+        journal = MatchJournal(path)
+        log = journal.recover().log
+        for zayaka, brian in [(20, 0), (0, 15), (7, 0)]:
+            log.add_hand(zayaka, brian)
+            journal.record_hand(log.match, zayaka, brian)
+        log.correct_hand(1, 0, 18)
+        journal.record_correction(log.match, 1, 0, 18)
+        log.undo()
+        journal.record_undo(log.match)
+        log.undo()
+        journal.record_undo(log.match)
+        log.redo()
+        journal.record_redo(log.match)
+
+        recovered = MatchJournal(path).recover().log
+        assert recovered.match == log.match
+        assert recovered.position == log.position and recovered.can_redo
+        assert recovered.redo() == log.redo()
+        assert recovered.match.hands == [(20, 0), (0, 18), (7, 0)]
+    print("✓ Journal replays undo, redo and corrections")
+
+
+def test_edit_saved_match_updates_aggregates():
+    """Edited matches keep the stored aggregates equal to a full recompute"""
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            for n in range(30):
+                match = Match()
+                while not match.is_over:
+                    match.add_hand(*rng.choice([(rng.randint(0, 40), 0), (0, rng.randint(0, 40))]))
+                repo.add(match.record(f'2025-08-06 19:{n:02d}:00'))
+
+            edits = 0
+            while edits < 40:
+                match_id = rng.randint(1, 30)
+                record = repo.get(match_id)
+                log = MatchLog(hands=record.hands)
+                hand = rng.randrange(len(record.hands))
+                try:
+                    log.correct_hand(hand, *rng.choice([(rng.randint(0, 60), 0), (0, rng.randint(0, 60))]))
+                    edited = log.match.record(record.match_date)
+                except ValueError:
+                    continue
+                assert repo.update(match_id, edited)
+                assert repo.get(match_id) == edited
+                assert aggregates.verify(repo.conn) == [], edits
+                edits += 1
+            assert not repo.update(999, edited)
+    print("✓ Saved matches edited with incremental statistics")
+
+
+def test_edits_never_recompute():
+    """Flipped winners and changed hand counts update streaks and games without a full recompute"""
+    rng = random.Random(12)
+
+    def random_record(date):
+        hands = [rng.choice([(rng.randint(1, 40), 0), (0, rng.randint(1, 40))]) for _ in range(rng.randint(1, 6))]
+        return MatchRecord(sum(h[0] for h in hands), sum(h[1] for h in hands), rng.choice(["Zayaka", "Brian"]),
+                           date, hands)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            # Three matches share each time, so runs cross ties in the date order
+            repo.add_many(random_record(f'2025-08-06 19:{n // 3:02d}:00') for n in range(45))
+            recompute = aggregates.recompute
+            aggregates.recompute = None
+            try:
+                for edits in range(150):
+                    match_id = rng.randint(1, 45)
+                    repo.update(match_id, random_record(None))
+                    aggregates.recompute = recompute
+                    assert aggregates.verify(repo.conn) == [], edits
+                    aggregates.recompute = None
+            finally:
+                aggregates.recompute = recompute
+    print("✓ Edits update streaks and games incrementally")
+
+
+def test_score_tab_undo_and_correction():
+    """The Score tab undoes hands and records in-table corrections"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'history.db')
+        window = GinRummyTracker(db_path=db_path)
+        for zayaka, brian in [("30", ""), ("", "12"), ("9", "")]:
+            window.zayaka_entry.setText(zayaka)
+            window.brian_entry.setText(brian)
+            window.add_scores()
+
+        window.undo_hand()
+        assert window.match.hands == [(30, 0), (0, 12)]
+        assert window.current_scores_table.rowCount() == 3
+        assert window.zayaka_total_label.text() == "Zayaka: 30"
+        assert window.redo_button.isEnabled()
+
+        # Typing over a score corrects that hand
+        window.current_scores_table.item(1, 2).setText("21")
+        assert window.match.hands == [(30, 0), (0, 21)]
+        assert window.brian_total_item.text() == "21"
+        assert not window.redo_button.isEnabled()
+        window.current_scores_table.item(0, 1).setText("oops")
+        assert window.current_scores_table.item(0, 1).text() == "30"
+        # Giving the other player the points takes them from the first
+        window.current_scores_table.item(1, 1).setText("15")
+        assert window.match.hands == [(30, 0), (15, 0)]
+        assert window.current_scores_table.item(1, 2).text() == "0"
+        window.current_scores_table.item(1, 2).setText("21")
+        assert window.match.hands == [(30, 0), (0, 21)]
+
+        # The journal keeps the corrected match for recovery
+        recovered = GinRummyTracker(db_path=db_path)
+        assert recovered.match.hands == [(30, 0), (0, 21)]
+        recovered.close()
+        window.close()
+        app.processEvents()
+    print("✓ Score tab undo, redo and corrections")
+
+
+def test_match_editor_dialog():
+    """The editor corrects a saved match through its own undoable log"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QDialogButtonBox
+    from gin_rummy import MatchRecord
+    from gin_rummy.qt.match_editor import MatchEditorDialog
+
+    app = QApplication.instance() or QApplication([])
+    record = MatchRecord(105, 12, "Zayaka", "2025-08-06 19:12:28", [(60, 0), (0, 12), (45, 0)])
+    dialog = MatchEditorDialog(7, record)
+    save = dialog.buttons.button(QDialogButtonBox.Save)
+    assert not save.isEnabled() and not dialog.undo_button.isEnabled()
+
+    dialog.table.item(1, 2).setText("20")
+    assert save.isEnabled()
+    assert dialog.edited_record() == MatchRecord(105, 20, "Zayaka", "2025-08-06 19:12:28",
+                                                 [(60, 0), (0, 20), (45, 0)])
+    # Points for Zayaka in Brian's hand are moved over rather than shared
+    dialog.table.item(1, 1).setText("10")
+    assert dialog.log.match.hands == [(60, 0), (10, 0), (45, 0)] and dialog.table.item(1, 2).text() == "0"
+    dialog.undo()
+    # A last hand too small to finish the match cannot be saved
+    dialog.table.item(2, 1).setText("5")
+    assert not save.isEnabled()
+    dialog.undo()
+    assert save.isEnabled() and dialog.table.item(2, 1).text() == "45"
+    dialog.close()
+    app.processEvents()
+    print("✓ Saved match editor")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Undo/Redo Tests")
+    print("=" * 50)
+
+    test_undo_redo()
+    test_snapshots_match_replay()
+    test_invalid_corrections_rejected()
+    test_journal_replays_undo_and_corrections()
+    test_edit_saved_match_updates_aggregates()
+    test_edits_never_recompute()
+    test_score_tab_undo_and_correction()
+    test_match_editor_dialog()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
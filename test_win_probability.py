@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for the win probability table
+Checks the solved table against a direct recursion and when it is rebuilt
+"""
+
+import os
+import tempfile
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+from gin_rummy import Match, MatchRecord, MatchRepository, db, win_probability
+from gin_rummy.histograms import ScoreHistogram
+from gin_rummy.win_probability import SCALE, WinProbabilityTable
+from gin_rummy.writer import WriteBehindQueue
+
+
+def histograms_of(zayaka, brian):
+    return {"Zayaka": ScoreHistogram(zayaka), "Brian": ScoreHistogram(brian)}
+
+
+def test_table_matches_recursion():
+    """Every state agrees with an exact recursion over the same hand distribution"""
+    zayaka, brian = {0: 4, 3: 2, 5: 1, 9: 1}, {0: 3, 2: 1, 4: 3, 12: 1}
+    target = 15
+    hands = sum(n for points, n in zayaka.items() if points) + sum(n for points, n in brian.items() if points)
+
+    @lru_cache(maxsize=None)
+    def chance(z, b):
+        if z >= target:
+            return Fraction(1)
+        if b >= target:
+            return Fraction(0)
+        total = sum(Fraction(n, hands) * chance(z + points, b) for points, n in zayaka.items() if points)
+        return total + sum(Fraction(n, hands) * chance(z, b + points) for points, n in brian.items() if points)
+
+    table = WinProbabilityTable.build(histograms_of(zayaka, brian), target)
+    for z in range(target + 2):
+        for b in range(target + 2):
+            if z >= target and b >= target:
+                continue
+            assert abs(table.zayaka_chance(z, b) - float(chance(z, b))) <= 1 / SCALE, (z, b)
+
+    # Identical players are even from level totals
+    even = WinProbabilityTable.build(histograms_of({10: 3, 25: 1}, {10: 3, 25: 1}))
+    assert abs(even.zayaka_chance(40, 40) - 0.5) <= 1 / SCALE
+    assert even.zayaka_chance(90, 0) > 0.9 and even.chances(Match(hands=[], zayaka_total=0, brian_total=95))[1] > 0.9
+    assert WinProbabilityTable.build(histograms_of({0: 5}, {})) is None
+    print("✓ Table matches the exact recursion")
+
+
+def test_refresh_rebuilds_as_history_grows():
+    """The stored table is reused until the scoring hands move by REBUILD_FRACTION"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with MatchRepository.open(os.path.join(tmp, 'history.db')) as repo:
+            assert win_probability.refresh(repo.conn) is None
+            for n in range(60):
+                repo.add(MatchRecord(100, 30, "Zayaka", f"2025-08-06 19:{n:02d}:00",
+                                     [(40, 0), (0, 30), (60, 0)]))
+            table = win_probability.refresh(repo.conn)
+            assert table.hands == 180 and table.zayaka_chance(0, 0) > 0.5
+            assert win_probability.load(repo.conn).probabilities == table.probabilities
+
+            # One more scoring hand is within 1% of 180, so the stored table is kept
+            repo.add(MatchRecord(0, 100, "Brian", "2025-08-06 20:00:00", [(0, 100)]))
+            assert win_probability.refresh(repo.conn).hands == 180
+            repo.add(MatchRecord(100, 30, "Zayaka", "2025-08-06 20:01:00", [(40, 0), (0, 30), (60, 0)]))
+            assert win_probability.refresh(repo.conn).hands == 184
+
+            repo.clear()
+            assert win_probability.refresh(repo.conn) is None
+            assert win_probability.load(repo.conn) is None
+    print("✓ Table rebuilt as the history grows")
+
+
+def test_refresh_saves_through_writer():
+    """A read-only connection hands the rebuilt table to the writer thread"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        queue = WriteBehindQueue(path)
+        try:
+            queue.add_match(MatchRecord(100, 30, "Zayaka", "2025-08-06 19:00:00", [(40, 0), (0, 30), (60, 0)]))
+            queue.flush()
+            reader = db.connect(path)
+            reader.execute('PRAGMA query_only = ON')
+            table = win_probability.refresh(reader, write=queue.submit)
+            queue.flush()
+            assert win_probability.load(reader).probabilities == table.probabilities
+            reader.close()
+        finally:
+            queue.close()
+    print("✓ Table saved through the writer thread")
+
+
+def test_score_tab_shows_chance():
+    """The Score tab shows the chance to win after every hand"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from gin_rummy_tracker_pyqt5 import GinRummyTracker
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        window = GinRummyTracker(db_path=os.path.join(tmp, 'history.db'))
+        assert window.win_chance_label.text() == ""
+        window.set_win_table(WinProbabilityTable.build(histograms_of({20: 1}, {20: 1})))
+        assert window.win_chance_label.text() == "Chance to win: Zayaka 50% - Brian 50%"
+
+        window.zayaka_entry.setText("80")
+        window.add_scores()
+        zayaka = window.win_table.zayaka_chance(80, 0)
+        assert window.win_chance_label.text() == f"Chance to win: Zayaka {zayaka:.0%} - Brian {1 - zayaka:.0%}"
+        window.undo_hand()
+        assert window.win_chance_label.text() == "Chance to win: Zayaka 50% - Brian 50%"
+
+        # Clearing all data drops the table built from the old history; the
+        # start-up refresh is left to finish first so it cannot do that itself
+        deadline = time.time() + 5
+        while window.db_thread._jobs and time.time() < deadline:
+            app.processEvents()
+        window.set_win_table(WinProbabilityTable.build(histograms_of({20: 1}, {20: 1})))
+        question, information = QMessageBox.question, QMessageBox.information
+        QMessageBox.question = staticmethod(lambda *args: QMessageBox.Yes)
+        QMessageBox.information = staticmethod(lambda *args: QMessageBox.Ok)
+        try:
+            window.clear_all_data()
+        finally:
+            QMessageBox.question, QMessageBox.information = question, information
+        deadline = time.time() + 5
+        while window.win_table is not None and time.time() < deadline:
+            app.processEvents()
+        assert window.win_table is None and window.win_chance_label.text() == ""
+        window.close()
+        app.processEvents()
+    print("✓ Score tab shows the chance to win")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Win Probability Tests")
+    print("=" * 50)
+
+    test_table_matches_recursion()
+    test_refresh_rebuilds_as_history_grows()
+    test_refresh_saves_through_writer()
+    test_score_tab_shows_chance()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the group-commit write queue
+Checks batching, commit-before-acknowledge, savepoint isolation and close()
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from gin_rummy import MatchRecord, MatchRepository, db
+from gin_rummy.writer import WriteBehindQueue, WriteSettings
+
+
+def make_record(n):
+    return MatchRecord(100, n, 'Zayaka', f'2025-08-06 19:{n // 60:02d}:{n % 60:02d}', [(100, n)])
+
+
+def test_group_commit():
+    """A burst of matches is committed in far fewer transactions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path, WriteSettings(max_delay=0.2))
+        assert writer.ready.wait(5)
+        futures = [writer.add_match(make_record(n)) for n in range(50)]
+        ids = [future.result(5) for future in futures]
+        assert ids == list(range(1, 51)), ids
+        assert writer.committed == 50 and writer.batches < 50, writer.batches
+
+        # Acknowledged writes are visible to any other connection
+        with MatchRepository.open(path) as repo:
+            assert repo.count() == 50
+            assert repo.get(50) == make_record(49)
+        writer.close()
+    print("✓ Burst of matches group-committed")
+
+
+def test_failed_write_rolled_back_alone():
+    """A failing write does not undo the others in its batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path, WriteSettings(max_delay=0.2))
+
+        def half_written(conn):
+            db.write_match(conn, 100, 0, 'Zayaka', '2025-08-06 20:00:00', [(100, 0)])
+            raise ValueError("bad match")
+
+        first = writer.add_match(make_record(1))
+        failed = writer.submit(half_written)
+        last = writer.add_match(make_record(2))
+        assert first.result(5) == 1 and last.result(5) is not None
+        assert isinstance(failed.exception(5), ValueError)
+        writer.close()
+
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT brian_score FROM matches ORDER BY id').fetchall() == [(1,), (2,)]
+        assert conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 4
+        conn.close()
+    print("✓ Failed write rolled back alone")
+
+
+def test_close_flushes_queue():
+    """close() commits everything still queued and refuses new writes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path, WriteSettings(max_delay=10, synchronous="FULL"))
+        futures = [writer.add_match(make_record(n)) for n in range(5)]
+        writer.close()
+        assert all(future.done() and future.exception() is None for future in futures)
+        try:
+            writer.add_match(make_record(6))
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("closed queue accepted a write")
+
+        with MatchRepository.open(path) as repo:
+            assert repo.count() == 5
+    print("✓ close() flushes queued matches")
+
+
+def test_clear():
+    """clear() deletes matches and resets the stored statistics"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        writer = WriteBehindQueue(path)
+        writer.add_match(make_record(1))
+        writer.clear().result(5)
+        writer.flush(5)
+        writer.close()
+        with MatchRepository.open(path) as repo:
+            assert repo.count() == 0
+            assert repo.conn.execute('SELECT COUNT(*) FROM hands').fetchone()[0] == 0
+    print("✓ clear() empties the history")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("GinRummy Score Tracker - Write Queue Tests")
+    print("=" * 50)
+
+    test_group_commit()
+    test_failed_write_rolled_back_alone()
+    test_close_flushes_queue()
+    test_clear()
+
+    print("=" * 50)
+    print("All tests completed!")
+    print("=" * 50)